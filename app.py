@@ -1,3 +1,6 @@
+import os
+import threading
+
 import streamlit as st
 
 st.set_page_config(page_title="बहलोलपुर वंशावली")
@@ -8,17 +11,50 @@ from streamlit_option_menu import option_menu
 from data.add_member import render_add_member_form
 from data.bulk_update import render_bulk_update_form
 from data.database import (EVENTS_COLLECTION, FAMILY_COLLECTION,
-                           USERS_COLLECTION)
+                           USERS_COLLECTION, warm_up)
 from data.db_view import render_database_view
+from data.debug_panel import render_debug_panel
 from data.edit_member import render_edit_member_form
 from data.events import render_add_event_form, render_events_page
 from data.history_page import render_history_markdown
+from data.indexes import bootstrap_on_startup
+from data.snapshot import READ_ONLY_SNAPSHOT, snapshot_active
 from data.lineage_info import render_lineage_sidebar
 from data.view_details import render_search_interface
+from data.view_kinship import render_kinship_view
 from data.view_tree import render_tree_view
 from handlers.auth_handlers import handle_login, handle_logout
+from handlers.graph_index import get_graph_index
+from handlers.label_index import get_label_index
+from handlers.profiling import (install_mongo_profiler, new_session_id,
+                                profile_rerun, span)
 from handlers.request_handlers import get_relatives
 
+# 0. Mongo command listener, registered before the first client is created
+install_mongo_profiler()
+
+# 1. Startup, once per server process and off the render path:
+#    warm the Mongo pool, then create/check indexes (never blocks the page on failure,
+#    problems are logged and shown in the admin debug panel)
+#    (read-only snapshot mode: build the in-memory indexes instead)
+def _startup():
+    if snapshot_active():
+        # Read-only snapshot: nothing to connect to, build the shared indexes from it instead
+        get_graph_index()
+        get_label_index()
+        return
+    warm_up()
+    if os.getenv("ENSURE_INDEXES_ON_STARTUP", "1") == "1":
+        bootstrap_on_startup()
+
+@st.cache_resource
+def _start_background_startup():
+    thread = threading.Thread(target=_startup, name="app-startup", daemon=True)
+    thread.start()
+    return thread
+
+_start_background_startup()
+
 # 2. Initialize Session State
 if 'logged_in' not in st.session_state:
     st.session_state['logged_in'] = False
@@ -26,6 +62,9 @@ if 'logged_in' not in st.session_state:
 if 'nav_mode' not in st.session_state:
     st.session_state['nav_mode'] = "search"
 
+if 'profile_session' not in st.session_state:
+    st.session_state['profile_session'] = new_session_id()
+
 if st.session_state.get('just_logged_in'):
     st.session_state['nav_mode'] = "admin"
     st.session_state['just_logged_in'] = False
@@ -38,6 +77,7 @@ nav_config = {
     "history": {"label": "History", "icon": "info-circle"},
     "search": {"label": "Search", "icon": "search"},
     "tree": {"label": "Tree", "icon": "diagram-3"},
+    "kinship": {"label": "Relation", "icon": "people"},
     "events": {"label": "Events", "icon": "calendar-event"},
     "admin": {
         "label": "Admin Panel" if st.session_state.get('logged_in') else "Admin", 
@@ -93,52 +133,70 @@ if st.session_state.get('nav_mode') != selection:
 
 st.divider()
 
-# --- PUBLIC SECTIONS ---
-if selection == "history":
-    render_history_markdown()
 
-elif selection == "search":
-    render_search_interface(get_relatives)
+def render_selection(selection):
+    """Dispatches to the page renderer. Each rerun is profiled as one unit (see handlers/profiling.py)."""
+    # --- PUBLIC SECTIONS ---
+    if selection == "history":
+        render_history_markdown()
+
+    elif selection == "search":
+        render_search_interface(get_relatives)
+
+    elif selection == "tree":
+        render_tree_view(FAMILY_COLLECTION, None)
+
+    elif selection == "kinship":
+        render_kinship_view()
+
+    elif selection == "events":
+        render_events_page(EVENTS_COLLECTION)
+
+    # --- ADMIN SECTION ---
+    elif selection == "admin":
+        if snapshot_active():
+            st.info(f"🔒 This server runs read-only from the snapshot in `{READ_ONLY_SNAPSHOT}`. "
+                    "Editing is available on the live site.")
+        elif not st.session_state['logged_in']:
+            handle_login(USERS_COLLECTION)
+        else:
+            c1, c2 = st.columns([6, 1])
+            with c1:
+                st.info(f"👋 Welcome, **{st.session_state.get('user_name').title()}**")
+            with c2:
+                if st.button("Logout", type="secondary"):
+                    handle_logout()
 
-elif selection == "tree":
-    render_tree_view(FAMILY_COLLECTION, None)
+            admin_tab = st.radio(
+                "Manage Database:",
+                options=["Add New Member", "Edit Details", "Add Event", "Bulk Update", "View Full Data", "Performance"],
+                horizontal=True,
+                label_visibility="collapsed"
+            )
 
-elif selection == "events":
-    render_events_page(EVENTS_COLLECTION)
+            st.markdown("---")
 
-# --- ADMIN SECTION ---
-elif selection == "admin":
-    if not st.session_state['logged_in']:
-        handle_login(USERS_COLLECTION)
-    else:
-        c1, c2 = st.columns([6, 1])
-        with c1:
-            st.info(f"👋 Welcome, **{st.session_state.get('user_name').title()}**")
-        with c2:
-            if st.button("Logout", type="secondary"):
-                handle_logout()
+            # Admin tabs share the "admin" rerun profile, each gets its own span
+            with span(f"admin/{admin_tab}"):
+                if admin_tab == "Add New Member":
+                    render_add_member_form(FAMILY_COLLECTION)
 
-        admin_tab = st.radio(
-            "Manage Database:",
-            options=["Add New Member", "Edit Details", "Add Event", "Bulk Update", "View Full Data"],
-            horizontal=True,
-            label_visibility="collapsed"
-        )
+                elif admin_tab == "Edit Details":
+                    render_edit_member_form(FAMILY_COLLECTION)
 
-        st.markdown("---")
+                elif admin_tab == "View Full Data":
+                    st.subheader("Full Database Registry")
+                    render_database_view(FAMILY_COLLECTION)
 
-        if admin_tab == "Add New Member":
-            render_add_member_form(FAMILY_COLLECTION)
+                elif admin_tab == "Add Event":
+                    render_add_event_form()
 
-        elif admin_tab == "Edit Details":
-            render_edit_member_form(FAMILY_COLLECTION)
+                elif admin_tab == "Bulk Update":
+                    render_bulk_update_form()
 
-        elif admin_tab == "View Full Data":
-            st.subheader("Full Database Registry")
-            render_database_view(FAMILY_COLLECTION)
+                elif admin_tab == "Performance":
+                    render_debug_panel()
 
-        elif admin_tab == "Add Event":
-            render_add_event_form()
 
-        elif admin_tab == "Bulk Update":
-            render_bulk_update_form()
+with profile_rerun(selection, st.session_state['profile_session']):
+    render_selection(selection)
@@ -0,0 +1 @@
+"""Performance benchmarks. Run each module with 'python -m benchmarks.<name>'."""
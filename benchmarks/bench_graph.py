@@ -0,0 +1,132 @@
+"""
+In-memory FamilyGraph backends compared on a synthetic village: "csr" (NumPy arrays
+over int ids) against "networkx" (nx.DiGraph of name strings).
+
+Times the build, ancestors/descendants and full get_focused_subgraph calls, measures
+the memory each graph holds, and checks that both backends return the same people.
+No database is involved.
+
+    python -m benchmarks.bench_graph                      # 100k members, 100k nodes
+    python -m benchmarks.bench_graph --members 300000 --out graph.jsonl
+    python -m benchmarks.bench_graph --namesakes          # repeated names, as in the real registry
+
+The graph is keyed by name, so by default every member gets a distinct name and
+becomes its own node; with --namesakes members sharing a name collapse into one.
+"""
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.bench_hot_paths import (_git_commit, measure, measure_once,
+                                        write_report)
+from benchmarks.village import synthetic_village
+
+BACKENDS = ["networkx", "csr"]
+
+
+def _build(docs, backend):
+    """(build ms, retained MB, peak MB, FamilyGraph). Tracing slows the build, so it is timed separately."""
+    from handlers.graph_handlers import FamilyGraph
+
+    gc.collect()
+    build_ms, graph = measure_once(lambda: FamilyGraph(docs, backend=backend))
+    del graph
+    gc.collect()
+    tracemalloc.start()
+    graph = FamilyGraph(docs, backend=backend)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return build_ms, round(retained / 2 ** 20, 2), round(peak / 2 ** 20, 2), graph
+
+
+def _mismatches(graphs, names):
+    """Focus people whose ancestors or descendants differ between the backends."""
+    reference, *others = graphs
+    bad = []
+    for name in names:
+        expected = (reference.ancestors(name), reference.descendants(name))
+        for graph in others:
+            if (graph.ancestors(name), graph.descendants(name)) != expected:
+                bad.append(name)
+                break
+    return bad
+
+
+def run(members, seed=7, samples=500, founders=None, namesakes=False):
+    from handlers.graph_handlers import get_focused_subgraph
+
+    kwargs = {"founders": founders} if founders else {}
+    docs = synthetic_village(members, seed, distinct_names=not namesakes, **kwargs)
+    rnd = random.Random(seed + 1)
+    names = [(d["name"],) for d in rnd.sample(docs, min(samples, len(docs)))]
+    # Founders have the largest descendant sets, the worst case for the walk
+    roots = [(d["name"],) for d in docs if not d.get("parents")][:max(1, samples // 10)]
+
+    results = {}
+    graphs = {}
+    for backend in BACKENDS:
+        build_ms, retained_mb, peak_mb, graph = _build(docs, backend)
+        graphs[backend] = graph
+        results[f"{backend}.build"] = {"calls": 1, "total_ms": build_ms,
+                                       "retained_mb": retained_mb, "peak_mb": peak_mb}
+        results[f"{backend}.ancestors"] = measure(graph.ancestors, names)
+        results[f"{backend}.descendants"] = measure(graph.descendants, names)
+        results[f"{backend}.descendants_of_founders"] = measure(graph.descendants, roots)
+        results[f"{backend}.get_focused_subgraph"] = measure(lambda name: get_focused_subgraph(graph, name), names)
+
+    checked = [n for (n,) in names + roots]
+    mismatches = _mismatches([graphs[b] for b in BACKENDS], checked)
+    csr = graphs["csr"].G
+
+    return {
+        "benchmark": "graph_backends",
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "members": len(docs),
+        "nodes": len(csr),
+        "edges": csr.edge_count,
+        "csr_array_mb": round(csr.nbytes() / 2 ** 20, 2),
+        "namesakes": namesakes,
+        "seed": seed,
+        "samples": len(names),
+        "checked": len(checked),
+        "mismatches": mismatches[:20],
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--samples", type=int, default=500, help="Focus people per query benchmark.")
+    parser.add_argument("--founders", type=int, help="Founding couples (default: the village generator's).")
+    parser.add_argument("--namesakes", action="store_true", help="Keep repeated names (fewer, denser nodes).")
+    parser.add_argument("--out", default="bench_graph.json", help="Results file (.json, or .jsonl to append).")
+    args = parser.parse_args(argv)
+
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    report = run(args.members, args.seed, args.samples, args.founders, args.namesakes)
+    write_report(report, args.out)
+
+    print(f"{report['nodes']} nodes, {report['edges']} edges, CSR arrays {report['csr_array_mb']} MB")
+    for name, stats in report["results"].items():
+        line = f"{name:<36} total {stats.get('total_ms', 0):>11.2f} ms"
+        if stats.get("calls", 0) > 1:
+            line += f"   p50 {stats['p50_ms']:>8.3f}   p95 {stats['p95_ms']:>8.3f}"
+        else:
+            line += f"   retained {stats['retained_mb']} MB   peak {stats['peak_mb']} MB"
+        print(line)
+    if report["mismatches"]:
+        print(f"MISMATCH between backends for {len(report['mismatches'])}+ people: {report['mismatches'][:5]}")
+        sys.exit(1)
+    print(f"Backends agree on all {report['checked']} checked people. Results written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+"""
+Hot-path benchmark on a seeded synthetic village (see benchmarks/village.py).
+
+Times get_relatives, get_focused_subgraph (every engine), render_focused_tree,
+the picker labels behind render_search_interface, _process_update_logic and the
+delta sync catch-up after another process wrote (data/member_sync.py), and writes the numbers to a JSON file (or appends one line to a .jsonl file)
+so runs can be compared over time.
+
+    python -m benchmarks.bench_hot_paths --members 100000                 # local mongod (BENCH_MONGO_URI)
+    python -m benchmarks.bench_hot_paths --members 10000 --mongo-uri mongomock   # in memory, see village.py
+    python -m benchmarks.bench_hot_paths --members 100000 --out results.jsonl --only relatives tree
+
+mongomock is far slower than a real server for anything that hits the collection,
+so only compare runs made against the same backend (it is recorded in the file).
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from benchmarks.village import (BENCH_DB_NAME, BENCH_MONGO_URI, WORK,
+                                load_village, synthetic_village, use_backend)
+
+GROUPS = ["relatives", "subgraph", "tree", "labels", "bulk_update", "delta_sync"]
+
+
+def measure(fn, args_list):
+    """Calls fn(*args) for every entry, returns latency stats in milliseconds."""
+    samples = []
+    errors = 0
+    for args in args_list:
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception:
+            errors += 1
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples, errors)
+
+
+def measure_once(fn):
+    start = time.perf_counter()
+    value = fn()
+    return round((time.perf_counter() - start) * 1000, 3), value
+
+
+def summarize(samples, errors=0):
+    if not samples:
+        return {"calls": 0}
+    ordered = sorted(samples)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {
+        "calls": len(samples),
+        "errors": errors,
+        "total_ms": round(sum(samples), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _failed(result):
+    """The subgraph functions report failures as (None, message) instead of raising."""
+    return isinstance(result, tuple) and len(result) == 2 and result[0] is None
+
+
+def _checked(fn):
+    def call(*args):
+        result = fn(*args)
+        if _failed(result):
+            raise RuntimeError(result[1])
+        return result
+    return call
+
+
+# --- Benchmark groups (each adds {name: stats} entries to 'results') ---
+def bench_relatives(sample, results):
+    from handlers.graph_index import get_graph_index
+    from handlers.request_handlers import get_relatives
+
+    build_ms, _ = measure_once(get_graph_index)
+    results["graph_index.build"] = {"calls": 1, "total_ms": build_ms}
+    args = [(d["slug"],) for d in sample]
+    results["get_relatives.index"] = measure(lambda slug: get_relatives(slug, mode="index"), args)
+    results["get_relatives.batched"] = measure(lambda slug: get_relatives(slug, mode="batched"), args)
+
+
+def bench_subgraph(sample, results, depth):
+    from data.database import FAMILY_COLLECTION
+    from handlers.graph_handlers import (get_family_graph,
+                                         get_focused_subgraph,
+                                         get_focused_subgraph_from_db,
+                                         get_focused_subgraph_from_lineage)
+    from handlers.lineage import rebuild_all_lineage
+
+    build_ms, graph = measure_once(get_family_graph)
+    results["family_graph.build"] = {"calls": 1, "total_ms": build_ms, "backend": graph.backend}
+    names = [(d["name"],) for d in sample]
+    results["get_focused_subgraph.networkx"] = measure(_checked(lambda name: get_focused_subgraph(graph, name)), names)
+
+    results["get_focused_subgraph.graphlookup"] = measure(
+        _checked(lambda name: get_focused_subgraph_from_db(FAMILY_COLLECTION, name, depth)), names)
+
+    rebuild_ms, changed = measure_once(lambda: rebuild_all_lineage(FAMILY_COLLECTION))
+    results["lineage.rebuild_all"] = {"calls": 1, "total_ms": rebuild_ms, "documents": changed}
+    results["get_focused_subgraph.lineage"] = measure(
+        _checked(lambda name, slug: get_focused_subgraph_from_lineage(FAMILY_COLLECTION, name, depth, slug)),
+        [(d["name"], d["slug"]) for d in sample])
+
+
+def bench_tree(sample, results, limits):
+    from handlers.graph_handlers import TREE_STYLE, render_focused_tree_shared
+
+    # DOT building only: graphviz layout depends on the binary, not on this code
+    def render(name):
+        if render_focused_tree_shared(name, TREE_STYLE, limits)[0] is None:
+            raise RuntimeError(f"no tree for {name}")
+
+    results["render_focused_tree.networkx"] = measure(render, [(d["name"],) for d in sample])
+
+
+def bench_labels(sample, results):
+    from data.database import FAMILY_COLLECTION
+    from handlers.label_index import MemberLabelIndex, build_member_label
+    from handlers.typeahead import TypeaheadIndex, search_members
+
+    docs_ms, docs = measure_once(lambda: list(FAMILY_COLLECTION.find({}, {"_id": 0})))
+    results["labels.scan"] = {"calls": 1, "total_ms": docs_ms}
+    results["labels.build_member_label"] = measure(build_member_label, [(d,) for d in docs])
+    build_ms, labels = measure_once(lambda: MemberLabelIndex(docs))
+    results["label_index.build"] = {"calls": 1, "total_ms": build_ms}
+    typeahead_ms, _ = measure_once(lambda: TypeaheadIndex(labels))
+    results["typeahead_index.build"] = {"calls": 1, "total_ms": typeahead_ms}
+
+    # What a visitor types into render_search_interface: a prefix, a full name, a typo
+    queries = []
+    for d in sample:
+        first, _, rest = d["name"].partition(" ")
+        queries += [(first[:3],), (d["name"],), (first[:-1] + "x " + rest,)]
+    search_members("warm up")
+    results["search_members"] = measure(search_members, queries)
+
+
+def bench_bulk_update(results, rows, seed):
+    import pandas as pd
+
+    from data.bulk_update import _process_update_logic
+    from data.database import FAMILY_COLLECTION
+    from handlers.label_index import get_label_index
+    from handlers.typeahead import search_members
+
+    rnd = random.Random(seed + 2)
+    docs = list(FAMILY_COLLECTION.find({}, {"_id": 0, "slug": 1, "name": 1, "parents": 1}))
+    picked = rnd.sample(docs, min(rows, len(docs)))
+    # Shared indexes are warm, as they would be on a live server, so the patch path is measured
+    get_label_index()
+    search_members("warm up")
+
+    work = pd.DataFrame({"slug": [d["slug"] for d in picked],
+                         "work": [f"{rnd.choice(WORK)} {i}" for i in range(len(picked))]})
+    ms, _ = measure_once(lambda: _process_update_logic(work, "slug", "work", "work"))
+    results["process_update_logic.work"] = {"calls": 1, "rows": len(picked), "total_ms": ms,
+                                            "per_row_ms": round(ms / max(1, len(picked)), 4)}
+
+    # A link field: also re-resolves slug links and refreshes lineage below the members
+    member_names = [d["name"] for d in docs]
+    parents = pd.DataFrame({"slug": [d["slug"] for d in picked],
+                            "parents": [rnd.choice(member_names) for _ in picked]})
+    ms, _ = measure_once(lambda: _process_update_logic(parents, "slug", "parents", "parents"))
+    results["process_update_logic.parents"] = {"calls": 1, "rows": len(picked), "total_ms": ms,
+                                               "per_row_ms": round(ms / max(1, len(picked)), 4)}
+
+
+def bench_delta_sync(results, rows, seed):
+    """
+    Another process edits, deletes and adds members behind this one's back (no change
+    events here), then the shared structures catch up from the updated_at cursor.
+    """
+    from pymongo import UpdateOne
+
+    from data.data_version import bump_members_version
+    from data.database import FAMILY_COLLECTION
+    from data.member_sync import record_tombstones, utc_now
+    from handlers.graph_handlers import get_family_graph
+    from handlers.graph_index import get_graph_index
+    from handlers.label_index import get_label_index
+    from handlers.member_events import check_consistency
+    from handlers.typeahead import search_members
+
+    rnd = random.Random(seed + 3)
+    docs = list(FAMILY_COLLECTION.find({}, {"_id": 0, "slug": 1, "name": 1}))
+    picked = rnd.sample(docs, min(rows, len(docs)))
+    deleted, edited = picked[:len(picked) // 10], picked[len(picked) // 10:]
+    for getter in (get_graph_index, get_family_graph, get_label_index):
+        getter()
+    search_members("warm up")
+
+    now = utc_now()
+    FAMILY_COLLECTION.bulk_write([UpdateOne({"slug": d["slug"]}, {"$set": {"work": f"{rnd.choice(WORK)} {i}",
+                                                                           "updated_at": now}})
+                                  for i, d in enumerate(edited)], ordered=False)
+    FAMILY_COLLECTION.delete_many({"slug": {"$in": [d["slug"] for d in deleted]}})
+    record_tombstones([(d["slug"], d["name"]) for d in deleted])
+    FAMILY_COLLECTION.insert_many([{"slug": f"delta-{i}", "name": f"Delta Member {i}", "gender": "Male",
+                                    "parents": [rnd.choice(docs)["name"]], "updated_at": now}
+                                   for i in range(len(deleted))])
+    bump_members_version()
+
+    for name, getter in (("graph_index", get_graph_index), ("family_graph", get_family_graph),
+                         ("label_index", get_label_index), ("typeahead_index", lambda: search_members("delta"))):
+        ms, _ = measure_once(getter)
+        results[f"delta_sync.{name}"] = {"calls": 1, "total_ms": ms, "changed": len(picked) + len(deleted)}
+    # Rebuilds every structure from a scan and compares: anything but "ok" is a sync bug
+    ms, outcomes = measure_once(check_consistency)
+    results["delta_sync.full_rebuild_and_compare"] = {"calls": 1, "total_ms": ms, "outcomes": outcomes}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(members, seed=7, samples=200, mongo_uri=BENCH_MONGO_URI, db_name=BENCH_DB_NAME, only=None, update_rows=1000):
+    from handlers.graph_handlers import (TREE_GENERATIONS_DOWN,
+                                         TREE_GENERATIONS_UP, TREE_MAX_NODES)
+
+    only = set(only or GROUPS)
+    backend = use_backend(mongo_uri, db_name)
+    docs = synthetic_village(members, seed)
+
+    results = {}
+    load_ms, version = measure_once(lambda: load_village(docs))
+    results["load"] = {"calls": 1, "total_ms": load_ms}
+
+    sample = random.Random(seed + 1).sample(docs, min(samples, len(docs)))
+    limits = {"up": TREE_GENERATIONS_UP, "down": TREE_GENERATIONS_DOWN, "max_nodes": TREE_MAX_NODES}
+    depth = max(TREE_GENERATIONS_UP, TREE_GENERATIONS_DOWN)
+
+    if "relatives" in only:
+        bench_relatives(sample, results)
+    if "subgraph" in only:
+        bench_subgraph(sample, results, depth)
+    if "tree" in only:
+        bench_tree(sample, results, limits)
+    if "labels" in only:
+        bench_labels(sample[:max(1, samples // 3)], results)
+    # Last: these write to the data
+    if "bulk_update" in only:
+        bench_bulk_update(results, update_rows, seed)
+    if "delta_sync" in only:
+        bench_delta_sync(results, update_rows, seed)
+
+    return {
+        "benchmark": "hot_paths",
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "backend": backend,
+        "members": len(docs),
+        "distinct_names": len({d["name"] for d in docs}),
+        "seed": seed,
+        "samples": len(sample),
+        "data_version": version,
+        "results": results,
+    }
+
+
+def write_report(report, path):
+    """'.jsonl' appends one line per run (a regression history), anything else is overwritten."""
+    if path.endswith(".jsonl"):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--samples", type=int, default=200, help="Focus people per read benchmark.")
+    parser.add_argument("--update-rows", type=int, default=1000, help="CSV rows per bulk update run.")
+    parser.add_argument("--mongo-uri", default=BENCH_MONGO_URI,
+                        help="Local mongod to load into, or 'mongomock' for in memory (default: %(default)s).")
+    parser.add_argument("--db-name", default=BENCH_DB_NAME, help="Database the village is loaded into (dropped first).")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, help="Run only these groups.")
+    parser.add_argument("--out", default="bench_hot_paths.json", help="Results file (.json, or .jsonl to append).")
+    args = parser.parse_args(argv)
+
+    # Streamlit calls inside _process_update_logic run in bare mode, keep its warnings out of the output
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    report = run(args.members, args.seed, args.samples, args.mongo_uri, args.db_name, args.only, args.update_rows)
+    write_report(report, args.out)
+
+    for name, stats in report["results"].items():
+        line = f"{name:<36} total {stats.get('total_ms', 0):>11.2f} ms"
+        if stats.get("calls", 0) > 1:
+            line += f"   p50 {stats['p50_ms']:>8.3f}   p95 {stats['p95_ms']:>8.3f}   errors {stats['errors']}"
+        if "outcomes" in stats:
+            line += f"   {stats['outcomes']}"
+        print(line)
+    print(f"Results written to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
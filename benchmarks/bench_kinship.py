@@ -0,0 +1,103 @@
+"""
+Kinship benchmark: binary-lifting LCA vs a naive ancestor walk over random pairs.
+
+    python -m benchmarks.bench_kinship --members 100000 --pairs 20000
+"""
+import argparse
+import json
+import random
+import time
+
+from handlers.kinship import KinshipIndex
+
+
+def synthetic_family(members, seed=7, founders=20, spouse_rate=0.6):
+    """
+    Seeded village: a few founder lines, each new male/female gets a father from the
+    recent generations, so trees grow deep (~members / founders / 4 generations).
+    """
+    rnd = random.Random(seed)
+    docs, men = [], []
+    for i in range(members):
+        gender = "M" if rnd.random() < 0.5 else "F"
+        name = f"Person {i}"
+        parents = []
+        if i >= founders and men:
+            # Bias toward recent men so lines get deep
+            father = men[max(0, len(men) - 1 - int(rnd.expovariate(1 / 30)))]
+            parents = [father["name"]]
+        doc = {"slug": f"person-{i}", "name": name, "gender": gender, "parents": parents, "spouse": ""}
+        if gender == "M":
+            men.append(doc)
+            if rnd.random() < spouse_rate:
+                doc["spouse"] = f"Spouse {i}"
+                docs.append({"slug": f"spouse-{i}", "name": f"Spouse {i}", "gender": "F",
+                             "parents": [], "spouse": name})
+        docs.append(doc)
+    return docs
+
+
+def naive_relation(parent_of, a, b):
+    """Baseline: collect A's ancestors with depths, walk B up until it hits one."""
+    seen, node, d = {}, a, 0
+    while node is not None and node not in seen:
+        seen[node] = d
+        node, d = parent_of.get(node), d + 1
+    node, d = b, 0
+    while node is not None:
+        if node in seen:
+            return seen[node], d
+        node, d = parent_of.get(node), d + 1
+    return None
+
+
+def run(members, pairs, seed):
+    docs = synthetic_family(members, seed)
+
+    start = time.perf_counter()
+    index = KinshipIndex(docs)
+    build_s = time.perf_counter() - start
+
+    rnd = random.Random(seed + 1)
+    keys = index.keys
+    sample = [(rnd.choice(keys), rnd.choice(keys)) for _ in range(pairs)]
+
+    start = time.perf_counter()
+    for a, b in sample:
+        index.relation(a, b, with_path=False)
+    lca_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for a, b in sample:
+        index.relation(a, b, with_path=True)
+    lca_path_s = time.perf_counter() - start
+
+    parent_of = {index.keys[i]: index.keys[p] for i, p in enumerate(index.parent) if p >= 0}
+    start = time.perf_counter()
+    for a, b in sample:
+        naive_relation(parent_of, a, b)
+    naive_s = time.perf_counter() - start
+
+    return {
+        "benchmark": "kinship",
+        "members": len(index),
+        "max_depth": max(index.depth),
+        "pairs": pairs,
+        "build_s": round(build_s, 4),
+        "lca_us_per_query": round(lca_s / pairs * 1e6, 2),
+        "lca_with_path_us_per_query": round(lca_path_s / pairs * 1e6, 2),
+        "naive_us_per_query": round(naive_s / pairs * 1e6, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, default=100000)
+    parser.add_argument("--pairs", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.members, args.pairs, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Seeded synthetic village: households grown generation by generation, with the
+messiness of the real registry.
+
+    - syllable-built first names and a handful of surnames, so names repeat (namesakes)
+    - sons stay and bring in wives (daughter-in-law, parents_in_law set)
+    - daughters marry out (spouse name only, nobody on record), some sons-in-law are recorded
+    - missing links: parents never entered, half-filled parent lists, in-laws' parents from
+      other villages
+
+Benchmarks load it into a local mongod (BENCH_MONGO_URI, default localhost:27017),
+or into the in-memory stand-in with --mongo-uri mongomock. mongomock 4.3 predates the
+'sort' option newer pymongo passes to bulk updates, so that path needs the pins of
+requirements-dev.txt:
+
+    pip install -r requirements-dev.txt       # only for --mongo-uri mongomock
+
+    python -m benchmarks.village --members 10000 --out village.json
+"""
+import argparse
+import inspect
+import json
+import os
+import random
+
+from data import database
+from data.data_version import bump_members_version, get_members_version
+from data.indexes import ensure_indexes
+from data.member_sync import TOMBSTONES_COLLECTION
+from data.slugs import slug_base, slug_for_seq
+
+# Benchmarks never write into the app's real database
+BENCH_DB_NAME = "ancestory_bench"
+# Where benchmarks load the village; "mongomock" for the in-memory stand-in
+BENCH_MONGO_URI = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+LOAD_CHUNK_SIZE = 5000
+
+# First names are built from syllables (a few hundred per gender), surnames are few,
+# so namesakes are common and get more common as the village grows, like the real registry
+MALE_STEMS = ["Ram", "Shyam", "Moh", "Am", "Sun", "Raj", "Vij", "An", "Sur", "Man", "Din", "Ash",
+              "Pank", "Rak", "Sanj", "Aj", "Pram", "Vin", "Muk", "Har", "Dev", "Nar", "Gop", "Kish"]
+MALE_ENDINGS = ["", "esh", "an", "it", "il", "endra", "ay", "ish", "ant", "od", "u", "ind"]
+FEMALE_STEMS = ["Sit", "Git", "Ren", "Sun", "An", "Kir", "Poo", "Rekh", "Meen", "Ash", "Us", "Sav",
+                "Nirm", "Kav", "Manj", "Shant", "Lat", "Neh", "Priy", "Radh", "Kams", "Sar", "Par", "Jyot"]
+FEMALE_ENDINGS = ["a", "u", "ita", "an", "ja", "ala", "i", "ika", "ini", "ha", "mati", "lata"]
+SURNAMES = ["Kumar", "Singh", "Sharma", "Mishra", "Yadav", "Prasad", "Jha", "Thakur"]
+# In-laws come from other villages, their families are not on record here
+OUTSIDE_SURNAMES = ["Pandey", "Tiwari", "Choudhary", "Verma", "Gupta", "Sinha", "Das", "Pathak"]
+WORK = ["Farmer", "Teacher", "Engineer", "Shopkeeper", "Student", "Doctor", "Clerk", "—"]
+
+
+def synthetic_village(members, seed=7, founders=None, children_mean=2.4, wife_rate=0.8,
+                      son_in_law_rate=0.1, missing_parent_rate=0.05, half_parents_rate=0.1,
+                      distinct_names=False):
+    """
+    Returns a list of member documents in the shape the app writes them.
+
+    Args:
+        founders: Founding couples (default ~1 per 200 members, at least 5).
+        children_mean: Average children per recorded couple (sets the branching).
+        wife_rate: Share of sons whose wife is recorded as a daughter-in-law.
+        son_in_law_rate: Share of daughters whose husband is recorded.
+        missing_parent_rate: Share of children whose parents were never entered.
+        half_parents_rate: Share of children with only the father entered.
+        distinct_names: Number repeated names ("Ramesh Kumar 2") so every member is
+            its own node in the name-keyed graphs.
+    """
+    rnd = random.Random(seed)
+    founders = founders or max(5, members // 200)
+    docs = []
+    seq = {}
+
+    def add(name, gender, association, parents=(), spouse="", parents_in_law=()):
+        base = slug_base(name)
+        seq[base] = seq.get(base, 0) + 1
+        if distinct_names and seq[base] > 1:
+            name = f"{name} {seq[base]}"
+        doc = {
+            "slug": slug_for_seq(base, seq[base]),
+            "name": name,
+            "gender": gender,
+            "association": association,
+            "parents": list(parents),
+            "spouse": spouse,
+            "parents_in_law": list(parents_in_law),
+            "phone": f"+91 9{rnd.randrange(10 ** 8, 10 ** 9)}" if rnd.random() < 0.6 else "",
+            "work": rnd.choice(WORK),
+        }
+        docs.append(doc)
+        return doc
+
+    def first_name(gender):
+        if gender == "M":
+            return rnd.choice(MALE_STEMS) + rnd.choice(MALE_ENDINGS)
+        return rnd.choice(FEMALE_STEMS) + rnd.choice(FEMALE_ENDINGS)
+
+    def outsider(gender):
+        return f"{first_name(gender)} {rnd.choice(OUTSIDE_SURNAMES)}"
+
+    # Founding couples: (husband doc, wife doc or None)
+    couples = []
+    for _ in range(founders):
+        husband = add(f"{first_name('M')} {rnd.choice(SURNAMES)}", "M", "son")
+        wife = add(outsider("F"), "F", "daughter-in-law", spouse=husband["name"])
+        husband["spouse"] = wife["name"]
+        couples.append((husband, wife))
+
+    while len(docs) < members and couples:
+        next_couples = []
+        for father, mother in couples:
+            surname = father["name"].rsplit(" ", 1)[-1]
+            for _ in range(min(8, int(rnd.expovariate(1 / children_mean)))):
+                if len(docs) >= members:
+                    break
+                gender = "M" if rnd.random() < 0.5 else "F"
+
+                roll = rnd.random()
+                if roll < missing_parent_rate:
+                    parents = []
+                elif roll < missing_parent_rate + half_parents_rate or mother is None:
+                    parents = [father["name"]]
+                else:
+                    parents = [father["name"], mother["name"]]
+
+                child = add(f"{first_name(gender)} {surname}", gender, "son" if gender == "M" else "daughter", parents)
+
+                if gender == "M":
+                    wife = None
+                    if rnd.random() < wife_rate and len(docs) < members:
+                        wife = add(outsider("F"), "F", "daughter-in-law", parents=[outsider("M")],
+                                   spouse=child["name"], parents_in_law=[p for p in parents])
+                        child["spouse"] = wife["name"]
+                    next_couples.append((child, wife))
+                elif rnd.random() < son_in_law_rate and len(docs) < members:
+                    husband = add(outsider("M"), "M", "son-in-law", spouse=child["name"],
+                                  parents_in_law=[p for p in parents])
+                    child["spouse"] = husband["name"]
+                else:
+                    # Married out, husband not on record
+                    child["spouse"] = outsider("M") if rnd.random() < 0.7 else ""
+
+        if not next_couples:
+            # Every line died out: start a new family to keep growing
+            husband = add(f"{first_name('M')} {rnd.choice(SURNAMES)}", "M", "son")
+            next_couples.append((husband, None))
+        couples = next_couples
+
+    return docs[:members]
+
+
+def use_backend(mongo_uri=BENCH_MONGO_URI, db_name=BENCH_DB_NAME):
+    """
+    Points data.database at the benchmark backend: the mongod at mongo_uri, or
+    mongomock (in memory) for mongo_uri="mongomock". Returns a short label for the
+    results file.
+    """
+    if mongo_uri and mongo_uri != "mongomock":
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri, **database.client_options())
+        backend = "mongod"
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("mongomock is not installed: pip install -r requirements-dev.txt, or pass --mongo-uri")
+        _check_mongomock(mongomock)
+        client = mongomock.MongoClient()
+        backend = "mongomock"
+
+    database.db_name = db_name
+    database.set_client(client)
+    return backend
+
+
+def _check_mongomock(mongomock):
+    # Fail up front instead of with a TypeError from the first bulk_write
+    from pymongo import UpdateOne
+    sends_sort = "sort" in inspect.signature(UpdateOne.__init__).parameters
+    takes_sort = "sort" in inspect.signature(mongomock.collection.BulkOperationBuilder.add_update).parameters
+    if sends_sort and not takes_sort:
+        raise SystemExit(f"mongomock {mongomock.__version__} can't run this pymongo's bulk updates: "
+                         "pip install -r requirements-dev.txt, or pass --mongo-uri of a local mongod")
+
+
+def load_village(docs, collection=None):
+    """Replaces the benchmark 'members' collection with 'docs' and starts a new data version."""
+    collection = collection or database.FAMILY_COLLECTION
+    collection.drop()
+    database.META_COLLECTION.drop()
+    TOMBSTONES_COLLECTION.drop()
+    for start in range(0, len(docs), LOAD_CHUNK_SIZE):
+        collection.insert_many([dict(d) for d in docs[start:start + LOAD_CHUNK_SIZE]], ordered=False)
+    # Same indexes the app bootstraps, so a real mongod is measured as deployed
+    ensure_indexes()
+    bump_members_version()
+    return get_members_version(force=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic village.")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", required=True, help="JSON file for the generated members.")
+    args = parser.parse_args(argv)
+
+    docs = synthetic_village(args.members, args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(docs, f, ensure_ascii=False)
+    names = {d["name"] for d in docs}
+    print(f"Wrote {len(docs)} members ({len(docs) - len(names)} share a name with someone) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ import time
 from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone
 
+from data.data_version import bump_members_version
+from data.slug_links import relink_members, relink_named
+from data.slugs import SLUG_ALLOCATE_RETRIES, allocate_slug
+from handlers.lineage import refresh_lineage
+from handlers.member_events import emit_member_change
+
 def render_add_member_form(collection):
     """
     Renders the form to add a new family member.
-    Handles duplicate names by creating unique IDs using an incremental counter logic.
+    Handles duplicate names by creating unique IDs from an atomic per-name counter.
     """
     st.header("📝 Add New Member")
     
@@ -63,15 +69,8 @@ def render_add_member_form(collection):
         parents = [p.strip() for p in [father, mother] if p.strip()]
         parents_in_law = [p.strip() for p in [father_in_law, mother_in_law] if p.strip()]
 
-        base_str = clean_name.lower().replace(" ", "-")
-
-        final_slug = base_str
-        counter = 1
-
-        # Loop until we find a slug that DOES NOT exist
-        while collection.find_one({"slug": final_slug}):
-            final_slug = f"{base_str}-{counter}"
-            counter += 1
+        # One atomic counter bump instead of probing base, base-1, base-2...
+        final_slug = allocate_slug(clean_name, collection)
 
         # 4. Prepare Document
         current_timestamp = datetime.now(timezone.utc)
@@ -94,12 +93,29 @@ def render_add_member_form(collection):
 
         # 5. Insert
         try:
-            collection.insert_one(new_doc)
+            for attempt in range(SLUG_ALLOCATE_RETRIES):
+                try:
+                    collection.insert_one(new_doc)
+                    break
+                except DuplicateKeyError:
+                    # Slug was taken outside the allocator, draw the next one
+                    if attempt == SLUG_ALLOCATE_RETRIES - 1:
+                        raise
+                    new_doc.pop("_id", None)
+                    final_slug = new_doc["slug"] = allocate_slug(clean_name, collection)
+            # Slug links: this member's own, and anyone who was waiting for this name
+            links = relink_members(collection, [final_slug])
+            links += relink_named(collection, [clean_name])
+            # Own ancestor path, plus anyone already listing this name as a parent
+            # (before the bump: trees cached for the new version must see it)
+            refresh_lineage(collection, changed_slugs=[final_slug], touched_names=[clean_name])
+            change = bump_members_version(count_delta=1)
+            emit_member_change(change, upserted=[new_doc], links=links)
             st.success(f"✅ **{clean_name}** added successfully!")
             st.caption(f"Unique ID generated: `{final_slug}`") 
             
         except DuplicateKeyError:
-            # Should be impossible due to the while loop check
+            # Should be impossible, the slug counter is atomic
             st.error(f"⚠️ A record for **{clean_name}** already exists (ID Collision).")
         except Exception as e:
             st.error(f"❌ Database Error: {e}")
\ No newline at end of file
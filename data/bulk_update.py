@@ -1,7 +1,22 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from .database import FAMILY_COLLECTION # Adjusted import for standard file structure
+from .data_version import bump_members_version
+from .slug_links import (LINK_SLUG_FIELDS, LIST_LINK_FIELDS, SPOUSE_LINK_FIELDS,
+                         relink_members, relink_named)
+from handlers.lineage import (GENERATION_FIELD, LINEAGE_FIELD,
+                              LINEAGE_SOURCE_FIELDS, refresh_lineage)
+from handlers.member_events import emit_member_change
+
+# Rows per bulk_write round trip, and how many log lines the page shows
+BULK_CHUNK_SIZE = 500
+MAX_LOG_LINES = 200
+# Not settable from a CSV: the identifier (a rename needs the Edit page, which carries
+# links and tombstones over) and the fields the app derives from the links itself
+PROTECTED_FIELDS = {"_id", "slug", "updated_at", LINEAGE_FIELD, GENERATION_FIELD, *LINK_SLUG_FIELDS}
 
 def render_bulk_update_form():
     """
@@ -52,6 +67,8 @@ def render_bulk_update_form():
             if st.button("🚀 Start Update Process", type="primary"):
                 if not target_field:
                     st.error("⚠️ Please specify the Target Database Field Name.")
+                elif slug_col == val_col:
+                    st.error("⚠️ The Slug column and the New Data column must be different.")
                 else:
                     _process_update_logic(df, slug_col, val_col, target_field)
 
@@ -61,7 +78,11 @@ def render_bulk_update_form():
 
 def _process_update_logic(df, slug_col_header, val_col_header, target_field_name):
     """
-    Iterates through the DataFrame and updates the specified dynamic field in MongoDB.
+    Updates the specified dynamic field in MongoDB for every row of the DataFrame.
+
+    Rows are sent in chunks of BULK_CHUNK_SIZE as one unordered bulk_write each.
+    A single pre-query per chunk tells us which slugs exist and which already hold
+    the new value, so per-row stats don't need one round trip per row.
     
     Args:
         df: The pandas DataFrame.
@@ -69,7 +90,11 @@ def _process_update_logic(df, slug_col_header, val_col_header, target_field_name
         val_col_header: Name of the CSV column containing the new value.
         target_field_name: The actual key in MongoDB to update.
     """
-    
+    if target_field_name in PROTECTED_FIELDS:
+        st.error(f"⚠️ `{target_field_name}` can't be bulk updated: it identifies the member or is derived "
+                 "from the family links. Change a slug on the Edit page.")
+        return
+
     # Initialize Counters
     stats = {
         "updated": 0,
@@ -82,68 +107,117 @@ def _process_update_logic(df, slug_col_header, val_col_header, target_field_name
     status_text = st.empty()
     log_expander = st.expander("📝 Process Logs", expanded=True)
     
-    total_rows = len(df)
     logs = []
-
-    # 4. ITERATE AND UPDATE
-    for index, row in df.iterrows():
-        # Update progress bar
-        progress_bar.progress((index + 1) / total_rows)
-        
-        person_slug = row[slug_col_header]
-        new_value = row[val_col_header]
-
-        # Skip rows where data is missing
-        if pd.isna(person_slug) or pd.isna(new_value):
-            stats["skipped"] += 1
-            continue
-
-        person_slug = str(person_slug).strip()
-        new_value = str(new_value).strip()
-
-        status_text.text(f"Processing: {person_slug}...")
-
-        # --- CORE DB LOGIC START ---
-        # 1. Identifier: Always use 'slug' as requested
-        filter_query = {"slug": person_slug}
-        
-        # 2. Update: Use the dynamic field name provided by user
-        update_query = {
-            "$set": {
-                target_field_name: new_value,  # <--- Dynamic Key
-                "updated_at": datetime.now()
-            }
-        }
+    updated_docs = []  # Partial docs, used to patch the shared label index
+    previous_values = {}  # slug -> value before this run (renames need the old name)
+
+    # Skip rows where data is missing (vectorized, no iterrows)
+    slugs = df[slug_col_header]
+    values = df[val_col_header]
+    has_data = slugs.notna() & values.notna()
+    stats["skipped"] += int((~has_data).sum())
+
+    pairs = list(zip(
+        slugs[has_data].astype(str).str.strip(),
+        values[has_data].astype(str).str.strip()
+    ))
+    total_rows = len(pairs)
+
+    # 4. UPDATE CHUNK BY CHUNK
+    for chunk_start in range(0, total_rows, BULK_CHUNK_SIZE):
+        chunk = pairs[chunk_start:chunk_start + BULK_CHUNK_SIZE]
+        status_text.text(f"Processing rows {chunk_start + 1}-{chunk_start + len(chunk)} of {total_rows}...")
 
         try:
-            result = FAMILY_COLLECTION.update_one(filter_query, update_query)
+            # One pre-query: which slugs exist and what they hold right now
+            chunk_slugs = list({slug for slug, _ in chunk})
+            current = {
+                doc['slug']: doc.get(target_field_name)
+                for doc in FAMILY_COLLECTION.find(
+                    {"slug": {"$in": chunk_slugs}},
+                    {"_id": 0, "slug": 1, target_field_name: 1}
+                )
+            }
 
-            if result.matched_count > 0:
-                if result.modified_count > 0:
-                    msg = f"✅ Updated **{person_slug}**: Set `{target_field_name}` = {new_value}"
-                    stats["updated"] += 1
-                    logs.append(msg)
-                else:
-                    # msg = f"⚪ No changes needed: {person_slug}"
+            operations = []
+            pending = []
+            for person_slug, new_value in chunk:
+                if person_slug not in current:
+                    stats["not_found"] += 1
+                    logs.append(f"⚠️ Slug not found: {person_slug}")
+                elif current[person_slug] == new_value:
+                    # ⚪ No changes needed
                     stats["skipped"] += 1
-            else:
-                msg = f"⚠️ Slug not found: {person_slug}"
-                stats["not_found"] += 1
-                logs.append(msg)
+                else:
+                    # 1. Identifier: Always use 'slug' as requested
+                    # 2. Update: Use the dynamic field name provided by user
+                    operations.append(UpdateOne(
+                        {"slug": person_slug},
+                        {"$set": {target_field_name: new_value, "updated_at": datetime.now(timezone.utc)}}
+                    ))
+                    pending.append((person_slug, new_value))
+                    previous_values.setdefault(person_slug, current[person_slug])
+                    # Later rows for the same slug compare against this value, like the row-by-row loop did
+                    current[person_slug] = new_value
+
+            failed = set()
+            if operations:
+                try:
+                    result = FAMILY_COLLECTION.bulk_write(operations, ordered=False)
+                    if result.matched_count < len(operations):
+                        st.warning(f"⚠️ {len(operations) - result.matched_count} member(s) disappeared while updating.")
+                except BulkWriteError as bwe:
+                    # Unordered: the other rows of the chunk still went through
+                    for error in bwe.details.get("writeErrors", []):
+                        failed.add(error['index'])
+                        st.error(f"❌ Database Error on {pending[error['index']][0]}: {error.get('errmsg')}")
+
+            for i, (person_slug, new_value) in enumerate(pending):
+                if i in failed:
+                    continue
+                stats["updated"] += 1
+                logs.append(f"✅ Updated **{person_slug}**: Set `{target_field_name}` = {new_value}")
+                updated_docs.append({"slug": person_slug, target_field_name: new_value})
+
+        except PyMongoError as e:
+            st.error(f"❌ Database Error on rows {chunk_start + 1}-{chunk_start + len(chunk)}: {e}")
+
+        # Progress moves once per chunk, not once per row
+        progress_bar.progress(min(chunk_start + len(chunk), total_rows) / total_rows)
 
-        except Exception as e:
-            st.error(f"❌ Database Error on {person_slug}: {e}")
-        # --- CORE DB LOGIC END ---
+    if stats["updated"] > 0:
+        changed_slugs = [d['slug'] for d in updated_docs]
+        links = []
+        if target_field_name in LIST_LINK_FIELDS or target_field_name == SPOUSE_LINK_FIELDS[0]:
+            # Edited link names: resolve their slug links again
+            links = relink_members(FAMILY_COLLECTION, changed_slugs, fresh=True)
+        elif target_field_name == "name":
+            links = relink_named(FAMILY_COLLECTION, [d['name'] for d in updated_docs])
+
+        if target_field_name in LINEAGE_SOURCE_FIELDS:
+            # Parent links moved: recompute the affected subtrees in one pass
+            # (before the bump: trees cached for the new version must see it)
+            touched_names = []
+            if target_field_name == "name":
+                touched_names = [d['name'] for d in updated_docs]
+                touched_names += [previous_values[s] for s in changed_slugs if isinstance(previous_values.get(s), str)]
+            refresh_lineage(FAMILY_COLLECTION, changed_slugs=changed_slugs, touched_names=touched_names)
+
+        change = bump_members_version()
+        emit_member_change(change, upserted=updated_docs, links=links)
 
     # Cleanup UI
     progress_bar.empty()
     status_text.empty()
 
-    # Show Logs
+    # Show Logs (one element, capped, instead of one element per row)
     with log_expander:
-        for log in logs:
-            st.markdown(log)
-        if not logs:
+        if logs:
+            shown_logs = logs[:MAX_LOG_LINES]
+            if len(logs) > MAX_LOG_LINES:
+                shown_logs.append(f"... and {len(logs) - MAX_LOG_LINES} more")
+            st.markdown("  \n".join(shown_logs))
+        else:
             st.info("No major updates or errors to report.")
 
     # 5. SUMMARY
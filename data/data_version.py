@@ -0,0 +1,222 @@
+import threading
+import time
+from collections import namedtuple
+
+from pymongo import ReturnDocument
+
+from data.database import FAMILY_COLLECTION, META_COLLECTION
+from data.member_sync import DELTA_SYNC, fetch_member_changes, utc_now
+from data.snapshot import get_snapshot, snapshot_active
+
+# A write moved the members data from version 'before' to version 'after'
+VersionChange = namedtuple("VersionChange", ["before", "after"])
+
+# How long a process trusts its last version read before asking Mongo again
+VERSION_CHECK_SECONDS = 5
+
+_MEMBERS_META_ID = "members"
+_cached_version = None
+_cached_at = 0.0
+_version_lock = threading.Lock()
+
+
+def get_members_version(force=False):
+    """
+    Returns the data version of 'members' as '<revision>-<count>'.
+
+    'revision' is bumped by every write the app makes (see bump_members_version),
+    'count' catches inserts/deletes made outside the app. Reads are cached for
+    VERSION_CHECK_SECONDS so a rerun costs at most two tiny queries.
+    """
+    global _cached_version, _cached_at
+    if snapshot_active():
+        # Read-only mode: the data can't change while the process runs
+        return get_snapshot().version
+
+    now = time.monotonic()
+    if not force and _cached_version is not None and now - _cached_at < VERSION_CHECK_SECONDS:
+        return _cached_version
+
+    meta = META_COLLECTION.find_one({"_id": _MEMBERS_META_ID}) or {}
+    count = FAMILY_COLLECTION.estimated_document_count()
+    version = f"{meta.get('revision', 0)}-{count}"
+
+    with _version_lock:
+        _cached_version, _cached_at = version, now
+    return version
+
+
+def bump_members_version(count_delta=0):
+    """
+    Marks 'members' as changed. Call after every insert/update/delete.
+
+    Args:
+        count_delta (int): How many documents the write added (+) or removed (-).
+
+    Returns:
+        VersionChange: the version just before and just after this write, so shared
+        resources built for 'before' can be patched instead of rebuilt.
+    """
+    global _cached_version, _cached_at
+    meta = META_COLLECTION.find_one_and_update(
+        {"_id": _MEMBERS_META_ID},
+        {"$inc": {"revision": 1}, "$currentDate": {"updated_at": True}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    revision = meta['revision']
+    count = FAMILY_COLLECTION.estimated_document_count()
+
+    after = f"{revision}-{count}"
+    with _version_lock:
+        _cached_version, _cached_at = after, time.monotonic()
+    return VersionChange(f"{revision - 1}-{count - count_delta}", after)
+
+
+def _count_gap(value, version):
+    """Member count of 'version' ('<revision>-<count>') minus len(value), None if either is unknown."""
+    try:
+        return int(str(version).rsplit("-", 1)[1]) - len(value)
+    except (IndexError, TypeError, ValueError):
+        return None
+
+
+class VersionedResource:
+    """
+    A process-wide value (index, graph, ...) shared by every Streamlit session.
+
+    It is rebuilt only when the data version it was built for changes,
+    so reruns and concurrent sessions reuse the same object.
+
+    With a 'delta' applier, delta(value, MemberDelta), a version change first tries to
+    catch up on just the members changed since the value was last synced (see
+    data/member_sync.py) and only rebuilds when that isn't possible.
+
+    Inserts and deletes made outside the app leave no updated_at stamp or tombstone,
+    only a new member count in the version. So a value that has len() (the members it
+    holds) must keep the same distance to that count through a catch-up, else it is rebuilt.
+    """
+
+    def __init__(self, builder, name=None, delta=None):
+        self._builder = builder
+        self._delta = delta
+        self._lock = threading.Lock()
+        self.name = name or getattr(builder, "__name__", "resource")
+        self.value = None
+        self.version = None
+        # Everything written before this (minus the sync overlap) is in the value
+        self.synced_at = None
+        # Version count minus len(value): members the value doesn't hold (no name, ...)
+        self._count_gap = None
+        self.stats = {"builds": 0, "deltas": 0}
+
+    def get(self, version=None):
+        version = version or get_members_version()
+        if self.value is None or self.version != version:
+            with self._lock:
+                if self.value is None or self.version != version:
+                    if not self._catch_up(version):
+                        self._build(version)
+        return self.value
+
+    def _build(self, version):
+        synced_at = utc_now()
+        self.value = self._builder()
+        self.version = version
+        self.synced_at = synced_at
+        self._count_gap = _count_gap(self.value, version)
+        self.stats["builds"] += 1
+
+    def _catch_up(self, version):
+        """
+        Delta sync instead of a rebuild. Called with the lock held, False means rebuild.
+        Like patch(), the delta goes into a copy that is swapped in once complete.
+        """
+        if self._delta is None or self.value is None or not DELTA_SYNC:
+            return False
+        try:
+            delta = fetch_member_changes(self.synced_at, version)
+            if delta is None:
+                return False
+            value = self.value.copy()
+            self._delta(value, delta)
+        except Exception:
+            # Readers still have the untouched value until the rebuild replaces it
+            return False
+        if _count_gap(value, version) != self._count_gap:
+            # Members came or went without a trace in the delta (written outside the app)
+            return False
+        self.value = value
+        self.version = version
+        self.synced_at = delta.high_water
+        self.stats["deltas"] += 1
+        return True
+
+    def peek(self):
+        """Current value if it is built for the current version, else None. Never builds."""
+        if self.value is not None and self.version == get_members_version():
+            return self.value
+        return None
+
+    def patch(self, change, apply):
+        """
+        Applies one write as an update instead of rebuilding.
+
+        'apply(value)' only runs if the value was built for change.before, i.e. nothing
+        else changed in between. Otherwise the value is left alone and rebuilt on next get().
+
+        Readers use the value without the lock, so it is never changed: apply() gets
+        value.copy() and the patched copy is swapped in with one assignment. If
+        apply() raises, the value is dropped (rebuilt on next get()) and the error re-raised.
+        """
+        with self._lock:
+            if self.value is None or self.version != change.before:
+                return False
+            try:
+                value = self.value.copy()
+                apply(value)
+            except Exception:
+                self.value = None
+                self.version = None
+                raise
+            self.value = value
+            self.version = change.after
+            self._count_gap = _count_gap(value, change.after)
+            # Nothing else was written in between, so the value is as current as a sync now
+            self.synced_at = utc_now()
+            return True
+
+    def verify(self, signature):
+        """
+        Consistency check for a value kept current by patch(): builds a fresh one and
+        compares signature(value) of both. On a mismatch the fresh value is swapped in.
+
+        Returns:
+            True if consistent, False if it was repaired, None if there was nothing
+            to check (not built, or the data moved on while building).
+        """
+        version = self.version
+        current = self.value
+        if current is None or version != get_members_version(force=True):
+            return None
+        synced_at = utc_now()
+        fresh = self._builder()
+        with self._lock:
+            if self.value is not current or self.version != version:
+                return None
+            if signature(current) == signature(fresh):
+                return True
+            self.value = fresh
+            self.synced_at = synced_at
+            self._count_gap = _count_gap(fresh, version)
+            return False
+
+    def is_building(self):
+        return self._lock.locked()
+
+    def invalidate(self):
+        with self._lock:
+            self.value = None
+            self.version = None
+            self.synced_at = None
+            self._count_gap = None
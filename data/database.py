@@ -1,15 +1,135 @@
+import os
+import threading
+import time
+
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
 load_dotenv('.env')
 
 MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI)
+# Client tuning. Unset values keep pymongo's defaults.
+#   MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE   - connections per server (min ones stay open, warm)
+#   MONGO_MAX_IDLE_MS                           - close pooled connections idle this long
+#   MONGO_CONNECT_TIMEOUT_MS / MONGO_SOCKET_TIMEOUT_MS / MONGO_SERVER_SELECTION_TIMEOUT_MS
+#   MONGO_COMPRESSORS                           - e.g. "zstd,snappy,zlib" (first one the server supports wins)
+_CLIENT_OPTIONS_FROM_ENV = {
+    "maxPoolSize": ("MONGO_MAX_POOL_SIZE", int),
+    "minPoolSize": ("MONGO_MIN_POOL_SIZE", int),
+    "maxIdleTimeMS": ("MONGO_MAX_IDLE_MS", int),
+    "connectTimeoutMS": ("MONGO_CONNECT_TIMEOUT_MS", int),
+    "socketTimeoutMS": ("MONGO_SOCKET_TIMEOUT_MS", int),
+    "serverSelectionTimeoutMS": ("MONGO_SERVER_SELECTION_TIMEOUT_MS", int),
+    "compressors": ("MONGO_COMPRESSORS", str),
+}
+
 filter={}
 
 db_name = "bahlolpur_ancestory"
 
-FAMILY_COLLECTION  = client[db_name]["members"]
-USERS_COLLECTION = client[db_name]["admin_members"]
-EVENTS_COLLECTION = client[db_name]["events"]
+_client = None
+_client_lock = threading.Lock()
+_event_listeners = []
+
+
+def client_options():
+    """MongoClient keyword arguments taken from the environment."""
+    options = {"appname": "ancestory_search"}
+    for option, (env_var, cast) in _CLIENT_OPTIONS_FROM_ENV.items():
+        value = os.getenv(env_var)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def get_client():
+    """
+    The process-wide MongoClient, created on first use.
+
+    Importing this module no longer connects (or resolves a mongodb+srv DNS record),
+    and every Streamlit session shares the one connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI, event_listeners=list(_event_listeners), **client_options())
+    return _client
+
+
+def set_client(client):
+    """Swaps the shared client (benchmarks, a local mongod). Collections below follow it."""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def register_event_listener(listener):
+    """
+    Adds a pymongo.monitoring listener. Only clients created afterwards see it,
+    so register before the first query (or call set_client(None) to rebuild).
+    """
+    _event_listeners.append(listener)
+
+
+def get_db():
+    return get_client()[db_name]
+
+
+def warm_up():
+    """
+    Health/warm-up hook: selects a server, opens a pooled connection and pings it.
+
+    Returns:
+        dict: {"ok": bool, "latency_ms": float, "error": str or None}
+    """
+    start = time.perf_counter()
+    try:
+        get_client().admin.command("ping")
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {"ok": error is None, "latency_ms": round((time.perf_counter() - start) * 1000, 2), "error": error}
+
+
+def warm_up_in_background():
+    """Starts warm_up() on a daemon thread so the first page render doesn't wait for it."""
+    thread = threading.Thread(target=warm_up, name="mongo-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+class LazyCollection:
+    """
+    Stands in for a pymongo Collection and resolves it on every attribute access,
+    so `from data.database import FAMILY_COLLECTION` stays cheap and follows set_client().
+    """
+
+    def __init__(self, collection_name):
+        self._collection_name = collection_name
+
+    def resolve(self):
+        return get_db()[self._collection_name]
+
+    def __getattr__(self, attr):
+        return getattr(self.resolve(), attr)
+
+    def __getitem__(self, sub_name):
+        return self.resolve()[sub_name]
+
+    def __repr__(self):
+        return f"LazyCollection({db_name}.{self._collection_name})"
+
+
+FAMILY_COLLECTION  = LazyCollection("members")
+USERS_COLLECTION = LazyCollection("admin_members")
+EVENTS_COLLECTION = LazyCollection("events")
+META_COLLECTION = LazyCollection("app_meta")
+SLUG_COUNTERS_COLLECTION = LazyCollection("slug_counters")
+
+
+def __getattr__(name):
+    # Old code imported the module-level 'client' directly
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,20 @@
-from datetime import datetime
-from database import FAMILY_COLLECTION
+import argparse
+import csv
+import time
+from datetime import datetime, timezone
+
 import pandas as pd
+from pymongo import UpdateOne
+
+from data.data_version import bump_members_version
+from data.database import FAMILY_COLLECTION
+
+# Change these to match your CSV headers exactly
+NAME_COL = "name"              # Column in CSV identifying the person
+UPDATE_COL = "association"     # Column in CSV with the new value (suggestion value)
 
+# Rows read, pre-queried and written per round trip in streaming mode
+STREAM_CHUNK_SIZE = 5000
 
 
 def run_update_script(csv_file_path):
@@ -15,12 +28,8 @@ def run_update_script(csv_file_path):
         print(f"❌ Could not read CSV: {e}")
         return
 
-    # 3. DEFINE COLUMN MAPPING
+    # 3. CHECK COLUMN MAPPING (see NAME_COL / UPDATE_COL at the top)
     # ------------------------
-    # Change these to match your CSV headers exactly
-    NAME_COL = "name"              # Column in CSV identifying the person
-    UPDATE_COL = "association"     # Column in CSV with the new value (suggestion value)
-
     # Check if columns exist
     if NAME_COL not in df.columns or UPDATE_COL not in df.columns:
         print(f"❌ Error: CSV must contain columns '{NAME_COL}' and '{UPDATE_COL}'")
@@ -56,7 +65,7 @@ def run_update_script(csv_file_path):
         update_query = {
             "$set": {
                 "association": new_value,
-                "updated_at": pd.Timestamp.now() # Optional: Audit trail
+                "updated_at": datetime.now(timezone.utc) # Audit trail, and the delta sync cursor
             }
         }
 
@@ -73,6 +82,9 @@ def run_update_script(csv_file_path):
             print(f"   ⚠️ Person not found: {person_name}")
             count_not_found += 1
 
+    if count_updated:
+        bump_members_version()
+
     # 5. SUMMARY
     # ----------
     print("\n" + "="*30)
@@ -83,6 +95,129 @@ def run_update_script(csv_file_path):
     print(f"⏭️ Skipped/Unchanged:    {count_skipped}")
     print("="*30)
 
+def run_streaming_update(csv_file_path, chunk_size=STREAM_CHUNK_SIZE, reject_file_path=None):
+    """
+    Streaming version of run_update_script for very large CSVs.
+
+    Reads the CSV in fixed-size chunks (constant memory), resolves each chunk with one
+    $in pre-query and writes it with one unordered bulk_write. Instead of one print per
+    row it prints one line per chunk, a final summary with rows/sec, and writes every
+    rejected row (missing data / not found / ambiguous) to a reject CSV.
+
+    A name shared by several members is rejected as ambiguous: the row can't say which
+    one it means. Changed members get 'updated_at' and the data version is bumped, so
+    the app's shared caches catch up through delta sync (data/member_sync.py).
+    """
+    reject_file_path = reject_file_path or f"{csv_file_path}.rejects.csv"
+    counts = {"read": 0, "updated": 0, "unchanged": 0, "not_found": 0, "ambiguous": 0, "missing": 0}
+    started = time.perf_counter()
+
+    print(f"📂 Streaming CSV file: {csv_file_path} (chunks of {chunk_size})...")
+    try:
+        reader = pd.read_csv(
+            csv_file_path,
+            chunksize=chunk_size,
+            dtype=str,
+            usecols=lambda col: col.strip() in (NAME_COL, UPDATE_COL)
+        )
+    except Exception as e:
+        print(f"❌ Could not read CSV: {e}")
+        return None
+
+    with open(reject_file_path, "w", newline="", encoding="utf-8") as reject_file:
+        rejects = csv.writer(reject_file)
+        rejects.writerow(["row", NAME_COL, UPDATE_COL, "reason"])
+
+        for chunk_no, chunk in enumerate(reader, start=1):
+            chunk.columns = chunk.columns.str.strip()
+            if NAME_COL not in chunk.columns or UPDATE_COL not in chunk.columns:
+                print(f"❌ Error: CSV must contain columns '{NAME_COL}' and '{UPDATE_COL}'")
+                return None
+
+            first_row = counts["read"] + 1
+            counts["read"] += len(chunk)
+            names = chunk[NAME_COL].str.strip()
+            values = chunk[UPDATE_COL].str.strip()
+
+            # Skip rows where data is missing
+            missing = names.isna() | values.isna() | (names == "") | (values == "")
+            raw = chunk.fillna("")
+            for row_no in chunk.index[missing]:
+                rejects.writerow([row_no + 1, raw.at[row_no, NAME_COL], raw.at[row_no, UPDATE_COL], "missing data"])
+            counts["missing"] += int(missing.sum())
+            names, values = names[~missing], values[~missing]
+
+            # FIND all persons of this chunk and what they hold now, in one query
+            matches = {}
+            for doc in FAMILY_COLLECTION.find({"name": {"$in": list(set(names))}}, {"name": 1, UPDATE_COL: 1}):
+                matches.setdefault(doc["name"], []).append(doc)
+            found = names.isin(matches.keys())
+            for row_no in names.index[~found]:
+                rejects.writerow([row_no + 1, names[row_no], values[row_no], "not found"])
+            counts["not_found"] += int((~found).sum())
+
+            # Namesakes: the row could mean any of them
+            ambiguous = found & names.map(lambda name: len(matches.get(name, ())) > 1)
+            for row_no in names.index[ambiguous]:
+                rejects.writerow([row_no + 1, names[row_no], values[row_no], "ambiguous"])
+            counts["ambiguous"] += int(ambiguous.sum())
+
+            # UPDATE operation: one unordered bulk_write per chunk, changed rows only
+            # (updated_at is stamped on real changes, so it can't count as one)
+            now = datetime.now(timezone.utc)
+            operations = []
+            unique = found & ~ambiguous
+            for name, value in zip(names[unique], values[unique]):
+                doc = matches[name][0]
+                if doc.get(UPDATE_COL) == value:
+                    counts["unchanged"] += 1
+                    continue
+                doc[UPDATE_COL] = value
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {UPDATE_COL: value, "updated_at": now}}))
+            if operations:
+                result = FAMILY_COLLECTION.bulk_write(operations, ordered=False)
+                counts["updated"] += result.modified_count
+                counts["unchanged"] += result.matched_count - result.modified_count
+
+            elapsed = time.perf_counter() - started
+            print(f"   chunk {chunk_no}: rows {first_row}-{counts['read']} | "
+                  f"updated {counts['updated']} | {counts['read'] / max(elapsed, 1e-9):,.0f} rows/sec")
+
+    if counts["updated"]:
+        bump_members_version()
+
+    elapsed = time.perf_counter() - started
+    rejected = counts["missing"] + counts["not_found"] + counts["ambiguous"]
+
+    # SUMMARY
+    # ----------
+    print("\n" + "="*30)
+    print("📊 STREAMING UPDATE SUMMARY")
+    print("="*30)
+    print(f"📄 Rows read:            {counts['read']}")
+    print(f"✅ Successfully Updated: {counts['updated']}")
+    print(f"⏭️ Unchanged:            {counts['unchanged']}")
+    print(f"⚠️ Not Found in DB:      {counts['not_found']}")
+    print(f"👥 Ambiguous (namesake): {counts['ambiguous']}")
+    print(f"🚫 Missing data:         {counts['missing']}")
+    print(f"⏱️ {elapsed:.1f}s ({counts['read'] / max(elapsed, 1e-9):,.0f} rows/sec)")
+    if rejected:
+        print(f"📝 {rejected} rejected row(s) written to {reject_file_path}")
+    print("="*30)
+    return counts
+
+
 if __name__ == "__main__":
+    # Run from the project root:  python -m data.db_insert <csv> [--stream]
+    parser = argparse.ArgumentParser(description="Update one field for members listed in a CSV.")
     # Replace with your actual CSV filename
-    run_update_script(r"C:\Users\satya\Downloads\2026-01-01T03-10_export.csv")
+    parser.add_argument("csv_file", nargs="?", default=r"C:\Users\satya\Downloads\2026-01-01T03-10_export.csv")
+    parser.add_argument("--stream", action="store_true", help="Chunked bulk mode for very large files")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    parser.add_argument("--rejects", help="Where to write rejected rows (default: <csv>.rejects.csv)")
+    args = parser.parse_args()
+
+    if args.stream:
+        run_streaming_update(args.csv_file, args.chunk_size, args.rejects)
+    else:
+        run_update_script(args.csv_file)
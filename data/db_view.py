@@ -1,10 +1,36 @@
+import re
+
 import streamlit as st
 import pandas as pd
 
+from data.data_version import get_members_version
+
+# Columns offered in the registry, and the ones shown by default
+REGISTRY_COLUMNS = ["name", "slug", "gender", "spouse", "parents", "parents_in_law",
+                    "association", "phone", "work", "updated_by", "updated_at"]
+DEFAULT_COLUMNS = ["name", "slug", "gender", "spouse", "parents", "association", "phone", "work"]
+SORT_KEYS = ["name", "slug", "updated_at"]
+PAGE_SIZES = [25, 50, 100, 200]
+
 
 def render_database_view(collection):
     """
-    Fetches all documents from the collection, cleans specific columns, 
+    Registry of all members.
+
+    'Paginated' (default) fetches one page at a time with a projection, a sort key,
+    keyset paging and server-side filters, so memory and render time are bounded per
+    page however large 'members' grows. 'Full table' is the old everything-at-once view.
+    """
+    mode = st.radio("View", ["Paginated", "Full table"], horizontal=True, label_visibility="collapsed")
+    if mode == "Full table":
+        _render_full_view(collection)
+    else:
+        _render_paginated_view(collection)
+
+
+def _render_full_view(collection):
+    """
+    Fetches all documents from the collection, cleans specific columns,
     and displays them in a Streamlit dataframe.
     """
     # Wrap the database fetch operation with a spinner
@@ -33,3 +59,127 @@ def render_database_view(collection):
         )
     else:
         st.info("The database is currently empty.")
+
+
+def build_registry_filter(name_prefix="", association="", gender=""):
+    """Server-side filters. Name uses an anchored, case-sensitive prefix so the name index applies."""
+    query = {}
+    if name_prefix.strip():
+        query["name"] = {"$regex": f"^{re.escape(name_prefix.strip())}"}
+    if association:
+        query["association"] = association
+    if gender:
+        query["gender"] = gender
+    return query
+
+
+def after_key_filter(sort_key, last_value, last_id):
+    """Keyset condition: rows strictly after (last_value, last_id) in (sort_key, _id) order."""
+    if last_value is None:
+        # Missing/null sorts first, so everything with a real value comes after it
+        later = {sort_key: {"$ne": None}}
+    else:
+        later = {sort_key: {"$gt": last_value}}
+    return {"$or": [later, {sort_key: last_value, "_id": {"$gt": last_id}}]}
+
+
+def fetch_registry_page(collection, query, sort_key, columns, page_size, after=None):
+    """
+    Returns (rows, has_next). 'after' is the (sort value, _id) of the previous page's last row.
+    Fetches page_size + 1 rows to know whether another page exists.
+    """
+    page_query = query
+    if after is not None:
+        page_query = {"$and": [query, after_key_filter(sort_key, *after)]} if query else after_key_filter(sort_key, *after)
+
+    projection = {col: 1 for col in columns}
+    projection[sort_key] = 1  # Needed for the next page's keyset
+
+    rows = list(
+        collection.find(page_query, projection)
+        .sort([(sort_key, 1), ("_id", 1)])
+        .limit(page_size + 1)
+    )
+    return rows[:page_size], len(rows) > page_size
+
+
+def _registry_total(collection, query, filters):
+    """
+    Matching rows for the pager caption. count_documents() scans what the filter
+    matches, so it runs once per filter and data version, not on every rerun.
+    """
+    if not query:
+        return collection.estimated_document_count()
+    key = (filters, get_members_version())
+    cached = st.session_state.get('registry_total')
+    if cached is None or cached[0] != key:
+        cached = st.session_state['registry_total'] = (key, collection.count_documents(query))
+    return cached[1]
+
+
+def _render_paginated_view(collection):
+    # --- 1. Controls ---
+    f1, f2, f3 = st.columns([2, 1, 1])
+    with f1:
+        name_prefix = st.text_input("Name starts with", key="registry_name_prefix")
+    with f2:
+        association = st.selectbox("Association", ["", "son", "daughter", "son-in-law", "daughter-in-law"],
+                                   key="registry_association")
+    with f3:
+        gender = st.selectbox("Gender", ["", "M", "F", "Other"], key="registry_gender")
+
+    c1, c2, c3 = st.columns([3, 1, 1])
+    with c1:
+        columns = st.multiselect("Columns", REGISTRY_COLUMNS, default=DEFAULT_COLUMNS, key="registry_columns")
+    with c2:
+        sort_key = st.selectbox("Sort by", SORT_KEYS, key="registry_sort")
+    with c3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key="registry_page_size")
+
+    if not columns:
+        st.warning("Pick at least one column.")
+        return
+
+    query = build_registry_filter(name_prefix, association, gender)
+
+    # --- 2. Keyset State (reset whenever the filter/sort/page size changes) ---
+    signature = (name_prefix, association, gender, sort_key, page_size)
+    if st.session_state.get('registry_signature') != signature:
+        st.session_state['registry_signature'] = signature
+        st.session_state['registry_page_starts'] = [None]  # Keyset 'after' for each visited page
+
+    page_starts = st.session_state['registry_page_starts']
+    page_no = len(page_starts)
+
+    # --- 3. Fetch One Page ---
+    with st.spinner("Loading page..."):
+        rows, has_next = fetch_registry_page(collection, query, sort_key, columns, page_size, page_starts[-1])
+        total = _registry_total(collection, query, (name_prefix, association, gender))
+
+    if not rows:
+        st.info("No members match these filters." if query else "The database is currently empty.")
+        return
+
+    df = pd.DataFrame(rows).reindex(columns=columns)
+    # Lists (parents, in-laws) read better as text
+    for col in df.columns:
+        df[col] = df[col].map(lambda v: ", ".join(map(str, v)) if isinstance(v, list) else v)
+
+    first = (page_no - 1) * page_size + 1
+    df.insert(0, 'S.No', range(first, first + len(df)))
+
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    # --- 4. Pager ---
+    p1, p2, p3 = st.columns([1, 2, 1])
+    with p1:
+        if st.button("⬅️ Previous", use_container_width=True, disabled=page_no == 1):
+            page_starts.pop()
+            st.rerun()
+    with p2:
+        st.caption(f"Page {page_no} · rows {first}-{first + len(df) - 1} of {total}")
+    with p3:
+        if st.button("Next ➡️", use_container_width=True, disabled=not has_next):
+            last = rows[-1]
+            page_starts.append((last.get(sort_key), last['_id']))
+            st.rerun()
@@ -0,0 +1,104 @@
+import pandas as pd
+import streamlit as st
+
+from data.indexes import bootstrap_on_startup, get_last_bootstrap, index_problems
+from data.member_sync import get_delta_stats
+from handlers.member_events import (CONSISTENCY_CHECK_SECONDS,
+                                    check_consistency, get_sync_stats)
+from handlers.profiling import (PROFILE_LOG_PATH, PROFILE_REPEAT_WARN,
+                                PROFILE_RERUNS, page_summary, recent_reruns,
+                                unattributed_totals)
+from handlers.tree_cache import TREE_RENDER_CACHE
+from handlers.typeahead import get_typeahead_stats
+
+
+def render_debug_panel():
+    """
+    Admin-only view of what reruns cost this server process: Mongo round trips,
+    bytes, driver time and render time per page, plus query shapes that repeat
+    within one rerun (likely N+1 loops), plus the index check and the shared indexes.
+    """
+    st.subheader("🩺 Performance")
+
+    if PROFILE_RERUNS:
+        _render_rerun_profile()
+    else:
+        st.info("Rerun profiling is off (set PROFILE_RERUNS=1 to turn it on).")
+
+    # --- 4. Process Counters ---
+    st.markdown("**Process counters**")
+    c1, c2, c3 = st.columns(3)
+    typeahead = get_typeahead_stats()
+    c1.metric("Typeahead p95", f"{typeahead['p95_ms']} ms", f"{typeahead['count']} searches", delta_color="off")
+    c2.metric("Tree cache hits", TREE_RENDER_CACHE.hits, f"{TREE_RENDER_CACHE.misses} misses", delta_color="off")
+    background = unattributed_totals()
+    c3.metric("Background queries", background["queries"], f"{background['server_ms']} ms", delta_color="off")
+
+    # --- 5. Patched Indexes ---
+    st.markdown("**In-memory indexes** (patched on every write)")
+    sync = get_sync_stats()
+    rows = [{"structure": name, **counts, "last check": sync["last_check"]["results"].get(name, "")}
+            for name, counts in sync["structures"].items()]
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    every = f"every {CONSISTENCY_CHECK_SECONDS // 60} min" if CONSISTENCY_CHECK_SECONDS > 0 else "off"
+    st.caption(f"Consistency check: {every}, last run {sync['last_check']['at'] or 'never'}")
+    delta = get_delta_stats()
+    last = delta["last"] or {}
+    st.caption(f"Delta sync: {'on' if delta['enabled'] else 'off'}, {delta['fetches']} fetches "
+               f"({delta['reused']} shared), {delta['too_many'] + delta['too_old']} fell back to a rebuild, "
+               f"last {last.get('upserted', 0)} changed / {last.get('removed', 0)} removed at {last.get('at', 'never')}")
+    if st.button("🔁 Run consistency check now", key="debug_consistency_check"):
+        with st.spinner("Rebuilding and comparing..."):
+            results = check_consistency()
+        st.write(results)
+
+    # --- 6. Index Check ---
+    st.markdown("**Index check** (run at startup)")
+    boot = get_last_bootstrap()
+    if boot["error"]:
+        st.error(f"Index bootstrap failed: {boot['error']}")
+    elif boot["result"] is None:
+        st.caption("Not run yet in this process (or ENSURE_INDEXES_ON_STARTUP=0).")
+    else:
+        problems = index_problems(boot["result"])
+        for problem in problems:
+            st.warning(problem)
+        if not problems:
+            st.success(f"All indexes present, no hot query scans the collection (checked {boot['at']}).")
+    if st.button("🔎 Re-check indexes", key="debug_index_check"):
+        with st.spinner("Running explain() on the hot queries..."):
+            bootstrap_on_startup(check_only=True)
+        st.rerun()
+
+
+def _render_rerun_profile():
+    sink = f"`{PROFILE_LOG_PATH}`" if PROFILE_LOG_PATH else "off (set PROFILE_LOG_PATH)"
+    st.caption(f"Numbers cover this server process only. JSON-lines log: {sink}")
+
+    # --- 1. Per Page ---
+    summary = page_summary()
+    if summary:
+        st.markdown("**Per page**")
+        st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+
+    # --- 2. Recent Reruns ---
+    only_mine = st.checkbox("Only my session", value=True, key="debug_only_mine")
+    session_id = st.session_state.get('profile_session') if only_mine else None
+    reruns = recent_reruns(session_id)
+    if reruns:
+        st.markdown("**Recent reruns** (newest first)")
+        rows = [{k: r[k] for k in ("at", "page", "render_ms", "queries", "bytes", "server_ms")} for r in reruns]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.info("No reruns recorded yet.")
+
+    # --- 3. Likely N+1 ---
+    flagged = [r for r in reruns if r["repeated"]]
+    st.markdown(f"**Repeated query shapes** (≥ {PROFILE_REPEAT_WARN} times in one rerun)")
+    if flagged:
+        for r in flagged[:10]:
+            with st.expander(f"{r['at']} · {r['page']} · {r['queries']} queries"):
+                for shape in r["repeated"]:
+                    st.code(f"{r['shapes'][shape]['count']}× {shape}  ({r['shapes'][shape]['ms']} ms)")
+    else:
+        st.success("None in the recent reruns.")
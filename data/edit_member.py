@@ -4,6 +4,14 @@ from datetime import datetime, timezone
 import streamlit as st
 from pymongo.errors import PyMongoError
 
+from data.data_version import bump_members_version
+from data.member_sync import record_tombstones
+from data.slug_links import relink_members, relink_named, replace_slug_links
+from data.slugs import allocate_slug, slug_base, slug_fits_base
+from handlers.graph_index import as_name_list
+from handlers.lineage import refresh_lineage
+from handlers.member_events import emit_member_change
+
 
 def render_edit_member_form(collection):
     """
@@ -151,6 +159,15 @@ def render_edit_member_form(collection):
                     if st.button("✅ YES, DELETE", type="primary", use_container_width=True):
                         try:
                             collection.delete_one({"_id": person['_id']})
+                            removed_slugs = [person.get('slug') or person['name']]
+                            # Other processes drop the member on their next delta sync
+                            record_tombstones([(removed_slugs[0], person['name'])])
+                            # Slug links to this person fall back to the name
+                            links = replace_slug_links(collection, removed_slugs[0], None)
+                            # Children of the deleted person lose (or re-link) that branch
+                            refresh_lineage(collection, touched_names=[person['name']], removed_slugs=removed_slugs)
+                            change = bump_members_version(count_delta=-1)
+                            emit_member_change(change, removed_slugs=removed_slugs, links=links)
                             st.success(f"Deleted {person['name']}")
                             del st.session_state['current_person']
                             del st.session_state['confirm_delete']
@@ -243,20 +260,11 @@ def render_edit_member_form(collection):
                     updated_parents = [p.strip() for p in [new_father, new_mother] if p.strip()]
                     updated_in_laws = [p.strip() for p in [new_father_in_law, new_mother_in_law] if p.strip()]
                     
-                    # 2. Slug Generation Logic (with Counter)
-                    base_slug = new_name.lower().strip().replace(" ", "-")
-                    final_slug = base_slug
-                    
-                    # Check if this slug is taken by SOMEONE ELSE
-                    # We look for a doc with this slug where _id is NOT the current person's _id
-                    collision = collection.find_one({"slug": final_slug, "_id": {"$ne": person['_id']}})
-                    
-                    counter = 1
-                    while collision:
-                        # Collision found! Append counter and try again
-                        final_slug = f"{base_slug}-{counter}"
-                        collision = collection.find_one({"slug": final_slug, "_id": {"$ne": person['_id']}})
-                        counter += 1
+                    # 2. Slug Logic: keep the current slug while it still fits the name,
+                    # otherwise draw a new one from the atomic counter
+                    final_slug = person.get('slug')
+                    if not slug_fits_base(final_slug, slug_base(new_name)):
+                        final_slug = allocate_slug(new_name, collection)
                     
                     # At this point, final_slug is unique to this person
 
@@ -279,6 +287,34 @@ def render_edit_member_form(collection):
 
                     # 3. DB Update
                     collection.update_one({"_id": person['_id']}, {"$set": update_payload})
+                    old_slug = person.get('slug') or person['name']
+
+                    # Slug links: re-resolve this member's own, carry a slug rename over to
+                    # everyone linking here, and retry links waiting for the new name
+                    links_changed = (updated_parents != as_name_list(person.get('parents'))
+                                     or updated_in_laws != as_name_list(person.get('parents_in_law'))
+                                     or update_payload['spouse'] != (person.get('spouse') or ""))
+                    links = relink_members(collection, [final_slug], fresh=links_changed)
+                    if final_slug != old_slug:
+                        links += replace_slug_links(collection, old_slug, final_slug)
+                        record_tombstones([(old_slug, person['name'])])
+                    if update_payload['name'] != person['name']:
+                        links += relink_named(collection, [update_payload['name']])
+
+                    # Re-link this person's subtree if their place in the tree moved
+                    # (before the bump: trees cached for the new version must see it)
+                    if (updated_parents != as_name_list(person.get('parents'))
+                            or update_payload['name'] != person['name'] or final_slug != old_slug):
+                        refresh_lineage(
+                            collection,
+                            changed_slugs=[final_slug],
+                            touched_names=[person['name'], update_payload['name']],
+                            removed_slugs=[old_slug] if final_slug != old_slug else []
+                        )
+
+                    change = bump_members_version()
+                    changed_doc = {**update_payload, "_old_slug": old_slug}
+                    emit_member_change(change, upserted=[changed_doc], links=links)
                     
                     # Update local state
                     st.session_state['current_person'].update(update_payload)
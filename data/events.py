@@ -1,6 +1,8 @@
 from datetime import datetime
 import streamlit as st
 from data.database import EVENTS_COLLECTION
+from handlers.events_feed import (EVENTS_PAGE_SIZE, get_events_feed,
+                                  invalidate_events_feed, start_of_day)
 
 import streamlit as st
 from datetime import datetime, time
@@ -48,6 +50,7 @@ def render_add_event_form():
                     
                     # 3. Insert into Database
                     EVENTS_COLLECTION.insert_one(new_event)
+                    invalidate_events_feed(EVENTS_COLLECTION)
                     
                     # 4. Success Feedback
                     st.success(f"✅ Event '{title}' added successfully!")
@@ -60,14 +63,31 @@ def render_add_event_form():
 
 
 def render_events_page(events_collection):
-    """Renders a full-page timeline view of upcoming events."""
+    """
+    Renders a full-page timeline view of upcoming events, plus an archive of past ones.
+    Both come from the shared events feed, so a visit normally costs no DB query.
+    """
     
     st.header("📅 Upcoming Events")
+    view = st.radio("Events view", ["Upcoming", "Archive"], horizontal=True, label_visibility="collapsed")
     st.markdown("---")
 
-    # 1. Get Data
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    events = list(events_collection.find({"date": {"$gte": today}}).sort("date", 1))
+    feed = get_events_feed(events_collection)
+    today = start_of_day()
+
+    if view == "Archive":
+        _render_archive(feed, today)
+    else:
+        _render_upcoming(feed, today)
+
+
+def _render_upcoming(feed, today):
+    # 1. Get Data (one page of the cached feed)
+    page = st.session_state.get('events_page', 0)
+    events, total = feed.upcoming_page(page, EVENTS_PAGE_SIZE, today)
+    if not events and page > 0:
+        page = st.session_state['events_page'] = 0
+        events, total = feed.upcoming_page(page, EVENTS_PAGE_SIZE, today)
 
     # 2. Handle Empty State
     if not events:
@@ -82,59 +102,109 @@ def render_events_page(events_collection):
 
     # 3. Render Timeline
     for event in events:
-        # Calculate days remaining for badge
-        days_left = (event['date'] - today).days
+        _render_event_card(event, today)
+
+    # 4. Pager
+    last_page = (total - 1) // EVENTS_PAGE_SIZE
+    if last_page > 0:
+        p1, p2, p3 = st.columns([1, 2, 1])
+        with p1:
+            if st.button("⬅️ Previous", key="events_prev", use_container_width=True, disabled=page == 0):
+                st.session_state['events_page'] = page - 1
+                st.rerun()
+        with p2:
+            st.caption(f"Page {page + 1} of {last_page + 1}")
+        with p3:
+            if st.button("Next ➡️", key="events_next", use_container_width=True, disabled=page >= last_page):
+                st.session_state['events_page'] = page + 1
+                st.rerun()
+
+
+def _render_archive(feed, today):
+    # Keyset 'after' for each visited archive page
+    if 'events_archive_starts' not in st.session_state:
+        st.session_state['events_archive_starts'] = [None]
+    starts = st.session_state['events_archive_starts']
+
+    events, next_key = feed.archive_page(starts[-1], EVENTS_PAGE_SIZE, today)
+    if not events:
+        st.container(border=True).info("**No past events yet.**")
+        return
+
+    for event in events:
+        _render_event_card(event, today)
+
+    p1, p2, p3 = st.columns([1, 2, 1])
+    with p1:
+        if st.button("⬅️ Newer", key="archive_prev", use_container_width=True, disabled=len(starts) == 1):
+            starts.pop()
+            st.rerun()
+    with p2:
+        st.caption(f"Page {len(starts)}")
+    with p3:
+        if st.button("Older ➡️", key="archive_next", use_container_width=True, disabled=next_key is None):
+            starts.append(next_key)
+            st.rerun()
+
+
+def _render_event_card(event, today):
+    """One event card: date badge, status, location and details."""
+    # Calculate days remaining for badge
+    days_left = (event['date'] - today).days
+    
+    if days_left < 0:
+        status = f"⚪ {-days_left} DAYS AGO"
+        border_color = "grey"
+    elif days_left == 0:
+        status = "🔴 HAPPENING TODAY"
+        border_color = "red"
+    elif days_left == 1:
+        status = "🟠 TOMORROW"
+        border_color = "orange"
+    else:
+        status = f"🟢 IN {days_left} DAYS"
+        border_color = "grey"
+
+    # Create the Card
+    with st.container(border=True):
+        col_date, col_details = st.columns([1, 5])
         
-        if days_left == 0:
-            status = "🔴 HAPPENING TODAY"
-            border_color = "red"
-        elif days_left == 1:
-            status = "🟠 TOMORROW"
-            border_color = "orange"
-        else:
-            status = f"🟢 IN {days_left} DAYS"
-            border_color = "grey"
-
-        # Create the Card
-        with st.container(border=True):
-            col_date, col_details = st.columns([1, 5])
+        # Left Column: Big Date Badge
+        with col_date:
+            st.markdown(
+                f"""
+                <div style="
+                    background-color: #f0f2f6; 
+                    border-radius: 10px; 
+                    padding: 10px; 
+                    text-align: center;
+                    border: 1px solid #ddd;">
+                    <span style="font-size: 1.5em; font-weight: bold; display: block; color: #333;">
+                        {event['date'].strftime('%d')}
+                    </span>
+                    <span style="font-size: 0.9em; text-transform: uppercase; color: #666;">
+                        {event['date'].strftime('%b')}
+                    </span>
+                    <span style="font-size: 0.8em; display: block; color: #888;">
+                        {event['date'].strftime('%Y')}
+                    </span>
+                </div>
+                """, 
+                unsafe_allow_html=True
+            )
+
+        # Right Column: Details
+        with col_details:
+            # Title and Status Badge
+            st.markdown(f"### {event['title']}")
+            st.caption(f"**{status}**")
             
-            # Left Column: Big Date Badge
-            with col_date:
-                st.markdown(
-                    f"""
-                    <div style="
-                        background-color: #f0f2f6; 
-                        border-radius: 10px; 
-                        padding: 10px; 
-                        text-align: center;
-                        border: 1px solid #ddd;">
-                        <span style="font-size: 1.5em; font-weight: bold; display: block; color: #333;">
-                            {event['date'].strftime('%d')}
-                        </span>
-                        <span style="font-size: 0.9em; text-transform: uppercase; color: #666;">
-                            {event['date'].strftime('%b')}
-                        </span>
-                        <span style="font-size: 0.8em; display: block; color: #888;">
-                            {event['date'].strftime('%Y')}
-                        </span>
-                    </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
-
-            # Right Column: Details
-            with col_details:
-                # Title and Status Badge
-                st.markdown(f"### {event['title']}")
-                st.caption(f"**{status}**")
-                
-                # Location and Description
-                st.markdown(f"📍 **Location:** {event['location']}")
+            # Location and Description
+            st.markdown(f"📍 **Location:** {event['location']}")
+            
+            if event.get('description'):
+                st.write(event['description'])
                 
-                if event.get('description'):
-                    st.write(event['description'])
-                    
-                # Optional: Add "Add to Calendar" text copy helper
-                st.code(f"{event['title']} on {event['date'].strftime('%Y-%m-%d')} at {event['location']}", language="text")
+            # Optional: Add "Add to Calendar" text copy helper
+            st.code(f"{event['title']} on {event['date'].strftime('%Y-%m-%d')} at {event['location']}", language="text")
 
@@ -0,0 +1,229 @@
+"""
+Index bootstrap and verification.
+
+Creates the indexes the hot queries rely on (idempotent, safe to run on every start)
+and checks with explain() that none of those queries falls back to a COLLSCAN.
+
+    python -m data.indexes           # ensure + verify
+    python -m data.indexes --check   # verify only, create nothing
+"""
+import argparse
+import logging
+import sys
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from data.database import (EVENTS_COLLECTION, FAMILY_COLLECTION,
+                           USERS_COLLECTION)
+from data.member_sync import TOMBSTONE_TTL_DAYS, TOMBSTONES_COLLECTION
+
+# (collection, index name, keys, options)
+REQUIRED_INDEXES = [
+    # Old rows may have no slug at all, only real slugs have to be unique
+    (FAMILY_COLLECTION, "slug_unique", [("slug", ASCENDING)],
+     {"unique": True, "partialFilterExpression": {"slug": {"$exists": True}}}),
+    (FAMILY_COLLECTION, "name", [("name", ASCENDING)], {}),
+    # Multikey: one entry per parent name, serves {"parents": ...} and {"parents": {"$in": ...}}
+    (FAMILY_COLLECTION, "parents", [("parents", ASCENDING)], {}),
+    # Slug links (data/slug_links.py): exact child lookups
+    (FAMILY_COLLECTION, "parent_slugs", [("parent_slugs", ASCENDING)], {}),
+    # The other $or branches of relink_named / replace_slug_links (run on every add,
+    # delete and rename): each branch needs an index or the whole $or scans
+    (FAMILY_COLLECTION, "spouse", [("spouse", ASCENDING)], {}),
+    (FAMILY_COLLECTION, "parents_in_law", [("parents_in_law", ASCENDING)], {}),
+    (FAMILY_COLLECTION, "spouse_slug", [("spouse_slug", ASCENDING)], {}),
+    (FAMILY_COLLECTION, "parents_in_law_slugs", [("parents_in_law_slugs", ASCENDING)], {}),
+    # Materialized ancestor paths (handlers/lineage.py): descendants of X in one query
+    (FAMILY_COLLECTION, "lineage", [("lineage.slug", ASCENDING), ("lineage.depth", ASCENDING)], {}),
+    # Registry keyset pages (data/db_view.py) sort on (key, _id); the updated_at one
+    # also serves the delta sync range (data/member_sync.py)
+    (FAMILY_COLLECTION, "name_id", [("name", ASCENDING), ("_id", ASCENDING)], {}),
+    (FAMILY_COLLECTION, "slug_id", [("slug", ASCENDING), ("_id", ASCENDING)], {}),
+    (FAMILY_COLLECTION, "updated_at_id", [("updated_at", ASCENDING), ("_id", ASCENDING)], {}),
+    # Delta sync: members deleted since a mark
+    (TOMBSTONES_COLLECTION, "deleted_at_ttl", [("deleted_at", ASCENDING)],
+     {"expireAfterSeconds": TOMBSTONE_TTL_DAYS * 86400}),
+    (EVENTS_COLLECTION, "date", [("date", ASCENDING)], {}),
+    (USERS_COLLECTION, "email_unique", [("email", ASCENDING)], {"unique": True}),
+]
+
+logger = logging.getLogger(__name__)
+
+# Outcome of the startup run, for the admin debug panel
+_last_bootstrap = {"at": None, "result": None, "error": None}
+
+# (label, collection, filter, sort) - the shapes the app actually sends
+HOT_QUERIES = [
+    ("members by slug", FAMILY_COLLECTION, {"slug": "__probe__"}, None),
+    ("members by name", FAMILY_COLLECTION, {"name": "__probe__"}, None),
+    ("members by name $in", FAMILY_COLLECTION, {"name": {"$in": ["__probe__", "__probe_2__"]}}, None),
+    ("children by parents $in", FAMILY_COLLECTION, {"parents": {"$in": ["__probe__"]}}, None),
+    ("children by parent_slugs $in", FAMILY_COLLECTION, {"parent_slugs": {"$in": ["__probe__"]}}, None),
+    ("links waiting for a name (relink_named)", FAMILY_COLLECTION,
+     {"$or": [{f: {"$in": ["__probe__"]}} for f in ("parents", "spouse", "parents_in_law")]}, None),
+    ("links to a slug (replace_slug_links)", FAMILY_COLLECTION,
+     {"$or": [{f: "__probe__"} for f in ("parent_slugs", "spouse_slug", "parents_in_law_slugs")]}, None),
+    ("descendants by lineage", FAMILY_COLLECTION, {"lineage": {"$elemMatch": {"slug": "__probe__", "depth": {"$lte": 3}}}}, None),
+    ("registry page by name", FAMILY_COLLECTION, {"name": {"$gt": "__probe__"}}, [("name", ASCENDING), ("_id", ASCENDING)]),
+    ("registry page by updated_at", FAMILY_COLLECTION, {}, [("updated_at", ASCENDING), ("_id", ASCENDING)]),
+    ("members changed since", FAMILY_COLLECTION, {"updated_at": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("tombstones since", TOMBSTONES_COLLECTION, {"deleted_at": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("upcoming events", EVENTS_COLLECTION, {"date": {"$gte": datetime(1970, 1, 1)}}, [("date", ASCENDING)]),
+    ("login by email", USERS_COLLECTION, {"email": "__probe__", "password": "__probe__"}, None),
+]
+
+
+def _same_keys(info, keys):
+    return [tuple(k) for k in info.get("key", [])] == [tuple(k) for k in keys]
+
+
+def ensure_indexes(check_only=False):
+    """
+    Creates any missing index from REQUIRED_INDEXES.
+
+    An index with the same keys under another name (e.g. made by hand) counts as
+    present, unless its 'unique' flag differs - that is reported as a conflict and
+    left alone, dropping indexes is a decision for a human.
+
+    Returns:
+        list[dict]: one {"collection", "index", "status", "detail"} per required index,
+        status being "exists", "created", "missing" (check_only), "conflict" or "error".
+    """
+    report = []
+    for collection, name, keys, options in REQUIRED_INDEXES:
+        row = {"collection": collection.name, "index": name, "status": "exists", "detail": ""}
+        report.append(row)
+        try:
+            existing = collection.index_information()
+        except OperationFailure as e:
+            row.update(status="error", detail=str(e))
+            continue
+
+        match = next(((n, info) for n, info in existing.items() if _same_keys(info, keys)), None)
+        if match:
+            existing_name, info = match
+            if bool(info.get("unique")) != bool(options.get("unique")):
+                row.update(status="conflict",
+                           detail=f"'{existing_name}' has unique={bool(info.get('unique'))}")
+            elif existing_name != name:
+                row["detail"] = f"as '{existing_name}'"
+            continue
+
+        if check_only:
+            row["status"] = "missing"
+            continue
+        try:
+            collection.create_index(keys, name=name, **options)
+            row["status"] = "created"
+        except OperationFailure as e:
+            # e.g. duplicate slugs/emails already in the data block a unique index
+            row.update(status="error", detail=str(e))
+    return report
+
+
+def _plan_stages(plan):
+    """Flattens a winningPlan tree into its stage names."""
+    stages = [plan.get("stage")]
+    for child_key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(child_key), dict):
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return [s for s in stages if s]
+
+
+def verify_hot_queries():
+    """
+    Runs explain() for every query in HOT_QUERIES.
+
+    Returns:
+        list[dict]: {"query", "collection", "stages", "collscan"} per query, or
+        {"query", "collection", "error"} if the server couldn't explain it.
+    """
+    report = []
+    for label, collection, query, sort in HOT_QUERIES:
+        row = {"query": label, "collection": collection.name}
+        try:
+            cursor = collection.find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            planner = cursor.explain().get("queryPlanner", {})
+            stages = _plan_stages(planner.get("winningPlan", {}))
+            row.update(stages=stages, collscan="COLLSCAN" in stages)
+        except Exception as e:
+            row["error"] = str(e)
+        report.append(row)
+    return report
+
+
+def bootstrap_indexes(check_only=False):
+    """ensure_indexes() + verify_hot_queries() in one call, for app startup and the CLI."""
+    return {"indexes": ensure_indexes(check_only), "queries": verify_hot_queries()}
+
+
+def index_problems(result):
+    """The lines of a bootstrap_indexes() result that need a human: missing/conflicting indexes, COLLSCANs."""
+    problems = []
+    for row in result["indexes"]:
+        if row["status"] in ("missing", "conflict", "error"):
+            detail = f" ({row['detail']})" if row["detail"] else ""
+            problems.append(f"index {row['collection']}.{row['index']}: {row['status']}{detail}")
+    for row in result["queries"]:
+        if "error" in row:
+            problems.append(f"query '{row['query']}': explain failed ({row['error']})")
+        elif row["collscan"]:
+            problems.append(f"query '{row['query']}': COLLSCAN [{' > '.join(row['stages'])}]")
+    return problems
+
+
+def bootstrap_on_startup(check_only=False):
+    """
+    bootstrap_indexes() for the app's startup thread: never raises, logs every problem
+    (or the exception) and keeps the report for the debug panel (get_last_bootstrap).
+    """
+    try:
+        result, error = bootstrap_indexes(check_only), None
+        for problem in index_problems(result):
+            logger.warning("Index check: %s", problem)
+    except Exception as e:
+        logger.exception("Index bootstrap failed")
+        result, error = None, str(e)
+    _last_bootstrap.update(at=datetime.now(timezone.utc).isoformat(timespec="seconds"), result=result, error=error)
+    return result
+
+
+def get_last_bootstrap():
+    return dict(_last_bootstrap)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create and verify the Mongo indexes the app relies on.")
+    parser.add_argument("--check", action="store_true", help="Only report, don't create anything.")
+    args = parser.parse_args(argv)
+
+    result = bootstrap_indexes(check_only=args.check)
+    problems = 0
+
+    print("Indexes:")
+    for row in result["indexes"]:
+        problems += row["status"] in ("missing", "conflict", "error")
+        detail = f" ({row['detail']})" if row["detail"] else ""
+        print(f"  {row['collection']}.{row['index']}: {row['status']}{detail}")
+
+    print("Hot queries:")
+    for row in result["queries"]:
+        if "error" in row:
+            problems += 1
+            print(f"  {row['query']}: explain failed ({row['error']})")
+        else:
+            problems += row["collscan"]
+            flag = "COLLSCAN!" if row["collscan"] else "ok"
+            print(f"  {row['query']}: {flag} [{' > '.join(row['stages'])}]")
+
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
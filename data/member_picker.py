@@ -0,0 +1,39 @@
+import streamlit as st
+
+from handlers.typeahead import TYPEAHEAD_TOP_K, search_members
+
+
+def render_member_picker(key, placeholder="Type to search..."):
+    """
+    Typeahead member search shared by the Search and Tree pages.
+
+    The query is matched server-side, so only the top matches (not the whole
+    village) are sent to the browser.
+
+    Returns:
+        str | None: The slug of the selected member.
+    """
+    query = st.text_input(
+        "Search Family Member",
+        placeholder=placeholder,
+        key=f"{key}_query",
+        label_visibility="collapsed"
+    )
+    if not query.strip():
+        return None
+
+    matches = search_members(query, k=TYPEAHEAD_TOP_K)
+    if not matches:
+        st.info(f"No member found for '{query.strip()}'.")
+        return None
+
+    labels = {slug: label for slug, label in matches}
+    return st.selectbox(
+        "Select member",
+        options=list(labels),
+        format_func=lambda slug: labels[slug],
+        index=None,
+        placeholder=f"{len(matches)} match(es), pick one...",
+        key=f"{key}_choice",
+        label_visibility="collapsed"
+    )
@@ -0,0 +1,152 @@
+"""
+Delta sync of 'members': fetch only what changed since a point in time, no change
+streams needed (works against a plain local mongod).
+
+Every write the app makes stamps 'updated_at' (UTC) on the members it touches, and a
+delete (or slug rename) leaves a tombstone {slug, name, deleted_at} in
+'member_tombstones', expired by a TTL index after TOMBSTONE_TTL_DAYS.
+fetch_member_changes(since) is then two indexed range queries, and a shared index
+built at 'since' catches up with work proportional to the number of changes
+(see VersionedResource in data/data_version.py).
+
+Stamps come from the app servers' clocks and a write commits a little after its stamp,
+so every fetch reaches back DELTA_SYNC_OVERLAP_SECONDS before the mark. Seeing a
+change twice is harmless, applying it is idempotent.
+
+    DELTA_SYNC=0                      # off: a version change always rebuilds from a full scan
+    DELTA_SYNC_OVERLAP_SECONDS=120
+    DELTA_SYNC_MAX_CHANGES=5000       # more changed members than this: full rebuild instead
+    TOMBSTONE_TTL_DAYS=30
+
+    python -m data.member_sync --since 2026-10-01T00:00:00+00:00   # what a catch-up would fetch
+"""
+import argparse
+import os
+import sys
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from data.database import FAMILY_COLLECTION, LazyCollection, set_client
+from data.snapshot import snapshot_active
+
+DELTA_SYNC = os.getenv("DELTA_SYNC", "1") != "0"
+DELTA_SYNC_OVERLAP_SECONDS = int(os.getenv("DELTA_SYNC_OVERLAP_SECONDS", "120"))
+DELTA_SYNC_MAX_CHANGES = int(os.getenv("DELTA_SYNC_MAX_CHANGES", "5000"))
+TOMBSTONE_TTL_DAYS = int(os.getenv("TOMBSTONE_TTL_DAYS", "30"))
+
+TOMBSTONES_COLLECTION = LazyCollection("member_tombstones")
+
+# upserted: full member docs changed since the mark (with '_id', in insertion order)
+# removed_slugs: members deleted (or renamed away) since the mark
+# high_water: the next mark, taken before the queries ran
+MemberDelta = namedtuple("MemberDelta", ["upserted", "removed_slugs", "high_water"])
+
+_last_fetch = {"version": None, "start": None, "delta": None}
+_fetch_lock = threading.Lock()
+_stats = {"fetches": 0, "reused": 0, "too_many": 0, "too_old": 0, "last": None}
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def record_tombstones(members, collection=TOMBSTONES_COLLECTION):
+    """
+    Marks members as gone for delta sync. Call next to the delete_one (and with the
+    old slug when a slug is renamed).
+
+    Args:
+        members: (slug, name) pairs.
+    """
+    now = utc_now()
+    docs = [{"slug": slug, "name": name, "deleted_at": now} for slug, name in members if slug]
+    if docs:
+        collection.insert_many(docs, ordered=False)
+
+
+def _as_utc(value):
+    # pymongo hands back naive datetimes that are UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def fetch_member_changes(since, version=None, max_changes=None):
+    """
+    Members changed and deleted since 'since'.
+
+    Args:
+        since (datetime): The mark of the caller, the high_water of its last sync
+            (or the moment its last full build started).
+        version: The data version the caller is catching up to. Callers asking for
+            the same version share one fetch, as long as it reaches back far enough.
+        max_changes: Give up above this many changed members (default DELTA_SYNC_MAX_CHANGES).
+
+    Returns:
+        MemberDelta, or None when a full rebuild is the better (or only safe) option:
+        too many changes, or 'since' is older than the tombstones are kept.
+    """
+    if since is None or snapshot_active():
+        return None
+    max_changes = DELTA_SYNC_MAX_CHANGES if max_changes is None else max_changes
+    start = _as_utc(since) - timedelta(seconds=DELTA_SYNC_OVERLAP_SECONDS)
+
+    with _fetch_lock:
+        cached = _last_fetch
+        if version is not None and cached["version"] == version and cached["start"] <= start:
+            _stats["reused"] += 1
+            return cached["delta"]
+
+        now = utc_now()
+        if now - start >= timedelta(days=TOMBSTONE_TTL_DAYS):
+            _stats["too_old"] += 1
+            return None
+
+        _stats["fetches"] += 1
+        docs = list(FAMILY_COLLECTION.find({"updated_at": {"$gte": start}}).limit(max_changes + 1))
+        if len(docs) > max_changes:
+            _stats["too_many"] += 1
+            return None
+        # New members go last in a fresh scan too
+        docs.sort(key=lambda d: d["_id"])
+        live = {d.get("slug") or d.get("name") for d in docs}
+        removed = list(dict.fromkeys(
+            t["slug"] for t in TOMBSTONES_COLLECTION.find({"deleted_at": {"$gte": start}}, {"_id": 0, "slug": 1})
+            if t.get("slug") and t["slug"] not in live))
+
+        delta = MemberDelta(docs, removed, now)
+        _last_fetch.update(version=version, start=start, delta=delta)
+        _stats["last"] = {"at": now.isoformat(timespec="seconds"), "upserted": len(docs), "removed": len(removed)}
+        return delta
+
+
+def get_delta_stats():
+    """Fetch counts since the process started, plus the size of the last fetch."""
+    with _fetch_lock:
+        return {**_stats, "enabled": DELTA_SYNC}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show what a delta sync since a given time would fetch.")
+    parser.add_argument("--since", required=True, help="ISO time, e.g. 2026-10-01T00:00:00+00:00 (naive = UTC).")
+    parser.add_argument("--mongo-uri", help="Query this server instead of MONGO_URI (e.g. a local mongod).")
+    args = parser.parse_args(argv)
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        set_client(MongoClient(args.mongo_uri))
+
+    delta = fetch_member_changes(datetime.fromisoformat(args.since), max_changes=sys.maxsize)
+    if delta is None:
+        print(f"--since is older than the tombstones are kept ({TOMBSTONE_TTL_DAYS} days): full rebuild")
+        return 1
+    print(f"{len(delta.upserted)} changed, {len(delta.removed_slugs)} removed "
+          f"(overlap {DELTA_SYNC_OVERLAP_SECONDS}s, next mark {delta.high_water.isoformat(timespec='seconds')})")
+    for doc in delta.upserted[:20]:
+        print(f"  ~ {doc.get('slug') or doc.get('name')}")
+    for slug in delta.removed_slugs[:20]:
+        print(f"  - {slug}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
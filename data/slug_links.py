@@ -0,0 +1,266 @@
+"""
+Slug links: resolves the display-name strings in 'parents', 'spouse' and
+'parents_in_law' to member slugs, stored next to them as
+
+    parent_slugs:         [slug or None, ...]  (same order as 'parents')
+    spouse_slug:          slug or None
+    parents_in_law_slugs: [slug or None, ...]  (same order as 'parents_in_law')
+
+None marks a name that couldn't be resolved (no such member, or several equally
+likely ones); readers fall back to the name for those.
+
+Once resolved, a link is kept until the member's own link field is edited (the
+write paths re-resolve it fresh) - a later namesake doesn't make it ambiguous again,
+and renames/deletes of the target are carried over by replace_slug_links().
+
+    python -m data.slug_links                     # migrate everything
+    python -m data.slug_links --dry-run --report ambiguous.csv
+    python -m data.slug_links --fresh             # re-resolve links that are already set
+"""
+import argparse
+import csv
+
+from pymongo import UpdateOne
+
+from data.data_version import bump_members_version
+from data.database import FAMILY_COLLECTION
+from data.member_sync import utc_now
+
+MIGRATION_BATCH_SIZE = 1000
+# Name -> candidates cache kept across batches, cleared past this size
+NAME_CACHE_MAX = 50000
+
+LIST_LINK_FIELDS = {"parents": "parent_slugs", "parents_in_law": "parents_in_law_slugs"}
+SPOUSE_LINK_FIELDS = ("spouse", "spouse_slug")
+LINK_SLUG_FIELDS = list(LIST_LINK_FIELDS.values()) + [SPOUSE_LINK_FIELDS[1]]
+
+_LINK_PROJECTION = {"_id": 0, "slug": 1, "name": 1, "spouse": 1, "parents": 1, "parents_in_law": 1,
+                    **{f: 1 for f in LINK_SLUG_FIELDS}}
+_CANDIDATE_PROJECTION = {"_id": 0, "slug": 1, "name": 1, "spouse": 1}
+
+
+def _names(value):
+    if isinstance(value, str):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [v if isinstance(v, str) else "" for v in value]
+    return []
+
+
+def _pick(doc, name, candidates_by_name, prefer):
+    """(slug or None, problem or None) for one name string."""
+    candidates = [c for c in candidates_by_name.get(name, []) if c.get("slug") and c["slug"] != doc.get("slug")]
+    if len(candidates) == 1:
+        return candidates[0]["slug"], None
+    if not candidates:
+        return None, "not found"
+    preferred = [c for c in candidates if prefer(c)]
+    if len(preferred) == 1:
+        return preferred[0]["slug"], None
+    return None, f"ambiguous ({len(candidates)} members)"
+
+
+def resolve_links(doc, candidates_by_name, fresh=False):
+    """
+    Resolves one member's links.
+
+    Same-name candidates are told apart by their spouse: a parent should be married to
+    the other parent, a spouse should list this member as their spouse. Links already
+    resolved are kept unless 'fresh' (or the name list no longer lines up with them).
+
+    Returns:
+        tuple: ({slug field: value}, [(field, position, name, problem)])
+    """
+    fields, problems = {}, []
+
+    for name_field, slug_field in LIST_LINK_FIELDS.items():
+        names = _names(doc.get(name_field))
+        existing = doc.get(slug_field)
+        if fresh or not isinstance(existing, list) or len(existing) != len(names):
+            existing = [None] * len(names)
+        slugs = []
+        for i, name in enumerate(names):
+            if not name or existing[i]:
+                slugs.append(existing[i] if name else None)
+                continue
+            others = {n for j, n in enumerate(names) if j != i and n}
+            slug, problem = _pick(doc, name, candidates_by_name, lambda c: c.get("spouse") in others)
+            slugs.append(slug)
+            if problem:
+                problems.append((name_field, i, name, problem))
+        fields[slug_field] = slugs
+
+    name_field, slug_field = SPOUSE_LINK_FIELDS
+    spouse = doc.get(name_field)
+    fields[slug_field] = None
+    if isinstance(spouse, str) and spouse and doc.get(slug_field) and not fresh:
+        fields[slug_field] = doc[slug_field]
+    elif isinstance(spouse, str) and spouse:
+        slug, problem = _pick(doc, spouse, candidates_by_name, lambda c: c.get("spouse") == doc.get("name"))
+        fields[slug_field] = slug
+        if problem:
+            problems.append((name_field, 0, spouse, problem))
+
+    return fields, problems
+
+
+def _link_names(doc):
+    names = set(_names(doc.get("parents"))) | set(_names(doc.get("parents_in_law")))
+    if isinstance(doc.get("spouse"), str):
+        names.add(doc["spouse"])
+    names.discard("")
+    return names
+
+
+def migrate_links(collection=FAMILY_COLLECTION, query=None, batch_size=MIGRATION_BATCH_SIZE,
+                  dry_run=False, on_problem=None, fresh=False, changes=None):
+    """
+    Streams members matching 'query' in batches: one $in lookup for the batch's
+    unseen names, one unordered bulk_write for the documents whose links changed.
+
+    Args:
+        on_problem: Called with (slug, field, position, name, problem) for every
+            name that stayed unresolved (the ambiguity report).
+        changes: A list that gets {slug, <link fields>} for every document written.
+
+    Returns:
+        dict: counts of members, updated, resolved, ambiguous and not_found links.
+    """
+    stats = {"members": 0, "updated": 0, "resolved": 0, "ambiguous": 0, "not_found": 0}
+    candidates_by_name = {}
+
+    def flush(batch):
+        missing = list({n for doc in batch for n in _link_names(doc)} - candidates_by_name.keys())
+        if len(candidates_by_name) + len(missing) > NAME_CACHE_MAX:
+            candidates_by_name.clear()
+            missing = list({n for doc in batch for n in _link_names(doc)})
+        for name in missing:
+            candidates_by_name[name] = []
+        if missing:
+            for c in collection.find({"name": {"$in": missing}}, _CANDIDATE_PROJECTION):
+                candidates_by_name[c["name"]].append(c)
+
+        operations = []
+        for doc in batch:
+            fields, problems = resolve_links(doc, candidates_by_name, fresh)
+            stats["resolved"] += sum(1 for f in LIST_LINK_FIELDS.values() for s in fields[f] if s)
+            stats["resolved"] += 1 if fields[SPOUSE_LINK_FIELDS[1]] else 0
+            for field, position, name, problem in problems:
+                stats["not_found" if problem == "not found" else "ambiguous"] += 1
+                if on_problem:
+                    on_problem(doc.get("slug"), field, position, name, problem)
+            if any(doc.get(f) != v for f, v in fields.items()):
+                # updated_at: link rewrites reach other processes through the delta sync too
+                operations.append(UpdateOne({"slug": doc["slug"]}, {"$set": {**fields, "updated_at": utc_now()}}))
+                if changes is not None and not dry_run:
+                    changes.append({"slug": doc["slug"], **fields})
+
+        stats["updated"] += len(operations)
+        if operations and not dry_run:
+            collection.bulk_write(operations, ordered=False)
+
+    batch = []
+    for doc in collection.find(query or {}, _LINK_PROJECTION).batch_size(batch_size):
+        if not doc.get("slug"):
+            continue
+        stats["members"] += 1
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return stats
+
+
+def relink_members(collection, slugs, fresh=False):
+    """
+    Resolves the links of specific members after a write. Pass fresh=True when their
+    own parents/spouse/in-law names were edited.
+
+    Returns:
+        list: {slug, <link fields>} for every member whose links were rewritten.
+    """
+    changes = []
+    slugs = [s for s in slugs if s]
+    if slugs:
+        migrate_links(collection, {"slug": {"$in": slugs}}, fresh=fresh, changes=changes)
+    return changes
+
+
+def relink_named(collection, names):
+    """
+    A member with one of 'names' appeared: members whose links name them and are still
+    unresolved get another try. Returns the rewritten links like relink_members().
+    """
+    changes = []
+    names = [n for n in names if n]
+    if names:
+        migrate_links(collection, {"$or": [{f: {"$in": names}} for f in ("parents", "spouse", "parents_in_law")]},
+                      changes=changes)
+    return changes
+
+
+def replace_slug_links(collection, old_slug, new_slug=None):
+    """
+    Points every link at old_slug to new_slug (slug renamed), or to None (member
+    deleted, readers fall back to the name). One query + one bulk_write.
+
+    Returns:
+        list: {slug, <link fields>} for every member whose links were rewritten.
+    """
+    operations = []
+    changes = []
+    link_query = {"$or": [{f: old_slug} for f in LINK_SLUG_FIELDS]}
+    for doc in collection.find(link_query, {"_id": 0, "slug": 1, **{f: 1 for f in LINK_SLUG_FIELDS}}):
+        update = {}
+        for field in LIST_LINK_FIELDS.values():
+            if isinstance(doc.get(field), list) and old_slug in doc[field]:
+                update[field] = [new_slug if s == old_slug else s for s in doc[field]]
+        if doc.get(SPOUSE_LINK_FIELDS[1]) == old_slug:
+            update[SPOUSE_LINK_FIELDS[1]] = new_slug
+        if update and doc.get("slug"):
+            operations.append(UpdateOne({"slug": doc["slug"]}, {"$set": {**update, "updated_at": utc_now()}}))
+            changes.append({"slug": doc["slug"], **update})
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve name links to slug links on every member.")
+    parser.add_argument("--dry-run", action="store_true", help="Resolve and report, write nothing.")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--report", help="CSV file for unresolved (ambiguous / missing) names.")
+    parser.add_argument("--fresh", action="store_true", help="Re-resolve links that are already set.")
+    args = parser.parse_args(argv)
+
+    report_file = open(args.report, "w", newline="", encoding="utf-8") if args.report else None
+    writer = csv.writer(report_file) if report_file else None
+    if writer:
+        writer.writerow(["slug", "field", "position", "name", "problem"])
+
+    try:
+        stats = migrate_links(
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            on_problem=(lambda *row: writer.writerow(row)) if writer else None,
+            fresh=args.fresh
+        )
+        if stats["updated"] and not args.dry_run:
+            # Shared indexes read the new link fields on their next rebuild
+            bump_members_version()
+    finally:
+        if report_file:
+            report_file.close()
+
+    mode = " (dry run)" if args.dry_run else ""
+    print(f"Members scanned: {stats['members']}{mode}")
+    print(f"Documents updated: {stats['updated']}")
+    print(f"Links resolved: {stats['resolved']}, ambiguous: {stats['ambiguous']}, not found: {stats['not_found']}")
+    if args.report:
+        print(f"Unresolved names written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
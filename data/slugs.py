@@ -0,0 +1,69 @@
+import re
+
+from pymongo import ReturnDocument
+
+from data.database import FAMILY_COLLECTION, SLUG_COUNTERS_COLLECTION
+
+# How many times a writer re-allocates if a slug turns out to be taken anyway
+# (e.g. a row inserted by hand, outside the allocator)
+SLUG_ALLOCATE_RETRIES = 3
+
+
+def slug_base(name):
+    """'Ram Kumar ' -> 'ram-kumar'"""
+    return name.lower().strip().replace(" ", "-")
+
+
+def slug_for_seq(base, seq):
+    """Counter value -> slug. 1 is the bare base, then base-1, base-2 ... (same scheme as before)."""
+    return base if seq <= 1 else f"{base}-{seq - 1}"
+
+
+def slug_fits_base(slug, base):
+    """True if 'slug' is 'base' or 'base-<n>', i.e. it can be kept for a person named 'base'."""
+    return bool(slug) and re.fullmatch(rf"{re.escape(base)}(-\d+)?", slug) is not None
+
+
+def _existing_max_seq(base, collection):
+    """Highest counter value already used for this base by existing slugs (0 if none)."""
+    highest = 0
+    pattern = re.compile(rf"^{re.escape(base)}(?:-(\d+))?$")
+    # Anchored prefix regex, served by the slug index
+    for doc in collection.find({"slug": {"$regex": f"^{re.escape(base)}"}}, {"slug": 1, "_id": 0}):
+        match = pattern.match(doc.get("slug") or "")
+        if match:
+            highest = max(highest, int(match.group(1)) + 1 if match.group(1) else 1)
+    return highest
+
+
+def _next_seq(base):
+    return SLUG_COUNTERS_COLLECTION.find_one_and_update(
+        {"_id": base},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def allocate_slug(name, collection=FAMILY_COLLECTION):
+    """
+    Returns a fresh unique slug for 'name' with one atomic $inc on 'slug_counters'.
+
+    The first time a base is seen, its counter is seeded from the slugs already in
+    'members' ($max, so concurrent seeders agree). After that every call is a single
+    round trip, and two admins saving the same name at once can never get the same slug.
+    """
+    base = slug_base(name)
+    counter = _next_seq(base)
+
+    if not counter.get("seeded"):
+        existing = _existing_max_seq(base, collection)
+        SLUG_COUNTERS_COLLECTION.update_one(
+            {"_id": base},
+            {"$max": {"seq": existing}, "$set": {"seeded": True}}
+        )
+        # A number drawn before seeding may clash with an old slug, draw again past the seed
+        if counter["seq"] <= existing:
+            counter = _next_seq(base)
+
+    return slug_for_seq(base, counter["seq"])
@@ -0,0 +1,257 @@
+"""
+Read-only snapshots: 'members' and 'events' exported to Arrow IPC files.
+
+    python -m data.snapshot export --out snapshot   # writes snapshot/members.arrow + events.arrow
+    python -m data.snapshot info snapshot
+
+Each file carries a version header in its schema metadata (format, members data
+version, export time). With READ_ONLY_SNAPSHOT=<dir> the app serves the
+public pages from the memory-mapped files and never talks to Mongo; the admin
+pages are switched off.
+
+Needs pyarrow (in requirements.txt; only exporting and read-only mode import it).
+"""
+import argparse
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from data.database import EVENTS_COLLECTION, FAMILY_COLLECTION
+
+SNAPSHOT_FORMAT = "1"
+READ_ONLY_SNAPSHOT = os.getenv("READ_ONLY_SNAPSHOT")
+EXPORT_BATCH_SIZE = 10000
+
+# Member fields the public pages read. Link lists keep None holes (positions matter).
+MEMBER_STRING_FIELDS = ["slug", "name", "gender", "spouse", "spouse_slug", "association", "phone", "work"]
+MEMBER_LIST_FIELDS = ["parents", "parents_in_law", "parent_slugs", "parents_in_law_slugs"]
+EVENT_STRING_FIELDS = ["_id", "title", "location", "description", "created_by"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Snapshots need pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _as_str(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return _as_str(value[0]) if value else None
+    return str(value)
+
+
+def _as_str_list(value):
+    if value is None:
+        return None
+    if not isinstance(value, list):
+        value = [value]
+    return [v if isinstance(v, str) or v is None else str(v) for v in value]
+
+
+def _member_schema(pa):
+    fields = [pa.field(f, pa.string()) for f in MEMBER_STRING_FIELDS]
+    fields += [pa.field(f, pa.list_(pa.string())) for f in MEMBER_LIST_FIELDS]
+    fields += [
+        pa.field("lineage", pa.list_(pa.struct([("slug", pa.string()), ("depth", pa.int32())]))),
+        pa.field("generation", pa.int32()),
+    ]
+    return pa.schema(fields)
+
+
+def _event_schema(pa):
+    return pa.schema([pa.field(f, pa.string()) for f in EVENT_STRING_FIELDS] +
+                     [pa.field("date", pa.timestamp("ms"))])
+
+
+def _member_row(doc):
+    row = {f: _as_str(doc.get(f)) for f in MEMBER_STRING_FIELDS}
+    row.update({f: _as_str_list(doc.get(f)) for f in MEMBER_LIST_FIELDS})
+    lineage = doc.get("lineage")
+    row["lineage"] = [{"slug": e.get("slug"), "depth": e.get("depth")} for e in lineage
+                      if isinstance(e, dict)] if isinstance(lineage, list) else None
+    row["generation"] = doc.get("generation") if isinstance(doc.get("generation"), int) else None
+    return row
+
+
+def _event_row(doc):
+    row = {f: _as_str(doc.get(f)) for f in EVENT_STRING_FIELDS}
+    row["date"] = doc.get("date") if isinstance(doc.get("date"), datetime) else None
+    return row
+
+
+def _write_table(pa, path, schema, cursor, to_row, header):
+    """Streams 'cursor' into an Arrow IPC file batch by batch, then swaps it in atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    rows = 0
+    batch = []
+    with pa.OSFile(tmp_path, "wb") as sink:
+        writer = pa.ipc.new_file(sink, schema.with_metadata({"snapshot": json.dumps(header)}))
+        for doc in cursor:
+            batch.append(to_row(doc))
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                rows += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            rows += len(batch)
+        writer.close()
+    os.replace(tmp_path, path)
+    return rows
+
+
+def export_snapshot(out_dir):
+    """
+    Writes members.arrow and events.arrow into out_dir. Both carry the members data
+    version the export started at, so a reader can tell a stale snapshot.
+
+    Returns:
+        dict: the header, plus members/events row counts.
+    """
+    from data.data_version import get_members_version
+
+    pa = _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "members_version": get_members_version(force=True),
+        "exported_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    members = _write_table(pa, os.path.join(out_dir, "members.arrow"), _member_schema(pa),
+                           FAMILY_COLLECTION.find({}).batch_size(EXPORT_BATCH_SIZE), _member_row, header)
+    events = _write_table(pa, os.path.join(out_dir, "events.arrow"), _event_schema(pa),
+                          EVENTS_COLLECTION.find({}).sort("date", 1), _event_row, header)
+    return {**header, "members": members, "events": events}
+
+
+class Snapshot:
+    """
+    A snapshot directory opened with memory mapping: opening costs no parsing,
+    columns are paged in by the OS as they are read. Queries filter and slice the
+    Arrow tables and only turn the rows they return into dicts.
+    """
+
+    def __init__(self, directory):
+        pa = _require_pyarrow()
+        import pyarrow.compute as pc
+        self._pa, self._pc = pa, pc
+        self.directory = directory
+        self.members = self._open(pa, "members.arrow")
+        self.events = self._open(pa, "events.arrow")
+        raw = (self.members.schema.metadata or {}).get(b"snapshot", b"{}")
+        self.header = json.loads(raw)
+        if self.header.get("format") != SNAPSHOT_FORMAT:
+            raise RuntimeError(f"Unsupported snapshot format {self.header.get('format')!r} in {directory}")
+        # The exported live version, prefixed so it can never equal a live one
+        self.version = f"snapshot:{self.header.get('members_version')}"
+        self._dated_events = None
+
+    def _open(self, pa, file_name):
+        source = pa.memory_map(os.path.join(self.directory, file_name), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    @staticmethod
+    def _select(table, projection=None):
+        if projection:
+            wanted = [f for f, on in projection.items() if on and f != "_id" and f in table.column_names]
+            if wanted:
+                return table.select(wanted)
+        return table
+
+    @staticmethod
+    def _docs(table):
+        # Missing fields are left out, like Mongo documents
+        return [{k: v for k, v in row.items() if v is not None} for row in table.to_pylist()]
+
+    def member_docs(self, projection=None):
+        """Every member, for the index builds: converted one record batch at a time."""
+        for batch in self._select(self.members, projection).to_batches(max_chunksize=EXPORT_BATCH_SIZE):
+            yield from self._docs(batch)
+
+    def _events_by_date(self):
+        """Dated events sorted by (date, _id), still an Arrow table."""
+        if self._dated_events is None:
+            dated = self.events.filter(self._pc.is_valid(self.events["date"]))
+            self._dated_events = dated.sort_by([("date", "ascending"), ("_id", "ascending")])
+        return self._dated_events
+
+    def upcoming_events(self, today):
+        """Events from 'today' on, oldest first."""
+        events = self._events_by_date()
+        return self._docs(events.filter(self._pc.greater_equal(events["date"], self._date(today))))
+
+    def past_events(self, today, after=None, limit=None):
+        """
+        Up to 'limit' events before 'today' and before the (date, _id) key 'after',
+        newest first (the events page's keyset archive).
+        """
+        pc = self._pc
+        events = self._events_by_date()
+        mask = pc.less(events["date"], self._date(today))
+        if after is not None:
+            last_date, last_id = self._date(after[0]), after[1]
+            earlier = pc.or_(pc.less(events["date"], last_date),
+                             pc.and_(pc.equal(events["date"], last_date), pc.less(events["_id"], last_id)))
+            mask = pc.and_(mask, earlier)
+        # Sorted ascending, so the newest matches are the tail
+        matches = events.filter(mask)
+        if limit is not None:
+            matches = matches.slice(max(0, matches.num_rows - limit))
+        return self._docs(matches)[::-1]
+
+    def _date(self, value):
+        return self._pa.scalar(value, self._pa.timestamp("ms"))
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def snapshot_active():
+    """True when the app runs read-only from READ_ONLY_SNAPSHOT."""
+    return bool(READ_ONLY_SNAPSHOT)
+
+
+def get_snapshot():
+    global _snapshot
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = Snapshot(READ_ONLY_SNAPSHOT)
+    return _snapshot
+
+
+def scan_members(projection):
+    """Every member with 'projection': from the snapshot in read-only mode (streamed), else from Mongo."""
+    if snapshot_active():
+        return get_snapshot().member_docs(projection)
+    return FAMILY_COLLECTION.find({}, projection)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or inspect read-only snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write members/events to Arrow files.")
+    export.add_argument("--out", default="snapshot", help="Directory to write into.")
+    info = sub.add_parser("info", help="Print a snapshot's header.")
+    info.add_argument("directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        result = export_snapshot(args.out)
+        print(f"Exported {result['members']} members and {result['events']} events "
+              f"(version {result['members_version']}) to {args.out}")
+    else:
+        snapshot = Snapshot(args.directory)
+        print(json.dumps({**snapshot.header, "members": snapshot.members.num_rows,
+                          "events": snapshot.events.num_rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import streamlit as st
 
-from data.database import FAMILY_COLLECTION
+from data.member_picker import render_member_picker
 
 
 def render_search_interface(get_relatives_func):
@@ -10,96 +10,17 @@ def render_search_interface(get_relatives_func):
     """
     st.header("📇 View Member Details")
 
-    # --- 1. Fetch Data (Must include 'slug') ---
-    raw_members = list(FAMILY_COLLECTION.find({}, {
-        "name": 1, 
-        "slug": 1,  # <--- CRITICAL: Fetch Unique ID
-        "association": 1,
-        "parents": 1, 
-        "spouse": 1,
-        "parents_in_law": 1,
-        "gender": 1,
-        "_id": 0
-    }).sort("name", 1))
-
-    # --- 2. Build Labels ---
-    # Map: "Display Label" -> "Unique Slug"
-    label_to_slug_map = {}
-    display_options = []
-
-    for m in raw_members:
-        name = m.get('name')
-        slug = m.get('slug') # Unique ID
-        
-        # If no slug exists (old data), fall back to name, but warn internally
-        if not slug: 
-            slug = name 
-
-        assoc = str(m.get('association', '')).lower().strip()
-        
-        # Helpers
-        def get_first(field):
-            val = m.get(field)
-            if isinstance(val, list) and val: return val[0]
-            if isinstance(val, str): return val
-            return None
-
-        spouse_name = get_first('spouse')
-        father_name = get_first('parents')
-        father_in_law_name = get_first("parents_in_law")
-        
-        relation_suffix = ""
-
-        # --- LOGIC START (Same as your logic) ---
-        if "daughter-in-law" in assoc:
-            if father_in_law_name:
-                 relation_suffix = f"(d/o-in-law of {father_in_law_name})"
-            else:
-                relation_suffix = f"(w/o {spouse_name})"
-
-        elif "son-in-law" in assoc:
-            if father_in_law_name: 
-                relation_suffix = f"(s/o-in-law of {father_in_law_name})"
-            elif spouse_name:
-                relation_suffix = f"(h/o {spouse_name})"
-
-        else:
-            if father_name:
-                if "daughter" in assoc or "beti" in assoc or "female" in str(m.get('gender','')).lower():
-                    prefix = "d/o"
-                else:
-                    prefix = "s/o"
-                relation_suffix = f"({prefix} {father_name})"
-            
-            elif spouse_name:
-                 prefix = "w/o" if "female" in str(m.get('gender','')).lower() else "h/o"
-                 relation_suffix = f"({prefix} {spouse_name})"
-        # --- LOGIC END ---
-
-        full_label = f"{name} {relation_suffix}".strip()
-        
-        # Add to list and map
-        display_options.append(full_label)
-        label_to_slug_map[full_label] = slug  # Store SLUG here, not name
-
-    # --- 3. Render Widget ---
-    selected_label_list = st.multiselect(
-        "Search Family Member",
-        options=display_options,
-        placeholder="Type to search...",
-        max_selections=1,
-        label_visibility="collapsed"
-    )
-
-    # --- 4. Handle Selection ---
-    if selected_label_list:
-        label_selected = selected_label_list[0]
-        
-        # Retrieve the SLUG
-        selected_slug = label_to_slug_map[label_selected]
+    # --- 1. Typeahead Search (matched server-side, returns the SLUG) ---
+    selected_slug = render_member_picker("search_member")
 
+    # --- 2. Handle Selection ---
+    if selected_slug:
         with st.spinner(f"Fetching details..."):
-            results = get_relatives_func(selected_slug)
+            try:
+                results = get_relatives_func(selected_slug)
+            except TimeoutError:
+                st.error("The database is slow to answer right now, please try again.")
+                return
 
         if results:
             _display_family_results(results)
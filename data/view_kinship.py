@@ -0,0 +1,50 @@
+import streamlit as st
+
+from data.member_picker import render_member_picker
+from handlers.kinship import get_kinship_index
+
+
+def render_kinship_view():
+    """
+    "How is A related to B?" - two member pickers and the named relation,
+    with the chain of people that connects them.
+    """
+    st.header("🧬 How Are They Related?")
+
+    # --- 1. Pick Two People ---
+    c1, c2 = st.columns(2)
+    with c1:
+        st.caption("Person A")
+        slug_a = render_member_picker("kinship_a", placeholder="First person...")
+    with c2:
+        st.caption("Person B")
+        slug_b = render_member_picker("kinship_b", placeholder="Second person...")
+
+    if not (slug_a and slug_b):
+        st.info("Pick two members to see how they are related.")
+        return
+
+    # --- 2. Compute (logarithmic per query once the index is built) ---
+    with st.spinner("Working out the relation..."):
+        index = get_kinship_index()
+        result = index.relation(slug_a, slug_b)
+
+    if result is None:
+        st.error("Could not find one of the selected members.")
+        return
+
+    name_a, name_b = index.name_of(slug_a), index.name_of(slug_b)
+
+    # --- 3. Show Result ---
+    if result['kind'] == "none":
+        st.warning(f"No relation found between **{name_a}** and **{name_b}** in the recorded family lines.")
+        return
+
+    hindi = f" ({result['hindi']})" if result['hindi'] else ""
+    st.success(f"**{name_a}** is **{name_b}**'s **{result['relation']}**{hindi}")
+
+    if result['common_ancestor'] and result['kind'] != "self":
+        st.caption(f"Common ancestor: **{index.name_of(result['common_ancestor'])}**")
+
+    if len(result['path']) > 1:
+        st.markdown("**Path:** " + " → ".join(index.name_of(s) for s in result['path']))
@@ -1,89 +1,102 @@
 import streamlit as st
-from handlers.graph_handlers import render_focused_tree
+
+from data.data_version import get_members_version
+from data.member_picker import render_member_picker
+from handlers.graph_handlers import (TREE_ENGINE, TREE_GENERATIONS_DOWN,
+                                     TREE_GENERATIONS_UP, TREE_MAX_DEPTH,
+                                     TREE_MAX_NODES, TREE_STYLE,
+                                     render_focused_tree_from_db,
+                                     render_focused_tree_from_lineage,
+                                     render_focused_tree_shared)
+from handlers.label_index import get_label_index
+from handlers.tree_cache import get_or_render_tree
 
 def render_tree_view(collection, _): 
     st.header("🌳 View Family Tree")
 
-    # --- 1. Fetch Data & Build Labels (Same logic as Search Tab) ---
-    raw_members = list(collection.find({}, {
-        "name": 1, 
-        "association": 1,
-        "parents": 1, 
-        "spouse": 1,
-        "gender": 1,
-        "_id": 0
-    }).sort("name", 1))
-
-    name_map = {}
-    display_options = []
-
-    for m in raw_members:
-        name = m.get('name', 'Unknown')
-        assoc = str(m.get('association', '')).lower().strip()
-        
-        def get_first(field):
-            val = m.get(field)
-            if isinstance(val, list) and val: return val[0]
-            if isinstance(val, str): return val
-            return None
+    # --- 1. Typeahead Search (same picker as the Search Tab) ---
+    center_slug = render_member_picker("tree_member", placeholder="Type name to generate tree...")
 
-        spouse_name = get_first('spouse')
-        father_name = get_first('parents')
-        
-        relation_suffix = ""
+    # --- 2. Handle Selection & Generate Graph ---
+    if center_slug:
+        real_name = get_label_index().get_name(center_slug)
+        if not real_name:
+            st.warning("This member was just updated, please search again.")
+            return
 
-        # LOGIC: Association-based context
-        if "daughter-in-law" in assoc or "bahu" in assoc:
-            if spouse_name: relation_suffix = f"(w/o {spouse_name})"
-            elif father_name: relation_suffix = f"(d/o-in-law of {father_name})"
+        # --- 3. View Window (keeps layout cost bounded for any focus person) ---
+        with st.expander("⚙️ Tree size", expanded=False):
+            o1, o2, o3 = st.columns(3)
+            with o1:
+                gens_up = st.number_input("Generations up", 0, 50, TREE_GENERATIONS_UP, key="tree_gens_up")
+            with o2:
+                gens_down = st.number_input("Generations down", 0, 50, TREE_GENERATIONS_DOWN, key="tree_gens_down")
+            with o3:
+                max_nodes = st.number_input("Max people", 10, 2000, TREE_MAX_NODES, step=10, key="tree_max_nodes")
 
-        elif "son-in-law" in assoc or "damad" in assoc:
-            if father_name: relation_suffix = f"(s/o-in-law of {father_name})"
-            elif spouse_name: relation_suffix = f"(h/o {spouse_name})"
+        # Branches opened with "+N more", (anchor, direction) remembered per focus person
+        expanded = st.session_state.setdefault('tree_expanded', {}).setdefault(center_slug, [])
+        limits = {"up": gens_up, "down": gens_down, "max_nodes": max_nodes, "expanded": sorted(expanded)}
 
-        else: # Son/Daughter/Default
-            if father_name:
-                # Decide s/o vs d/o
-                is_female = "daughter" in assoc or "female" in str(m.get('gender','')).lower()
-                prefix = "d/o" if is_female else "s/o"
-                relation_suffix = f"({prefix} {father_name})"
-            elif spouse_name:
-                 is_female = "female" in str(m.get('gender','')).lower()
-                 prefix = "w/o" if is_female else "h/o"
-                 relation_suffix = f"({prefix} {spouse_name})"
+        # Mongo only needs to walk as deep as the window can reach
+        query_depth = max(gens_up, gens_down) + len(expanded)
+        if TREE_MAX_DEPTH is not None:
+            query_depth = min(query_depth, TREE_MAX_DEPTH)
 
-        full_label = f"{name} {relation_suffix}".strip()
-        display_options.append(full_label)
-        name_map[full_label] = name
+        # Everything that changes the picture is part of the cache key
+        style = {**TREE_STYLE, "engine": TREE_ENGINE, "max_depth": query_depth, **limits}
 
-    # --- 2. Render Search Widget ---
-    # We remove the columns/button layout and use the cleaner multiselect approach
-    
-    selected_label_list = st.multiselect(
-        "Search Family Member to Generate Tree",
-        options=display_options,
-        placeholder="Type name to generate tree...",
-        max_selections=1,
-        label_visibility="collapsed"
-    )
+        def build_dot():
+            if TREE_ENGINE == "networkx":
+                # Graph is built once per data version and shared across sessions
+                return render_focused_tree_shared(real_name, TREE_STYLE, limits)
+            if TREE_ENGINE == "lineage":
+                # Materialized ancestor paths: one read up, one indexed query down
+                return render_focused_tree_from_lineage(collection, real_name, query_depth, TREE_STYLE,
+                                                        limits, center_slug=center_slug)
+            # Only the relevant subtree leaves the database
+            return render_focused_tree_from_db(collection, real_name, query_depth, TREE_STYLE, limits,
+                                               center_slug=center_slug)
 
-    # --- 3. Handle Selection & Generate Graph ---
-    if selected_label_list:
-        label_selected = selected_label_list[0]
-        real_name = name_map[label_selected]
-        
-        # We need the full list for the recursive graph logic
-        # (Already fetched in 'raw_members' but graph handler might need clean dicts)
-        # Re-using raw_members is fine if render_focused_tree expects list of dicts.
-        
         with st.spinner(f"Tracing lineage for {real_name}..."):
-            # Note: raw_members only has partial fields (projection). 
-            # If render_focused_tree needs ALL fields, fetch full collection again:
-            full_data_for_graph = list(collection.find({}, {"_id": 0}))
+            # Repeat views of the same person skip traversal AND layout
+            rendered = get_or_render_tree(center_slug, get_members_version(), style, build_dot)
             
-            graph = render_focused_tree(full_data_for_graph, real_name)
-            
-            if graph:
-                st.graphviz_chart(graph, use_container_width=True)
+            if rendered and rendered["svg"]:
+                svg = rendered["svg"].replace("\n", " ")
+                st.markdown(f'<div style="overflow:auto; text-align:center;">{svg}</div>', unsafe_allow_html=True)
+            elif rendered:
+                # No graphviz binary on the server: let the browser lay it out
+                st.graphviz_chart(rendered["dot"], use_container_width=True)
             else:
                 st.warning(f"Could not generate tree for {real_name}.")
+                return
+
+        # --- 4. Expand Truncated Branches On Demand ---
+        stubs = rendered.get("stubs") or []
+        if stubs or expanded:
+            # Keyed by (anchor, direction): the center can have a stub both ways
+            stub_labels = {
+                (stub['anchor'], stub['direction']):
+                    f"+{len(stub['hidden'])} more {'above' if stub['direction'] == 'up' else 'below'} {stub['anchor']}"
+                for stub in stubs
+            }
+            e1, e2, e3 = st.columns([3, 1, 1])
+            with e1:
+                to_expand = st.selectbox(
+                    "Hidden branches",
+                    options=list(stub_labels),
+                    format_func=lambda stub: stub_labels[stub],
+                    index=None,
+                    placeholder=f"{len(stubs)} hidden branch(es), pick one to expand...",
+                    key=f"tree_stub_{center_slug}",
+                    label_visibility="collapsed"
+                )
+            with e2:
+                if st.button("➕ Expand", use_container_width=True, disabled=not to_expand):
+                    expanded.append(to_expand)
+                    st.rerun()
+            with e3:
+                if st.button("➖ Collapse all", use_container_width=True, disabled=not expanded):
+                    expanded.clear()
+                    st.rerun()
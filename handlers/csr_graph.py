@@ -0,0 +1,311 @@
+"""
+Compact parent/child graph: member names interned to int ids, edges stored twice as
+CSR arrays (children of each node, parents of each node), ancestors/descendants by a
+frontier-at-a-time BFS in NumPy.
+
+Drop-in for the parts of nx.DiGraph the tree code uses: `name in G`,
+G.predecessors(name), G.successors(name), plus ancestors()/descendants() with the
+same results as nx.ancestors/nx.descendants (node order included).
+"""
+import threading
+
+import numpy as np
+
+# Frontiers up to this size are handled with plain slices and a set: most family
+# walks are a few people per generation, where NumPy's per-call overhead dominates.
+SMALL_FRONTIER = 32
+
+
+def _gather(indptr, indices, frontier):
+    """All neighbours of the ids in 'frontier' in one vectorized slice-concatenation."""
+    if frontier.size <= SMALL_FRONTIER:
+        # A few slices are cheaper than the vectorized bookkeeping below
+        bounds = zip(indptr[frontier].tolist(), indptr[frontier + 1].tolist())
+        return np.concatenate([indices[a:b] for a, b in bounds])
+    starts = indptr[frontier]
+    lengths = indptr[frontier + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return indices[:0]
+    # Position k of the output reads indices[starts[i] + (k - offset of i)]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return indices[offsets + np.arange(total)]
+
+
+def _dedupe(ids):
+    if ids.size <= SMALL_FRONTIER:
+        return np.fromiter(set(ids.tolist()), dtype=ids.dtype)
+    return np.unique(ids)
+
+
+def _csr(n, sources, targets):
+    """
+    Row 'u' lists the targets of u's edges in insertion order (a stable sort keeps it,
+    which is what makes predecessors/successors order match networkx).
+    """
+    order = np.argsort(sources, kind="stable")
+    indices = targets[order].astype(np.int32)
+    counts = np.bincount(sources, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+def _grow(indptr, n):
+    """indptr extended with empty rows up to n nodes."""
+    missing = n - (len(indptr) - 1)
+    if missing <= 0:
+        return indptr
+    return np.concatenate([indptr, np.full(missing, indptr[-1], dtype=indptr.dtype)])
+
+
+def _splice_out(indptr, indices, pairs):
+    """Drops the (row, col) entries in 'pairs' that exist."""
+    drop = []
+    counts = np.diff(indptr)
+    for row, col in pairs:
+        hits = np.flatnonzero(indices[indptr[row]:indptr[row + 1]] == col)
+        if hits.size:
+            drop.append(indptr[row] + hits[0])
+            counts[row] -= 1
+    if not drop:
+        return indptr, indices
+    indptr = np.zeros_like(indptr)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, np.delete(indices, drop)
+
+
+def _splice_in(indptr, indices, pairs):
+    """Appends 'col' at the end of 'row' for every (row, col) in 'pairs', in order."""
+    if not pairs:
+        return indptr, indices
+    rows = np.array([row for row, _ in pairs], dtype=np.int64)
+    cols = np.array([col for _, col in pairs], dtype=indices.dtype)
+    # Empty rows share an insert position: sorted by row, np.insert keeps them apart
+    order = np.argsort(rows, kind="stable")
+    rows, cols = rows[order], cols[order]
+    indices = np.insert(indices, indptr[rows + 1], cols)
+    counts = np.diff(indptr) + np.bincount(rows, minlength=len(indptr) - 1)
+    indptr = np.zeros_like(indptr)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+class CSRGraph:
+    """
+    Directed parent -> child graph.
+
+    Attributes:
+        names: id -> name, in the order networkx would have added the nodes.
+        ids: name -> id, for the nodes currently in the graph.
+        arrays: (child_ptr, child_idx, parent_ptr, parent_idx), CSR of children and of
+            parents per id. Replaced as one tuple, so a reader never mixes two versions.
+
+    Edits (add_edge/remove_edge/add_node/remove_node, the nx.DiGraph names) are queued
+    and land in the arrays on refresh(), one vectorized rebuild per batch of edits.
+    """
+
+    def __init__(self, names, edges):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        if edges:
+            sources, targets = (np.fromiter(col, dtype=np.int64, count=len(edges)) for col in zip(*edges))
+        else:
+            sources = targets = np.zeros(0, dtype=np.int64)
+        self.arrays = self._build_arrays(len(names), sources, targets)
+        self._added = {}
+        self._removed = set()
+        # One visited mask per thread, cleared after each walk instead of reallocated
+        self._local = threading.local()
+
+    def copy(self):
+        """
+        A graph to edit while readers keep using this one: the name tables are copied,
+        the arrays shared (refresh() replaces them, it never writes into them).
+        """
+        new = object.__new__(CSRGraph)
+        new.names = list(self.names)
+        new.ids = dict(self.ids)
+        new.arrays = self.arrays
+        new._added = dict(self._added)
+        new._removed = set(self._removed)
+        new._local = threading.local()
+        return new
+
+    @staticmethod
+    def _build_arrays(n, sources, targets):
+        return _csr(n, sources, targets) + _csr(n, targets, sources)
+
+    @classmethod
+    def from_members(cls, members):
+        """Same nodes and edges FamilyGraph adds: every named member, an edge per listed parent."""
+        ids = {}
+        names = []
+        edges = {}
+
+        def intern(name):
+            i = ids.get(name)
+            if i is None:
+                i = ids[name] = len(names)
+                names.append(name)
+            return i
+
+        for person in members:
+            name = person.get('name')
+            if not name:
+                continue
+            child = intern(name)
+            parents = person.get('parents', [])
+            if isinstance(parents, str):
+                parents = [parents]
+            for parent in parents:
+                if parent:
+                    # dict keeps the first insertion, like DiGraph ignoring a repeated edge
+                    edges.setdefault((intern(parent), child), None)
+        return cls(names, list(edges))
+
+    @property
+    def child_ptr(self):
+        return self.arrays[0]
+
+    @property
+    def child_idx(self):
+        return self.arrays[1]
+
+    @property
+    def parent_ptr(self):
+        return self.arrays[2]
+
+    @property
+    def parent_idx(self):
+        return self.arrays[3]
+
+    @property
+    def edge_count(self):
+        return len(self.arrays[1])
+
+    @property
+    def nodes(self):
+        return list(self.ids)
+
+    @property
+    def edges(self):
+        """[(parent, child)] names, as of the last refresh()."""
+        child_ptr, child_idx = self.arrays[:2]
+        sources = np.repeat(np.arange(len(child_ptr) - 1), np.diff(child_ptr))
+        return [(self.names[u], self.names[v]) for u, v in zip(sources.tolist(), child_idx.tolist())]
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- Edits ---
+    def add_node(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            # A removed name comes back under a new id, the old slot just stays empty
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def remove_node(self, name):
+        """Only for nodes whose edges are already removed (FamilyGraph guarantees it)."""
+        self.ids.pop(name, None)
+
+    def add_edge(self, parent, child):
+        key = (self.add_node(parent), self.add_node(child))
+        if key in self._removed:
+            self._removed.discard(key)
+        else:
+            self._added[key] = None
+
+    def remove_edge(self, parent, child):
+        key = (self.ids.get(parent), self.ids.get(child))
+        if None in key:
+            return
+        self._added.pop(key, None)
+        self._removed.add(key)
+
+    def refresh(self):
+        """
+        Applies the queued edits by splicing them into the arrays: O(edges) copying
+        for the whole batch, no re-sort, so the existing neighbour order is kept and
+        new edges come last in their row like in nx.DiGraph.
+        """
+        if not self._added and not self._removed:
+            return
+        n = len(self.names)
+        child_ptr, child_idx, parent_ptr, parent_idx = self.arrays
+        child_ptr, parent_ptr = _grow(child_ptr, n), _grow(parent_ptr, n)
+
+        removed = list(self._removed)
+        child_ptr, child_idx = _splice_out(child_ptr, child_idx, removed)
+        parent_ptr, parent_idx = _splice_out(parent_ptr, parent_idx, [(v, u) for u, v in removed])
+
+        added = [(u, v) for u, v in self._added
+                 if not (child_idx[child_ptr[u]:child_ptr[u + 1]] == v).any()]
+        child_ptr, child_idx = _splice_in(child_ptr, child_idx, added)
+        parent_ptr, parent_idx = _splice_in(parent_ptr, parent_idx, [(v, u) for u, v in added])
+
+        self.arrays = (child_ptr, child_idx, parent_ptr, parent_idx)
+        self._added = {}
+        self._removed = set()
+
+    # --- Reads ---
+    def _neighbours(self, indptr, indices, name):
+        i = self.ids.get(name)
+        if i is None or i >= len(indptr) - 1:
+            # Unknown, or added by an edit that isn't refreshed yet
+            return []
+        return [self.names[j] for j in indices[indptr[i]:indptr[i + 1]]]
+
+    def predecessors(self, name):
+        _, _, parent_ptr, parent_idx = self.arrays
+        return iter(self._neighbours(parent_ptr, parent_idx, name))
+
+    def successors(self, name):
+        child_ptr, child_idx = self.arrays[:2]
+        return iter(self._neighbours(child_ptr, child_idx, name))
+
+    def _reach(self, indptr, indices, name):
+        """Ids reachable from 'name' (not counting itself), one generation per NumPy step."""
+        start = self.ids[name]
+        n = len(indptr) - 1
+        if start >= n:
+            return indices[:0]
+        seen = getattr(self._local, "seen", None)
+        if seen is None or len(seen) < n:
+            seen = self._local.seen = np.zeros(n, dtype=bool)
+        seen[start] = True
+        frontier = np.array([start], dtype=np.int64)
+        found = []
+        try:
+            while frontier.size:
+                nxt = _gather(indptr, indices, frontier)
+                nxt = nxt[~seen[nxt]]
+                if nxt.size > 1:
+                    nxt = _dedupe(nxt)
+                seen[nxt] = True
+                found.append(nxt)
+                frontier = nxt
+        finally:
+            seen[start] = False
+            for ids in found:
+                seen[ids] = False
+        reached = np.concatenate(found)
+        return reached[reached != start]
+
+    def ancestors(self, name):
+        """Like nx.ancestors: a set of names. Raises KeyError for an unknown name."""
+        _, _, parent_ptr, parent_idx = self.arrays
+        return {self.names[i] for i in self._reach(parent_ptr, parent_idx, name)}
+
+    def descendants(self, name):
+        child_ptr, child_idx = self.arrays[:2]
+        return {self.names[i] for i in self._reach(child_ptr, child_idx, name)}
+
+    def nbytes(self):
+        """Memory held by the NumPy arrays (the name table is extra)."""
+        return sum(a.nbytes for a in self.arrays)
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from data.snapshot import get_snapshot, snapshot_active
+
+# Inserts made by another server process show up after at most this long
+EVENTS_FEED_TTL_SECONDS = int(os.getenv("EVENTS_FEED_TTL_SECONDS", "900"))
+EVENTS_PAGE_SIZE = int(os.getenv("EVENTS_PAGE_SIZE", "10"))
+
+
+def start_of_day(now=None):
+    return (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class EventsFeed:
+    """
+    Process-wide cache of the events page.
+
+    - upcoming: every event from today on, sorted by date. Loaded once per day
+      boundary (or TTL), then paged in memory.
+    - archive: past events, newest first, fetched one keyset page at a time from the
+      date index and kept until the day changes.
+
+    invalidate() drops both, call it after any write to 'events'.
+    """
+
+    def __init__(self, collection, ttl_seconds=EVENTS_FEED_TTL_SECONDS):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._day = None
+        self._loaded_at = 0.0
+        self._upcoming = None
+        self._archive_pages = {}
+
+    def _reset_if_stale(self, day):
+        """Caller holds the lock."""
+        expired = time.monotonic() - self._loaded_at > self.ttl_seconds
+        if day != self._day or expired:
+            self._day = day
+            self._loaded_at = time.monotonic()
+            self._upcoming = None
+            self._archive_pages = {}
+
+    def invalidate(self):
+        with self._lock:
+            self._day = None
+
+    def upcoming(self, today=None):
+        today = today or start_of_day()
+        with self._lock:
+            self._reset_if_stale(today)
+            if self._upcoming is None:
+                self._upcoming = self._fetch_upcoming(today)
+            return self._upcoming
+
+    def _fetch_upcoming(self, today):
+        return list(self.collection.find({"date": {"$gte": today}}).sort("date", 1))
+
+    def upcoming_page(self, page, page_size=EVENTS_PAGE_SIZE, today=None):
+        """Returns (events on 0-based 'page', total upcoming events)."""
+        events = self.upcoming(today)
+        start = page * page_size
+        return events[start:start + page_size], len(events)
+
+    def archive_page(self, after=None, page_size=EVENTS_PAGE_SIZE, today=None):
+        """
+        Past events, newest first. 'after' is the (date, _id) of the previous page's
+        last event (None for the first page).
+
+        Returns:
+            (list, tuple or None): the events and the 'after' key for the next page.
+        """
+        today = today or start_of_day()
+        cache_key = (after, page_size)
+        with self._lock:
+            self._reset_if_stale(today)
+            if cache_key in self._archive_pages:
+                return self._archive_pages[cache_key]
+
+        rows = self._fetch_archive(today, after, page_size + 1)
+        events = rows[:page_size]
+        next_key = (events[-1]['date'], events[-1]['_id']) if len(rows) > page_size else None
+
+        with self._lock:
+            if self._day == today:
+                self._archive_pages[cache_key] = (events, next_key)
+        return events, next_key
+
+    def _fetch_archive(self, today, after, limit):
+        """Up to 'limit' events before today and after the (date, _id) key, newest first."""
+        query = {"date": {"$lt": today}}
+        if after is not None:
+            last_date, last_id = after
+            query = {"$and": [query, {"$or": [
+                {"date": {"$lt": last_date}},
+                {"date": last_date, "_id": {"$lt": last_id}}
+            ]}]}
+        return list(self.collection.find(query).sort([("date", -1), ("_id", -1)]).limit(limit))
+
+
+class SnapshotEventsFeed(EventsFeed):
+    """The same feed over the events of a read-only snapshot, filtered in Arrow."""
+
+    def __init__(self, snapshot):
+        super().__init__(collection=None)
+        self.snapshot = snapshot
+
+    def _fetch_upcoming(self, today):
+        return self.snapshot.upcoming_events(today)
+
+    def _fetch_archive(self, today, after, limit):
+        return self.snapshot.past_events(today, after, limit)
+
+
+_FEEDS = {}
+_FEEDS_LOCK = threading.Lock()
+
+
+def get_events_feed(collection):
+    """One shared feed per events collection (served from the snapshot in read-only mode)."""
+    with _FEEDS_LOCK:
+        if snapshot_active():
+            feed = _FEEDS.get("snapshot")
+            if feed is None:
+                feed = _FEEDS["snapshot"] = SnapshotEventsFeed(get_snapshot())
+            return feed
+        feed = _FEEDS.get(collection.name)
+        if feed is None:
+            feed = _FEEDS[collection.name] = EventsFeed(collection)
+        return feed
+
+
+def invalidate_events_feed(collection):
+    get_events_feed(collection).invalidate()
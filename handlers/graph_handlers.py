@@ -1,61 +1,626 @@
+import bisect
+import heapq
+import os
+
 import graphviz
 import streamlit as st
 import networkx as nx
+import numpy as np
+
+from data.data_version import VersionedResource
+from data.snapshot import scan_members, snapshot_active
+from handlers.csr_graph import CSRGraph
+from handlers.lineage import get_ancestors, get_descendants
+
+# Fields the tree renderer reads from each member
+TREE_FIELDS = ["name", "parents", "spouse", "gender", "association"]
+# Hole left in FamilyGraph.spouse_pairs by a removed member ("" is never a node)
+_NO_PAIR = ("", "")
+
+# "networkx" (default): walk the shared in-memory FamilyGraph, built once per data version
+# and patched on writes, so a tree costs no Mongo round trip.
+# "graphlookup": walk the tree inside Mongo ($graphLookup), for processes that can't hold
+# the graph. "lineage": read the materialized ancestor paths (see handlers/lineage.py).
+TREE_ENGINE = os.getenv("TREE_ENGINE", "networkx").lower()
+if snapshot_active():
+    # Read-only snapshot: the in-memory graph is the only engine that doesn't need Mongo
+    TREE_ENGINE = "networkx"
+# Structure behind the in-memory FamilyGraph: "csr" (int ids + NumPy arrays, see
+# handlers/csr_graph.py) or "networkx" (the original nx.DiGraph of name strings).
+TREE_GRAPH_BACKEND = os.getenv("TREE_GRAPH_BACKEND", "csr").lower()
+# Generations to follow up/down with the graphlookup engine (unset = unlimited)
+TREE_MAX_DEPTH = int(os.getenv("TREE_MAX_DEPTH")) if os.getenv("TREE_MAX_DEPTH") else None
+
+# Graph-level layout options (part of the rendered-tree cache key)
+TREE_STYLE = {"rankdir": "TB", "splines": "ortho", "nodesep": "0.6", "ranksep": "0.8"}
+
+# Default view window: generations above/below the focus person and a people budget.
+# Keeps graphviz layout cost bounded even for founders near the root.
+TREE_GENERATIONS_UP = int(os.getenv("TREE_GENERATIONS_UP", "3"))
+TREE_GENERATIONS_DOWN = int(os.getenv("TREE_GENERATIONS_DOWN", "3"))
+TREE_MAX_NODES = int(os.getenv("TREE_MAX_NODES", "150"))
+
+
+class FamilyGraph:
+    """
+    The parts of get_focused_subgraph that only depend on the data:
+    the parent->child graph plus the name/person lookup maps.
+    Built once per data version and shared by every session (see get_family_graph),
+    then kept current by apply_change() on every write instead of being rebuilt.
+    apply_change() runs on a copy(), the shared graph is swapped for it afterwards.
+
+    G is a CSRGraph or an nx.DiGraph (TREE_GRAPH_BACKEND); both answer
+    `name in G`, G.predecessors() and G.successors() the same way.
+    """
+
+    def __init__(self, full_data, backend=None):
+        self.backend = (backend or TREE_GRAPH_BACKEND).lower()
+        self.G = CSRGraph.from_members(full_data) if self.backend == "csr" else nx.DiGraph()
+        self.name_map = {p['name'].lower(): p['name'] for p in full_data if 'name' in p}
+
+        # Build person lookup map
+        self.person_map = {p['name'].lower(): p for p in full_data if 'name' in p}
+
+        # (name, spouse) per member in data order, that's the order the spouse pass walks.
+        # Members without a spouse hold _NO_PAIR, so a member's slot is its data position.
+        self.spouse_pairs = []
+
+        for person in full_data:
+            name = person.get('name')
+            self.spouse_pairs.append((name, person['spouse']) if name and person.get('spouse') else _NO_PAIR)
+            if not name: continue
+            if self.backend != "csr":
+                self.G.add_node(name)
+                for parent in _parents_of(person):
+                    self.G.add_edge(parent, name)
+
+        # name -> positions of its pairs in spouse_pairs
+        self.spouse_positions = {}
+        for pos, (name, _) in enumerate(self.spouse_pairs):
+            if name:
+                self.spouse_positions.setdefault(name, []).append(pos)
+
+        # What apply_change() needs, only worked out on the first write
+        self._source = full_data
+        self._docs = None
+
+    # --- Incremental updates (see handlers/member_events.py) ---
+    def copy(self):
+        """
+        A graph to patch while readers keep using this one. Maps are copied; the
+        lists inside them are shared, and the patch helpers replace them instead of
+        changing them.
+        """
+        new = object.__new__(FamilyGraph)
+        new.backend = self.backend
+        new.G = self.G.copy()
+        new.name_map = dict(self.name_map)
+        new.person_map = dict(self.person_map)
+        new.spouse_pairs = list(self.spouse_pairs)
+        new.spouse_positions = dict(self.spouse_positions)
+        new._source = self._source
+        new._docs = None
+        if self._docs is not None:
+            new._docs = dict(self._docs)
+            new._order = dict(self._order)
+            new._namesakes = dict(self._namesakes)
+            new._by_lower = dict(self._by_lower)
+            new._out_degree = dict(self._out_degree)
+        return new
+
+    def _prepare_patching(self):
+        """Per-member bookkeeping for apply_change(). One pass over the build's docs."""
+        self._docs = {}          # key (slug, or name for old data) -> doc
+        self._order = {}         # key -> position in data order
+        self._namesakes = {}     # name -> [keys]
+        self._by_lower = {}      # lower-case name -> [(position, key)], person_map takes the last
+        for seq, person in enumerate(self._source):
+            name = person.get('name')
+            if not name: continue
+            key = person.get('slug') or name
+            self._docs[key] = person
+            self._order[key] = seq
+            self._namesakes.setdefault(name, []).append(key)
+            self._by_lower.setdefault(name.lower(), []).append((seq, key))
+        self._source = None
+
+        # parent name -> number of distinct children edges, a parent stays a node while > 0
+        if self.backend == "csr":
+            degrees = np.diff(self.G.child_ptr).tolist()
+            self._out_degree = {name: degrees[i] for name, i in self.G.ids.items() if degrees[i]}
+        else:
+            self._out_degree = {name: d for name, d in self.G.out_degree() if d}
+
+    def _lists_parent(self, name, parent):
+        return any(parent in _parents_of(self._docs[k]) for k in self._namesakes.get(name, ()))
+
+    def _sync_nodes(self, names):
+        """A name is a node while a member has it or a member lists it as a parent."""
+        for name in names:
+            present = name in self._namesakes or self._out_degree.get(name, 0) > 0
+            if present and name not in self.G:
+                self.G.add_node(name)
+            elif not present and name in self.G:
+                self.G.remove_node(name)
+
+    def _sync_lower(self, lower):
+        entries = self._by_lower.get(lower)
+        if entries:
+            doc = self._docs[entries[-1][1]]
+            self.person_map[lower] = doc
+            self.name_map[lower] = doc['name']
+        else:
+            self.person_map.pop(lower, None)
+            self.name_map.pop(lower, None)
+
+    def _set_pair(self, pos, pair):
+        old = self.spouse_pairs[pos]
+        if old is not _NO_PAIR:
+            positions = [p for p in self.spouse_positions[old[0]] if p != pos]
+            if positions:
+                self.spouse_positions[old[0]] = positions
+            else:
+                del self.spouse_positions[old[0]]
+        self.spouse_pairs[pos] = pair or _NO_PAIR
+        if pair:
+            positions = list(self.spouse_positions.get(pair[0], ()))
+            bisect.insort(positions, pos)
+            self.spouse_positions[pair[0]] = positions
+
+    def _detach(self, key):
+        """Takes one member out. Returns its data position, for re-adding it in place."""
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return None
+        seq = self._order.pop(key)
+        name = doc['name']
+        # Lists are replaced, not changed: they may be shared with the live graph (copy())
+        namesakes = [k for k in self._namesakes[name] if k != key]
+        if namesakes:
+            self._namesakes[name] = namesakes
+        else:
+            del self._namesakes[name]
+        same_lower = [e for e in self._by_lower[name.lower()] if e != (seq, key)]
+        if same_lower:
+            self._by_lower[name.lower()] = same_lower
+        else:
+            del self._by_lower[name.lower()]
+        self._sync_lower(name.lower())
+
+        parents = list(dict.fromkeys(_parents_of(doc)))
+        for parent in parents:
+            # A namesake may still list the same parent: the edge stays then
+            if not self._lists_parent(name, parent):
+                self.G.remove_edge(parent, name)
+                self._out_degree[parent] -= 1
+        self._sync_nodes([name, *parents])
+        self._set_pair(seq, None)
+        return seq
+
+    def _attach(self, key, doc, seq):
+        name = doc.get('name')
+        if not name:
+            return
+        for parent in dict.fromkeys(_parents_of(doc)):
+            if not self._lists_parent(name, parent):
+                self.G.add_edge(parent, name)
+                self._out_degree[parent] = self._out_degree.get(parent, 0) + 1
+        self._docs[key] = doc
+        self._order[key] = seq
+        self._namesakes[name] = self._namesakes.get(name, []) + [key]
+        same_lower = list(self._by_lower.get(name.lower(), ()))
+        bisect.insort(same_lower, (seq, key))
+        self._by_lower[name.lower()] = same_lower
+        self._sync_lower(name.lower())
+        self._sync_nodes([name])
+        if doc.get('spouse'):
+            self._set_pair(seq, (name, doc['spouse']))
+
+    def apply_change(self, upserted=(), removed_slugs=()):
+        """
+        One write: members added, edited (docs may be partial, '_old_slug' marks a
+        slug rename) or removed. An edited member keeps its data position.
+        """
+        if self._docs is None:
+            self._prepare_patching()
+        for slug in removed_slugs:
+            self._detach(slug)
+        for m in upserted:
+            key = m.get('slug') or m.get('name')
+            old_key = m.get('_old_slug') or key
+            current = self._docs.get(old_key)
+            doc = dict(current) if current is not None else {}
+            doc.update({f: v for f, v in m.items() if f not in ("_id", "_old_slug")})
+            seq = self._detach(old_key)
+            if key != old_key:
+                self._detach(key)
+            if seq is None:
+                # New members go last, where a fresh build of the same data puts them
+                seq = len(self.spouse_pairs)
+                self.spouse_pairs.append(_NO_PAIR)
+            self._attach(key, doc, seq)
+        if self.backend == "csr":
+            self.G.refresh()
+
+    def __len__(self):
+        """Members held (one per slug, or name for old data)."""
+        if self._docs is None:
+            return len({p.get('slug') or p['name'] for p in self._source if p.get('name')})
+        return len(self._docs)
+
+    def signature(self):
+        """Order-independent content, for the periodic consistency check."""
+        people = {k: tuple(repr(p.get(f)) for f in TREE_FIELDS) for k, p in self.person_map.items()}
+        pairs = sorted(pair for pair in self.spouse_pairs if pair is not _NO_PAIR)
+        return set(self.G.nodes), set(self.G.edges), pairs, self.name_map, people
+
+    def ancestors(self, name):
+        if self.backend == "csr":
+            return self.G.ancestors(name)
+        return nx.ancestors(self.G, name)
+
+    def descendants(self, name):
+        if self.backend == "csr":
+            return self.G.descendants(name)
+        return nx.descendants(self.G, name)
+
+    def add_spouses(self, relevant_nodes):
+        """
+        The spouse pass over spouse_pairs, visiting only the pairs of relevant people.
+        Pairs are taken in data order, so a spouse added by an earlier pair still gets
+        their own later pairs, exactly as a scan of every pair would.
+        Adds the spouses to relevant_nodes, returns {name: spouse}.
+        """
+        heap = [pos for name in relevant_nodes for pos in self.spouse_positions.get(name, ())]
+        spouses_map = {}
+        if len(heap) * 4 > len(self.spouse_pairs):
+            # Most pairs are relevant anyway: the straight scan is cheaper than the heap
+            for name, spouse in self.spouse_pairs:
+                if name in relevant_nodes:
+                    spouses_map[name] = spouse
+                    relevant_nodes.add(spouse)
+            return spouses_map
+        heapq.heapify(heap)
+        while heap:
+            pos = heapq.heappop(heap)
+            name, spouse = self.spouse_pairs[pos]
+            spouses_map[name] = spouse
+            if spouse not in relevant_nodes:
+                relevant_nodes.add(spouse)
+                for later in self.spouse_positions.get(spouse, ()):
+                    if later > pos:
+                        heapq.heappush(heap, later)
+        return spouses_map
 
 
 def get_focused_subgraph(full_data, center_person_name):
-    G = nx.DiGraph()
-    name_map = {p['name'].lower(): p['name'] for p in full_data if 'name' in p}
+    """
+    Args:
+        full_data: List of member dicts, or an already built FamilyGraph.
+        center_person_name (str): Name of the focus person (case-insensitive).
+    """
+    graph = full_data if isinstance(full_data, FamilyGraph) else FamilyGraph(full_data)
+    G = graph.G
     center_name_key = center_person_name.lower().strip()
     
-    if center_name_key not in name_map:
+    if center_name_key not in graph.name_map:
         return None, f"Person '{center_person_name}' not found."
     
-    actual_center_name = name_map[center_name_key]
-    
-    # Build person lookup map
-    person_map = {p['name'].lower(): p for p in full_data if 'name' in p}
-    
-    for person in full_data:
-        name = person.get('name')
-        if not name: continue
-        G.add_node(name)
-        parents = person.get('parents', [])
-        if isinstance(parents, str): parents = [parents]
-        for parent in parents:
-            if parent:
-                G.add_edge(parent, name) 
+    actual_center_name = graph.name_map[center_name_key]
 
     try:
-        ancestors = nx.ancestors(G, actual_center_name)
-        descendants = nx.descendants(G, actual_center_name)
+        ancestors = graph.ancestors(actual_center_name)
+        descendants = graph.descendants(actual_center_name)
         relevant_nodes = ancestors.union(descendants)
         relevant_nodes.add(actual_center_name)
         
-        spouses_map = {}
-        for person in full_data:
-            name = person.get('name')
-            if name in relevant_nodes:
-                spouse = person.get('spouse')
-                if spouse:
-                    spouses_map[name] = spouse
-                    relevant_nodes.add(spouse)
-                    
-        return relevant_nodes, actual_center_name, G, spouses_map, person_map
+        spouses_map = graph.add_spouses(relevant_nodes)
+
+        return relevant_nodes, actual_center_name, G, spouses_map, graph.person_map
+    except Exception as e:
+        return None, str(e)
+
+
+def _parents_of(person):
+    parents = person.get('parents', [])
+    if isinstance(parents, str): parents = [parents]
+    return [p for p in parents if p]
+
+
+# --- Shared graph (one build per data version for all sessions and reruns) ---
+_SHARED_FAMILY_GRAPH = VersionedResource(
+    lambda: FamilyGraph(list(scan_members({"_id": 0}))),
+    name="family_graph",
+    # Delta sync (data/member_sync.py): the changed members since the last sync
+    delta=lambda graph, delta: graph.apply_change(delta.upserted, delta.removed_slugs)
+)
+
+
+def get_family_graph():
+    """Returns the shared FamilyGraph, rebuilt only when the members data version changes."""
+    return _SHARED_FAMILY_GRAPH.get()
+
+
+def patch_family_graph(change, upserted=(), removed_slugs=()):
+    """Applies one write to the shared FamilyGraph (same arguments as patch_label_index)."""
+    return _SHARED_FAMILY_GRAPH.patch(change, lambda graph: graph.apply_change(upserted, removed_slugs))
+
+
+def verify_family_graph():
+    return _SHARED_FAMILY_GRAPH.verify(FamilyGraph.signature)
+
+
+def get_focused_subgraph_from_db(collection, center_person_name, max_depth=None, center_slug=None):
+    """
+    Server-side version of get_focused_subgraph using $graphLookup.
+
+    Only the center's ancestors, descendants and their spouses leave the database,
+    so memory and transfer scale with the subtree, not the whole village.
+
+    Args:
+        collection: The 'members' collection.
+        center_person_name (str): Exact name of the focus person.
+        max_depth (int): Generations to follow up and down. None means unlimited.
+        center_slug (str): Finds the center by slug instead (both are index lookups;
+            a case-insensitive regex on name would scan the whole index).
+
+    Returns:
+        Same tuple as get_focused_subgraph.
+    """
+    center_name_key = center_person_name.strip()
+    projection = {f: 1 for f in TREE_FIELDS}
+    projection["_id"] = 0
+
+    # Start from the center's NAME so that, like the networkx graph, every member
+    # sharing that name contributes its parents and children. Depth 0 is the center itself.
+    up_depth, down_depth = {}, {}
+    if max_depth is not None:
+        max_depth = max(int(max_depth), 1)
+        up_depth = {"maxDepth": max_depth}
+        down_depth = {"maxDepth": max_depth - 1}
+    pipeline = [
+        {"$match": {"slug": center_slug} if center_slug else {"name": center_name_key}},
+        {"$limit": 1},
+        {"$graphLookup": {
+            "from": collection.name,
+            "startWith": "$name",
+            "connectFromField": "parents",
+            "connectToField": "name",
+            "as": "ancestors",
+            "depthField": "depth",
+            **up_depth,
+        }},
+        {"$graphLookup": {
+            "from": collection.name,
+            "startWith": "$name",
+            "connectFromField": "name",
+            "connectToField": "parents",
+            "as": "descendants",
+            **down_depth,
+        }},
+        {"$project": {
+            "_id": 0,
+            "name": 1,
+            **{f"ancestors.{f}": 1 for f in TREE_FIELDS + ["depth"]},
+            **{f"descendants.{f}": 1 for f in TREE_FIELDS},
+        }},
+    ]
+
+    try:
+        found = next(collection.aggregate(pipeline), None)
+        if not found:
+            return None, f"Person '{center_person_name}' not found."
+
+        return _assemble_focused_subgraph(
+            collection, found['name'], found.get('ancestors', []), found.get('descendants', []), max_depth
+        )
+    except Exception as e:
+        return None, str(e)
+
+
+def get_focused_subgraph_from_lineage(collection, center_person_name, max_depth=None, center_slug=None):
+    """
+    Same result as get_focused_subgraph_from_db, read from the materialized 'lineage'
+    field: ancestors are one read of the center's path, descendants one indexed query.
+
+    Unlike $graphLookup it follows one member (center_slug, else the first with the
+    center's name), not every namesake.
+    """
+    center_name_key = center_person_name.strip()
+    projection = {f: 1 for f in TREE_FIELDS}
+    projection["_id"] = 0
+    if max_depth is not None:
+        max_depth = max(int(max_depth), 1)
+
+    try:
+        # Exact matches only: both hit an index
+        center_query = {"slug": center_slug} if center_slug else {"name": center_name_key}
+        center = collection.find_one(center_query, {**projection, "slug": 1})
+        if not center:
+            return None, f"Person '{center_person_name}' not found."
+
+        center['depth'] = 0
+        ancestors = [center]
+        descendants = []
+        if center.get('slug'):
+            ancestors += get_ancestors(collection, center['slug'], max_depth, projection={**projection, "slug": 1})
+            descendants = get_descendants(collection, center['slug'], max_depth, projection)
+
+        return _assemble_focused_subgraph(collection, center['name'], ancestors, descendants, max_depth)
     except Exception as e:
         return None, str(e)
 
 
-def render_focused_tree(data, center_name):
-    result = get_focused_subgraph(data, center_name)
+def _assemble_focused_subgraph(collection, actual_center_name, ancestors, descendants, max_depth):
+    """
+    Shared tail of the DB-backed engines: adds name-only parents, spouses and the
+    genders the edge drawing needs, and builds the get_focused_subgraph tuple.
+    'ancestors' docs carry 'depth' (0 = the center).
+    """
+    projection = {f: 1 for f in TREE_FIELDS}
+    projection["_id"] = 0
+
+    relevant_nodes = {actual_center_name}
+    member_docs = []
+    for doc in ancestors + descendants:
+        if doc.get('name'):
+            relevant_nodes.add(doc['name'])
+            member_docs.append(doc)
+
+    # Parents that are only known by name (no document) are still ancestors
+    for doc in ancestors:
+        if max_depth is not None and doc.get('depth', 0) >= max_depth:
+            continue
+        parents = doc.get('parents', [])
+        if isinstance(parents, str): parents = [parents]
+        relevant_nodes.update(p for p in parents if p)
+
+    # Spouses of everyone in the subtree (one extra query)
+    spouses_map = {}
+    for doc in member_docs:
+        if doc.get('spouse'):
+            spouses_map[doc['name']] = doc['spouse']
+    spouse_names = set(spouses_map.values()) - relevant_nodes
+    relevant_nodes.update(spouses_map.values())
+    if spouse_names:
+        member_docs += list(collection.find({"name": {"$in": list(spouse_names)}}, projection))
+
+    person_map = {p['name'].lower(): p for p in member_docs}
+
+    # Spouses' own parents decide which edge is drawn (father first), so we need their gender
+    outside_parents = set()
+    for doc in member_docs:
+        parents = doc.get('parents', [])
+        if isinstance(parents, str): parents = [parents]
+        outside_parents.update(p for p in parents if p and p.lower() not in person_map)
+    if outside_parents:
+        for p in collection.find({"name": {"$in": list(outside_parents)}}, {"_id": 0, "name": 1, "gender": 1}):
+            person_map.setdefault(p['name'].lower(), p)
+
+    G = nx.DiGraph()
+    for person in member_docs:
+        name = person['name']
+        G.add_node(name)
+        parents = person.get('parents', [])
+        if isinstance(parents, str): parents = [parents]
+        for parent in parents:
+            if parent:
+                G.add_edge(parent, name)
+
+    return relevant_nodes, actual_center_name, G, spouses_map, person_map
+
+
+def limit_focused_subgraph(result, up=None, down=None, max_nodes=None, expanded=()):
+    """
+    Cuts a get_focused_subgraph result down to a bounded window around the center.
+
+    Generations are added nearest-first (ancestors and descendants alike) until the
+    'up'/'down' depth or the 'max_nodes' budget is hit. Spouses share their partner's
+    box but still count toward 'max_nodes'. 'expanded' holds (name, direction)
+    stubs the user opened: they always get their next generation in that direction,
+    past both the depth and the budget. Every cut branch is reported as a stub so the
+    UI can offer "+N more" and expand it on demand.
+
+    Returns:
+        tuple: (limited result, stubs) where stubs is a list of
+            {"anchor": name, "direction": "up"|"down", "hidden": [names]}
+    """
     if not result or len(result) != 5:
-        return None
-        
+        return result, []
+
+    relevant_nodes, center_node, G, spouses_map, person_map = result
+    expanded = {tuple(stub) for stub in expanded or ()}
+
+    def neighbours(node, direction):
+        if node not in G:
+            return []
+        step = G.predecessors if direction == "up" else G.successors
+        return [n for n in step(node) if n in relevant_nodes]
+
+    def with_spouse(node):
+        spouse = spouses_map.get(node)
+        return [node, spouse] if spouse and spouse != node else [node]
+
+    # member -> direction it was reached in (the center is both)
+    shown = {center_node: None}
+    # Everyone drawn: shown members plus their spouses, all counted toward max_nodes
+    drawn = set(with_spouse(center_node))
+    frontier = [(center_node, "up", 0), (center_node, "down", 0)]
+
+    # Breadth-first, one generation at a time in both directions. A full budget stops
+    # every branch except the expanded ones, so the walk goes on while they have more.
+    while frontier:
+        next_frontier = []
+        for node, direction, depth in frontier:
+            opened = (node, direction) in expanded
+            limit = up if direction == "up" else down
+            if limit is not None and depth >= limit and not opened:
+                continue
+            for other in neighbours(node, direction):
+                if other in shown:
+                    continue
+                couple = [n for n in with_spouse(other) if n not in drawn]
+                if not opened and max_nodes is not None and len(drawn) + len(couple) > max_nodes:
+                    break
+                shown[other] = direction
+                drawn.update(couple)
+                next_frontier.append((other, direction, depth + 1))
+        frontier = next_frontier
+
+    # Spouses ride along with whoever is shown (same couple box)
+    limited_nodes = drawn
+
+    # Stubs: relatives of a shown member that were cut off, in the direction it was reached
+    stubs = []
+    for node in sorted(shown):
+        directions = ("up", "down") if shown[node] is None else (shown[node],)
+        for direction in directions:
+            hidden = [n for n in neighbours(node, direction) if n not in limited_nodes]
+            if hidden:
+                stubs.append({"anchor": node, "direction": direction, "hidden": sorted(hidden)})
+
+    return (limited_nodes, center_node, G, spouses_map, person_map), stubs
+
+
+# The render_focused_tree* functions return (graphviz.Digraph or None, stubs)
+def render_focused_tree(data, center_name, style=None, limits=None):
+    return _build_tree_dot(get_focused_subgraph(data, center_name), style, limits)
+
+
+def render_focused_tree_shared(center_name, style=None, limits=None):
+    return _build_tree_dot(get_focused_subgraph(get_family_graph(), center_name), style, limits)
+
+
+def render_focused_tree_from_db(collection, center_name, max_depth=None, style=None, limits=None, center_slug=None):
+    return _build_tree_dot(get_focused_subgraph_from_db(collection, center_name, max_depth, center_slug), style, limits)
+
+
+def render_focused_tree_from_lineage(collection, center_name, max_depth=None, style=None, limits=None, center_slug=None):
+    result = get_focused_subgraph_from_lineage(collection, center_name, max_depth, center_slug)
+    return _build_tree_dot(result, style, limits)
+
+
+def _build_tree_dot(result, style=None, limits=None):
+    """
+    Args:
+        limits (dict): Optional kwargs for limit_focused_subgraph (up, down, max_nodes, expanded).
+            Cut branches are drawn as dashed "+N more" stubs.
+
+    Returns:
+        tuple: (graphviz.Digraph, stubs), or (None, []) when there is no tree.
+    """
+    stubs = []
+    if limits:
+        result, stubs = limit_focused_subgraph(result, **limits)
+
+    if not result or len(result) != 5:
+        return None, []
+
     relevant_nodes, center_node, G, spouses_map, person_map = result
 
     # --- GRAPHVIZ SETUP ---
     dot = graphviz.Digraph(comment='Family Tree')
-    dot.attr(rankdir='TB', splines='ortho', nodesep='0.6', ranksep='0.8')
+    dot.attr(**(style or TREE_STYLE))
     dot.attr('node', shape='plain', fontname='Sans-Serif') 
 
     # --- HELPER: GET GENDER ---
@@ -155,4 +720,21 @@ def render_focused_tree(data, center_name):
                 dot.edge(u, v, color='#555555')
                 added_edges.add((u, v))
 
-    return dot
+    # --- "+N MORE" STUBS (truncated branches) ---
+    for stub in stubs:
+        anchor_id = node_id_map.get(stub['anchor'])
+        if not anchor_id:
+            continue
+        stub_id = f"stub_{stub['direction']}_{anchor_id}"
+        dot.node(
+            stub_id,
+            label=f"+{len(stub['hidden'])} more",
+            shape='box', style='dashed,rounded', fontcolor='#666666', fontsize='10',
+            tooltip=", ".join(stub['hidden'])
+        )
+        if stub['direction'] == "up":
+            dot.edge(stub_id, anchor_id, style='dashed', color='#999999')
+        else:
+            dot.edge(anchor_id, stub_id, style='dashed', color='#999999')
+
+    return dot, stubs
@@ -0,0 +1,339 @@
+import threading
+
+from data.data_version import VersionedResource
+from data.snapshot import scan_members
+
+# Only the fields the profile page and relationship logic actually read.
+INDEX_PROJECTION = {
+    "slug": 1,
+    "name": 1,
+    "gender": 1,
+    "spouse": 1,
+    "parents": 1,
+    "parents_in_law": 1,
+    "association": 1,
+    "phone": 1,
+    "work": 1,
+    # Slug links written by data/slug_links.py (preferred over the names when present)
+    "parent_slugs": 1,
+    "spouse_slug": 1,
+    "parents_in_law_slugs": 1,
+}
+
+
+def as_name_list(value):
+    """Normalizes a 'parents'-style field (list, single string or missing) to a list of names."""
+    if isinstance(value, str):
+        return [value] if value else []
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str) and v]
+    return []
+
+
+def name_slug_links(doc, name_field, slug_field):
+    """
+    [(name, slug or None)] for a 'parents'-style field and its slug-link field,
+    position by position. Slug is None where the link isn't migrated/resolved.
+    """
+    value = doc.get(name_field)
+    names = [value] if isinstance(value, str) else (value if isinstance(value, list) else [])
+    slugs = doc.get(slug_field)
+    slugs = [slugs] if isinstance(slugs, str) else (slugs if isinstance(slugs, list) else [])
+
+    links = []
+    for i, name in enumerate(names):
+        name = name if isinstance(name, str) else ""
+        slug = slugs[i] if i < len(slugs) and isinstance(slugs[i], str) else None
+        if name or slug:
+            links.append((name, slug))
+    return links
+
+
+def parent_links(doc):
+    return name_slug_links(doc, "parents", "parent_slugs")
+
+
+def spouse_link(doc):
+    """(spouse name, spouse slug or None), name is "" if no spouse is recorded."""
+    links = name_slug_links(doc, "spouse", "spouse_slug")
+    return links[0] if links else ("", None)
+
+
+def links_to_parent(child, name, slug):
+    """
+    True if 'child' lists this parent. A resolved slug link decides on its own,
+    so a namesake's children no longer match; unresolved links compare names.
+    """
+    for link_name, link_slug in parent_links(child):
+        if link_slug:
+            if slug and link_slug == slug:
+                return True
+        elif link_name == name:
+            return True
+    return False
+
+
+class FamilyGraphIndex:
+    """
+    In-memory view of the 'members' collection built from ONE projected scan.
+
+    Maps:
+        by_slug:     slug -> member doc
+        by_name:     name -> [member docs] (scan order, so the first one matches find_one)
+        children_of: parent name -> [child docs]
+        children_of_slug: parent slug -> [child docs] (from slug links)
+        spouses_of:  name -> [spouse names] (both directions)
+
+    Docs handed out are shallow copies, callers are free to tag them.
+
+    A built index is never changed while readers may use it: writes patch a copy()
+    and the shared instance swaps it in (see VersionedResource.patch).
+    """
+
+    def __init__(self, docs):
+        self.by_slug = {}
+        self.by_name = {}
+        self.children_of = {}
+        self.children_of_slug = {}
+        self.spouses_of = {}
+        self._position = {}
+        self._next_position = 0
+        # True on a copy(): its lists still belong to the live index too
+        self._shared_lists = False
+
+        for doc in docs:
+            self._add(doc)
+
+    def copy(self):
+        """
+        A version of this index to patch. The maps are copied, the lists in them are
+        shared and replaced (never changed) by _add/_discard, so a copy costs one pass
+        over the keys, not over every entry.
+        """
+        new = object.__new__(FamilyGraphIndex)
+        new.by_slug = dict(self.by_slug)
+        new.by_name = dict(self.by_name)
+        new.children_of = dict(self.children_of)
+        new.children_of_slug = dict(self.children_of_slug)
+        new.spouses_of = dict(self.spouses_of)
+        new._position = dict(self._position)
+        new._next_position = self._next_position
+        new._shared_lists = True
+        return new
+
+    def _append(self, mapping, key, item):
+        if self._shared_lists:
+            mapping[key] = mapping.get(key, []) + [item]
+        else:
+            mapping.setdefault(key, []).append(item)
+
+    @classmethod
+    def build(cls, collection):
+        return cls(collection.find({}, INDEX_PROJECTION))
+
+    @classmethod
+    def build_shared(cls):
+        # From the read-only snapshot when one is active
+        return cls(scan_members(INDEX_PROJECTION))
+
+    def _add(self, doc, position=None):
+        name = doc.get("name")
+        if not name:
+            return
+
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+        self._position[id(doc)] = position
+
+        slug = doc.get("slug")
+        if slug:
+            self.by_slug[slug] = doc
+        namesakes = self.by_name.get(name, [])
+        # An edited member keeps its place among namesakes (scan order)
+        at = len(namesakes)
+        while at and self._position[id(namesakes[at - 1])] > position:
+            at -= 1
+        if at == len(namesakes):
+            self._append(self.by_name, name, doc)
+        else:
+            self.by_name[name] = namesakes[:at] + [doc] + namesakes[at:]
+
+        for parent in as_name_list(doc.get("parents")):
+            self._append(self.children_of, parent, doc)
+        for _, parent_slug in parent_links(doc):
+            if parent_slug:
+                self._append(self.children_of_slug, parent_slug, doc)
+
+        spouse = doc.get("spouse")
+        if isinstance(spouse, str) and spouse:
+            self._append(self.spouses_of, name, spouse)
+            self._append(self.spouses_of, spouse, name)
+
+    def _discard(self, doc):
+        """Undoes _add(doc). Returns the scan position it held."""
+        def drop(mapping, key):
+            kept = [d for d in mapping.get(key, ()) if d is not doc]
+            if kept:
+                mapping[key] = kept
+            else:
+                mapping.pop(key, None)
+
+        name = doc.get("name")
+        if self.by_slug.get(doc.get("slug")) is doc:
+            del self.by_slug[doc["slug"]]
+        drop(self.by_name, name)
+        for parent in as_name_list(doc.get("parents")):
+            drop(self.children_of, parent)
+        for _, parent_slug in parent_links(doc):
+            if parent_slug:
+                drop(self.children_of_slug, parent_slug)
+
+        spouse = doc.get("spouse")
+        if isinstance(spouse, str) and spouse:
+            for a, b in ((name, spouse), (spouse, name)):
+                spouses = list(self.spouses_of.get(a, []))
+                if b in spouses:
+                    spouses.remove(b)
+                if spouses:
+                    self.spouses_of[a] = spouses
+                else:
+                    self.spouses_of.pop(a, None)
+        return self._position.pop(id(doc))
+
+    def _lookup(self, slug):
+        doc = self.by_slug.get(slug)
+        if doc is None:
+            # Members without a slug (old data) are keyed by name, like the label index
+            matches = self.by_name.get(slug)
+            doc = matches[0] if matches and not matches[0].get("slug") else None
+        return doc
+
+    # --- Incremental updates (see handlers/member_events.py) ---
+    def remove(self, slug):
+        doc = self._lookup(slug)
+        if doc is not None:
+            self._discard(doc)
+
+    def upsert(self, m, old_slug=None):
+        """
+        Adds or updates one member. 'm' may be partial (slug + changed fields, or just
+        re-resolved slug links); it is merged over the doc the index already holds,
+        which keeps its scan position. Pass old_slug when the slug changed.
+        """
+        slug = m.get("slug") or m.get("name")
+        current = self._lookup(old_slug or slug)
+        doc = dict(current) if current is not None else {}
+        doc.update({f: v for f, v in m.items() if f in INDEX_PROJECTION or f == "_id"})
+
+        position = self._discard(current) if current is not None else None
+        self._add(doc, position)
+
+    def signature(self):
+        """Order-independent content, for the periodic consistency check."""
+        return sorted(repr(sorted(doc.items())) for doc in self.members())
+
+    def __len__(self):
+        return len(self._position)
+
+    def members(self):
+        """Every member doc, in scan order."""
+        docs = [doc for matches in self.by_name.values() for doc in matches]
+        docs.sort(key=lambda doc: self._position[id(doc)])
+        return docs
+
+    # --- Lookups used by get_relatives ---
+    def find_member(self, slug):
+        """Slug lookup with the same name fallback get_relatives always had."""
+        doc = self.by_slug.get(slug)
+        if doc is None:
+            matches = self.by_name.get(slug)
+            doc = matches[0] if matches else None
+        return dict(doc) if doc is not None else None
+
+    def fetch(self, names, parents=(), slugs=()):
+        """
+        Resolves one generation at a time.
+
+        Args:
+            names: Names to resolve (first member with that name).
+            parents: (name, slug) pairs whose children are wanted.
+            slugs: Slugs to resolve exactly.
+
+        Returns:
+            tuple: ({name: first doc}, [children of any of 'parents'], {slug: doc})
+        """
+        docs_by_name = {}
+        for name in names:
+            matches = self.by_name.get(name)
+            if matches and name not in docs_by_name:
+                docs_by_name[name] = dict(matches[0])
+
+        docs_by_slug = {slug: dict(self.by_slug[slug]) for slug in slugs if slug in self.by_slug}
+
+        children = []
+        seen = set()
+        for parent_name, parent_slug in parents:
+            candidates = self.children_of.get(parent_name, []) + self.children_of_slug.get(parent_slug, [])
+            for child in candidates:
+                if id(child) not in seen and links_to_parent(child, parent_name, parent_slug):
+                    seen.add(id(child))
+                    children.append(child)
+
+        # Keep the collection's natural order, like a single find() would
+        children.sort(key=lambda doc: self._position[id(doc)])
+        return docs_by_name, [dict(doc) for doc in children], docs_by_slug
+
+
+def _apply_delta(index, delta):
+    """Catch-up from data/member_sync.py: full docs, so they replace what the index holds."""
+    for slug in delta.removed_slugs:
+        index.remove(slug)
+    for m in delta.upserted:
+        index.upsert(m)
+
+
+# --- Process-wide instance (shared by every Streamlit session, caught up or rebuilt per data version) ---
+_SHARED_INDEX = VersionedResource(FamilyGraphIndex.build_shared, name="graph_index", delta=_apply_delta)
+
+
+def get_graph_index():
+    """Returns the shared index, building it from a single scan when the data version changed."""
+    return _SHARED_INDEX.get()
+
+
+def patch_graph_index(change, upserted=(), removed_slugs=(), links=()):
+    """
+    Applies one write to the shared index (a patched copy is swapped in).
+
+    Args:
+        change (VersionChange): What bump_members_version() returned for the write.
+        upserted: Member docs (full or partial) that were inserted/updated, may carry '_old_slug'.
+        removed_slugs: Slugs that were deleted.
+        links: Partial docs ({slug, *_slugs}) whose slug links the write re-resolved.
+    """
+    def apply(index):
+        for slug in removed_slugs:
+            index.remove(slug)
+        for m in upserted:
+            index.upsert(m, old_slug=m.get('_old_slug'))
+        for m in links:
+            index.upsert(m)
+
+    return _SHARED_INDEX.patch(change, apply)
+
+
+def verify_graph_index():
+    return _SHARED_INDEX.verify(FamilyGraphIndex.signature)
+
+
+def peek_graph_index():
+    """Returns the shared index if it is already built for the current version, without scanning."""
+    return _SHARED_INDEX.peek()
+
+
+def warm_graph_index():
+    """Builds the shared index on a background thread (no-op if fresh or already building)."""
+    if _SHARED_INDEX.is_building() or _SHARED_INDEX.peek() is not None:
+        return
+    threading.Thread(target=get_graph_index, name="graph-index-warmup", daemon=True).start()
@@ -0,0 +1,322 @@
+from data.data_version import VersionedResource
+from handlers.graph_index import get_graph_index, parent_links, spouse_link
+
+ORDINALS = {1: "first", 2: "second", 3: "third", 4: "fourth", 5: "fifth"}
+
+
+def _is_female(doc):
+    gender = str(doc.get('gender', '')).strip().lower()
+    return gender in ("f", "female") or "female" in gender
+
+
+def _ordinal(n):
+    return ORDINALS.get(n, f"{n}th")
+
+
+def _times(n):
+    return {1: "once", 2: "twice"}.get(n, f"{n} times")
+
+
+def describe_blood(up_a, up_b, female):
+    """
+    Names A's relation to B from the generations each climbs to their common ancestor.
+
+    Returns:
+        tuple: (English name, Hindi name or None)
+    """
+    def pick(male, fem):
+        return fem if female else male
+
+    if up_a == 0 and up_b == 0:
+        return "self", None
+    if up_a == 0:
+        names = {1: ("father", "mother", "pita", "mata"),
+                 2: ("grandfather", "grandmother", "dada", "dadi"),
+                 3: ("great-grandfather", "great-grandmother", "pardada", "pardadi")}
+        if up_b in names:
+            m, f, hm, hf = names[up_b]
+            return pick(m, f), pick(hm, hf)
+        return "great-" * (up_b - 2) + pick("grandfather", "grandmother"), None
+    if up_b == 0:
+        names = {1: ("son", "daughter", "beta", "beti"),
+                 2: ("grandson", "granddaughter", "pota", "poti"),
+                 3: ("great-grandson", "great-granddaughter", "parpota", "parpoti")}
+        if up_a in names:
+            m, f, hm, hf = names[up_a]
+            return pick(m, f), pick(hm, hf)
+        return "great-" * (up_a - 2) + pick("grandson", "granddaughter"), None
+    if up_a == 1 and up_b == 1:
+        return pick("brother", "sister"), pick("bhai", "behen")
+    if up_a == 1:
+        if up_b == 2:
+            return pick("uncle", "aunt"), pick("chacha / tau", "bua")
+        return "great-" * (up_b - 3) + pick("grand-uncle", "grand-aunt"), None
+    if up_b == 1:
+        if up_a == 2:
+            return pick("nephew", "niece"), pick("bhatija", "bhatiji")
+        return "great-" * (up_a - 3) + pick("grand-nephew", "grand-niece"), None
+
+    degree = min(up_a, up_b) - 1
+    removed = abs(up_a - up_b)
+    name = f"{_ordinal(degree)} cousin"
+    if removed:
+        name += f" {_times(removed)} removed"
+    hindi = pick("chachera bhai", "chacheri behen") if (degree, removed) == (1, 0) else None
+    return name, hindi
+
+
+def describe_via_spouse_of_b(up_a, up_s, a_female, b_female, spouse_relation):
+    """A is a blood relative of B's spouse S (up_a/up_s: generations to their common ancestor)."""
+    if up_s == 0:
+        # A descends from B's spouse, so from B too (mothers aren't on the paternal tree)
+        return describe_blood(up_a, 0, a_female)
+    if (up_a, up_s) == (0, 1):
+        return ("mother-in-law", "saas") if a_female else ("father-in-law", "sasur")
+    if (up_a, up_s) == (1, 1):
+        if b_female:
+            return ("sister-in-law", "nanad") if a_female else ("brother-in-law", "devar / jeth")
+        return ("sister-in-law", "sali") if a_female else ("brother-in-law", "sala")
+    spouse_word = "husband" if b_female else "wife"
+    return f"{spouse_word}'s {spouse_relation}", None
+
+
+def describe_via_spouse_of_a(up_s, up_b, a_female, spouse_relation):
+    """A's spouse S is a blood relative of B."""
+    if up_s == 0:
+        # A is married to B's father/grandfather..., i.e. B's mother/grandmother...
+        return describe_blood(0, up_b, a_female)
+    if (up_s, up_b) == (1, 0):
+        return ("daughter-in-law", "bahu") if a_female else ("son-in-law", "damad")
+    if (up_s, up_b) == (1, 1):
+        return ("sister-in-law", "bhabhi") if a_female else ("brother-in-law", "jija")
+    if (up_s, up_b) == (1, 2):
+        return ("aunt", "chachi / tai") if a_female else ("uncle", "phupha")
+    spouse_word = "wife" if a_female else "husband"
+    return f"{spouse_relation}'s {spouse_word}", None
+
+
+class KinshipIndex:
+    """
+    Binary-lifting LCA over the paternal tree, for "how is A related to B" in O(log depth).
+
+    Each member's tree parent is the first listed parent (the father, as the forms store
+    it), resolved by its slug link when migrated, else by name like everywhere else in
+    the app. Name-link cycles (bad data) are cut so the structure is always a forest.
+
+    Arrays, indexed by an integer id per member:
+        parent, depth, root, spouse, and up[k][i] = 2^k-th ancestor of i.
+    """
+
+    def __init__(self, docs):
+        self.keys = []
+        self.docs = []
+        self.ids = {}
+        first_by_name = {}
+
+        for doc in docs:
+            name = doc.get('name')
+            if not name:
+                continue
+            key = doc.get('slug') or name
+            if key in self.ids:
+                continue
+            self.ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.docs.append(doc)
+            first_by_name.setdefault(name, self.ids[key])
+
+        n = len(self.keys)
+        self.parent = [-1] * n
+        self.spouse = [-1] * n
+        for i, doc in enumerate(self.docs):
+            # Slug links are exact, names are the fallback
+            links = parent_links(doc)
+            p = self._resolve(links[0], first_by_name) if links else None
+            if p is not None and p != i:
+                self.parent[i] = p
+
+            s = self._resolve(spouse_link(doc), first_by_name)
+            if s is not None and s != i:
+                self.spouse[i] = s
+        # Spouse links stored on one side only
+        for i, s in enumerate(list(self.spouse)):
+            if s >= 0 and self.spouse[s] < 0:
+                self.spouse[s] = i
+
+        self._compute_depths()
+        self._build_lifting()
+
+    def _resolve(self, link, first_by_name):
+        name, slug = link
+        if slug and slug in self.ids:
+            return self.ids[slug]
+        return first_by_name.get(name) if name else None
+
+    @classmethod
+    def from_graph_index(cls, graph_index):
+        return cls(graph_index.members())
+
+    def _compute_depths(self):
+        n = len(self.keys)
+        self.depth = [-1] * n
+        self.root = [-1] * n
+        for start in range(n):
+            while self.depth[start] < 0:
+                chain, on_chain, j = [], set(), start
+                while j != -1 and self.depth[j] < 0 and j not in on_chain:
+                    chain.append(j)
+                    on_chain.add(j)
+                    j = self.parent[j]
+                if j != -1 and j in on_chain:
+                    # Cycle: make j a root and walk again
+                    self.parent[j] = -1
+                    continue
+
+                depth = self.depth[j] if j != -1 else -1
+                root = self.root[j] if j != -1 else chain[-1]
+                for node in reversed(chain):
+                    depth += 1
+                    self.depth[node] = depth
+                    self.root[node] = root
+
+    def _build_lifting(self):
+        max_depth = max(self.depth, default=0)
+        self.log = max(1, max_depth.bit_length())
+        level = [p if p >= 0 else i for i, p in enumerate(self.parent)]
+        self.up = [level]
+        for _ in range(1, self.log):
+            level = [level[level[i]] for i in range(len(level))]
+            self.up.append(level)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # --- Core queries ---
+    def ancestor(self, i, k):
+        """k-th ancestor of i (assumes k <= depth[i])."""
+        bit = 0
+        while k:
+            if k & 1:
+                i = self.up[bit][i]
+            k >>= 1
+            bit += 1
+        return i
+
+    def lca(self, a, b):
+        """Lowest common ancestor of ids a and b, or -1 if they are in different trees."""
+        if self.root[a] != self.root[b]:
+            return -1
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        a = self.ancestor(a, self.depth[a] - self.depth[b])
+        if a == b:
+            return a
+        for k in range(self.log - 1, -1, -1):
+            if self.up[k][a] != self.up[k][b]:
+                a, b = self.up[k][a], self.up[k][b]
+        return self.parent[a]
+
+    def _blood(self, a, b):
+        """(up_a, up_b, lca) or None."""
+        c = self.lca(a, b)
+        if c < 0:
+            return None
+        return self.depth[a] - self.depth[c], self.depth[b] - self.depth[c], c
+
+    def _path(self, a, b, c):
+        """Ids from a up to c and down to b."""
+        up_side, node = [], a
+        while node != c:
+            up_side.append(node)
+            node = self.parent[node]
+        down_side, node = [], b
+        while node != c:
+            down_side.append(node)
+            node = self.parent[node]
+        return up_side + [c] + down_side[::-1]
+
+    # --- Public API ---
+    def relation(self, slug_a, slug_b, with_path=True):
+        """
+        How is A related to B? ("A is B's <relation>")
+
+        Tries blood first, then through A's spouse, then through B's spouse.
+
+        Returns:
+            dict: {"relation", "hindi", "kind" ("self"/"blood"/"in-law"/"none"),
+                   "common_ancestor" (slug or None), "generations" ((up_a, up_b) or None),
+                   "path" (slugs from A to B)} or None if either slug is unknown.
+        """
+        a, b = self.ids.get(slug_a), self.ids.get(slug_b)
+        if a is None or b is None:
+            return None
+
+        a_female = _is_female(self.docs[a])
+        result = {"relation": "not related (in the recorded paternal lines)", "hindi": None,
+                  "kind": "none", "common_ancestor": None, "generations": None, "path": []}
+
+        if a == b:
+            result.update(relation="self", kind="self", path=[slug_a])
+            return result
+
+        # 1. Blood
+        blood = self._blood(a, b)
+        if blood:
+            up_a, up_b, c = blood
+            name, hindi = describe_blood(up_a, up_b, a_female)
+            result.update(relation=name, hindi=hindi, kind="blood", common_ancestor=self.keys[c],
+                          generations=(up_a, up_b),
+                          path=[self.keys[i] for i in self._path(a, b, c)] if with_path else [])
+            return result
+
+        # 2. Spouses
+        if self.spouse[a] == b:
+            result.update(relation="wife" if a_female else "husband",
+                          hindi="patni" if a_female else "pati", kind="in-law",
+                          path=[slug_a, slug_b])
+            return result
+
+        s = self.spouse[a]
+        if s >= 0:
+            blood = self._blood(s, b)
+            if blood:
+                up_s, up_b, c = blood
+                spouse_relation = describe_blood(up_s, up_b, _is_female(self.docs[s]))[0]
+                name, hindi = describe_via_spouse_of_a(up_s, up_b, a_female, spouse_relation)
+                path = [a] + self._path(s, b, c) if with_path else []
+                result.update(relation=name, hindi=hindi, kind="in-law", common_ancestor=self.keys[c],
+                              generations=(up_s, up_b), path=[self.keys[i] for i in path])
+                return result
+
+        s = self.spouse[b]
+        if s >= 0:
+            blood = self._blood(a, s)
+            if blood:
+                up_a, up_s, c = blood
+                spouse_relation = describe_blood(up_a, up_s, a_female)[0]
+                name, hindi = describe_via_spouse_of_b(up_a, up_s, a_female, _is_female(self.docs[b]),
+                                                       spouse_relation)
+                path = self._path(a, s, c) + [b] if with_path else []
+                result.update(relation=name, hindi=hindi, kind="in-law", common_ancestor=self.keys[c],
+                              generations=(up_a, up_s), path=[self.keys[i] for i in path])
+                return result
+
+        return result
+
+    def name_of(self, slug):
+        i = self.ids.get(slug)
+        return self.docs[i].get('name') if i is not None else slug
+
+
+# --- Shared instance (derived from the shared graph index, no extra DB scan) ---
+_SHARED_KINSHIP = VersionedResource(lambda: KinshipIndex.from_graph_index(get_graph_index()),
+                                    name="kinship_index")
+
+
+def get_kinship_index():
+    return _SHARED_KINSHIP.get()
+
+
+def get_relation(slug_a, slug_b):
+    """'How is A related to B' against the current data version."""
+    return get_kinship_index().relation(slug_a, slug_b)
@@ -0,0 +1,184 @@
+import bisect
+
+from data.data_version import VersionedResource
+from data.snapshot import scan_members
+
+# Fields that feed a picker label
+LABEL_FIELDS = ["name", "slug", "association", "parents", "spouse", "parents_in_law", "gender"]
+LABEL_PROJECTION = {**{f: 1 for f in LABEL_FIELDS}, "_id": 0}
+
+
+def build_member_label(m):
+    """
+    Builds the picker label, e.g. "Ram Kumar (s/o Shyam Kumar)", with context
+    based on the 'Association' type. Shared by the Search and Tree pages.
+    """
+    name = m.get('name', 'Unknown')
+    assoc = str(m.get('association', '')).lower().strip()
+    is_female_gender = "female" in str(m.get('gender', '')).lower()
+
+    # Helpers
+    def get_first(field):
+        val = m.get(field)
+        if isinstance(val, list) and val: return val[0]
+        if isinstance(val, str): return val
+        return None
+
+    spouse_name = get_first('spouse')
+    father_name = get_first('parents')
+    father_in_law_name = get_first("parents_in_law")
+
+    relation_suffix = ""
+
+    if "daughter-in-law" in assoc or "bahu" in assoc:
+        if father_in_law_name:
+            relation_suffix = f"(d/o-in-law of {father_in_law_name})"
+        elif spouse_name:
+            relation_suffix = f"(w/o {spouse_name})"
+
+    elif "son-in-law" in assoc or "damad" in assoc:
+        if father_in_law_name:
+            relation_suffix = f"(s/o-in-law of {father_in_law_name})"
+        elif spouse_name:
+            relation_suffix = f"(h/o {spouse_name})"
+
+    else: # Son/Daughter/Default
+        if father_name:
+            # Decide s/o vs d/o
+            is_female = "daughter" in assoc or "beti" in assoc or is_female_gender
+            prefix = "d/o" if is_female else "s/o"
+            relation_suffix = f"({prefix} {father_name})"
+        elif spouse_name:
+            prefix = "w/o" if is_female_gender else "h/o"
+            relation_suffix = f"({prefix} {spouse_name})"
+
+    return f"{name} {relation_suffix}".strip()
+
+
+class MemberLabelIndex:
+    """
+    label -> slug, slug -> label and the sorted label list for the member pickers.
+
+    Built once per data version and patched (upsert/remove on a copy()) when a
+    single member changes. Two people with the same label get their slug appended
+    so every label stays unique.
+    """
+
+    def __init__(self, docs):
+        self.label_to_slug = {}
+        self.slug_to_label = {}
+        self.docs = {}
+        self.sorted_labels = []
+
+        for m in docs:
+            self._insert(m)
+        self.sorted_labels.sort()
+
+    @classmethod
+    def build(cls, collection):
+        return cls(collection.find({}, LABEL_PROJECTION))
+
+    def copy(self):
+        """A version to patch while readers keep using this one (docs are never changed, only replaced)."""
+        new = object.__new__(MemberLabelIndex)
+        new.label_to_slug = dict(self.label_to_slug)
+        new.slug_to_label = dict(self.slug_to_label)
+        new.docs = dict(self.docs)
+        new.sorted_labels = list(self.sorted_labels)
+        return new
+
+    def _insert(self, m, keep_sorted=False):
+        name = m.get('name')
+        if not name:
+            return None
+        # If no slug exists (old data), fall back to name
+        slug = m.get('slug') or name
+
+        label = build_member_label(m)
+        if self.label_to_slug.get(label, slug) != slug:
+            label = f"{label} [{slug}]"
+
+        self.docs[slug] = m
+        self.label_to_slug[label] = slug
+        self.slug_to_label[slug] = label
+        if keep_sorted:
+            bisect.insort(self.sorted_labels, label)
+        else:
+            self.sorted_labels.append(label)
+        return label
+
+    def get_name(self, slug):
+        doc = self.docs.get(slug)
+        return doc.get('name') if doc else None
+
+    # --- Incremental updates ---
+    def remove(self, slug):
+        label = self.slug_to_label.pop(slug, None)
+        self.docs.pop(slug, None)
+        if label is None:
+            return
+        self.label_to_slug.pop(label, None)
+        i = bisect.bisect_left(self.sorted_labels, label)
+        if i < len(self.sorted_labels) and self.sorted_labels[i] == label:
+            del self.sorted_labels[i]
+
+    def upsert(self, m, old_slug=None):
+        """
+        Adds or relabels one member. 'm' may be partial (e.g. just slug + changed field),
+        it is merged over what the index already holds. Pass old_slug when the slug changed.
+        """
+        slug = m.get('slug') or m.get('name')
+        doc = dict(self.docs.get(old_slug or slug, {}))
+        doc.update({f: m[f] for f in LABEL_FIELDS if f in m})
+
+        self.remove(old_slug or slug)
+        if slug != old_slug:
+            self.remove(slug)
+        return self._insert(doc, keep_sorted=True)
+
+    def signature(self):
+        """slug -> label without the collision suffix (which depends on insertion order)."""
+        return {slug: build_member_label(doc) for slug, doc in self.docs.items()}
+
+    def __len__(self):
+        return len(self.sorted_labels)
+
+
+def _apply_delta(index, delta):
+    """Catch-up from data/member_sync.py (another process wrote)."""
+    for slug in delta.removed_slugs:
+        index.remove(slug)
+    for m in delta.upserted:
+        index.upsert(m)
+
+
+# --- Shared instance (one per data version, patched by single-member writes) ---
+_SHARED_LABELS = VersionedResource(lambda: MemberLabelIndex(scan_members(LABEL_PROJECTION)), name="label_index",
+                                   delta=_apply_delta)
+
+
+def get_label_index():
+    return _SHARED_LABELS.get()
+
+
+def patch_label_index(change, upserted=(), removed_slugs=()):
+    """
+    Applies one write to the shared label index (a patched copy is swapped in).
+
+    Args:
+        change (VersionChange): What bump_members_version() returned for the write.
+        upserted: Member docs (full or partial) that were inserted/updated.
+            A doc may carry '_old_slug' if the write renamed its slug.
+        removed_slugs: Slugs that were deleted.
+    """
+    def apply(index):
+        for slug in removed_slugs:
+            index.remove(slug)
+        for m in upserted:
+            index.upsert(m, old_slug=m.get('_old_slug'))
+
+    return _SHARED_LABELS.patch(change, apply)
+
+
+def verify_label_index():
+    return _SHARED_LABELS.verify(MemberLabelIndex.signature)
@@ -0,0 +1,248 @@
+"""
+Materialized ancestor paths.
+
+Every member carries
+    lineage:    [{"slug": <ancestor slug>, "depth": <generations up>}, ...]  nearest first
+    generation: longest chain of recorded ancestors above them (0 for a root)
+
+so "all descendants of X" is one indexed query on lineage.slug and "ancestors of X"
+is a single read of X's own document.
+
+    python -m handlers.lineage --rebuild    # backfill / repair every member
+"""
+import argparse
+
+from pymongo import UpdateOne
+
+from data.data_version import bump_members_version
+from data.database import FAMILY_COLLECTION
+from data.member_sync import utc_now
+from handlers.graph_index import parent_links
+
+LINEAGE_FIELD = "lineage"
+GENERATION_FIELD = "generation"
+# Writes to these fields can move a member (and everyone below them) in the tree
+LINEAGE_SOURCE_FIELDS = ("name", "parents", "slug")
+LINEAGE_WRITE_CHUNK = 500
+
+_LINK_PROJECTION = {"_id": 0, "slug": 1, "name": 1, "parents": 1, "parent_slugs": 1,
+                    LINEAGE_FIELD: 1, GENERATION_FIELD: 1}
+
+
+def _merge_lineage(parent_lineages):
+    """
+    parent_lineages: [(parent slug, that parent's lineage)].
+    Returns (lineage, generation): nearest first, each ancestor once at its smallest depth.
+    """
+    best = {}
+    order = []
+    generation = 0
+    for parent_slug, lineage in parent_lineages:
+        candidates = [{"slug": parent_slug, "depth": 0}] + list(lineage or [])
+        for entry in candidates:
+            depth = entry["depth"] + 1
+            generation = max(generation, depth)
+            if entry["slug"] not in best:
+                order.append(entry["slug"])
+                best[entry["slug"]] = depth
+            elif depth < best[entry["slug"]]:
+                best[entry["slug"]] = depth
+    rank = {slug: i for i, slug in enumerate(order)}
+    lineage = [{"slug": s, "depth": best[s]} for s in sorted(order, key=lambda s: (best[s], rank[s]))]
+    return lineage, generation
+
+
+class _LineageSolver:
+    """
+    Computes lineage for 'targets' (slug -> doc) in memory.
+    Parents outside the targets contribute their stored lineage.
+
+    A parent is the member its slug link points at (data/slug_links.py), so namesakes
+    don't get mixed up; only a link that isn't resolved falls back to the first
+    member with the name.
+    """
+
+    def __init__(self, targets, first_by_name, parents_by_slug):
+        self.targets = targets
+        self.first_by_name = first_by_name
+        self.parents_by_slug = parents_by_slug
+        self.results = {}
+        self._visiting = set()
+
+    def _parent_docs(self, doc):
+        for name, slug in parent_links(doc):
+            parent = self.parents_by_slug.get(slug) if slug else self.first_by_name.get(name)
+            if parent and parent.get("slug") and parent["slug"] != doc.get("slug"):
+                yield parent
+
+    def solve(self, slug):
+        if slug in self.results:
+            return self.results[slug]
+
+        # Iterative post-order DFS (family lines can be deeper than the recursion limit)
+        stack = [(slug, False)]
+        while stack:
+            current, parents_done = stack.pop()
+            if current in self.results:
+                continue
+            doc = self.targets[current]
+            if not parents_done:
+                self._visiting.add(current)
+                stack.append((current, True))
+                for parent in self._parent_docs(doc):
+                    p = parent["slug"]
+                    # A parent on the current DFS path means a name-link cycle, it's treated as outside
+                    if p in self.targets and p not in self.results and p not in self._visiting:
+                        stack.append((p, False))
+                continue
+
+            parent_lineages = []
+            for parent in self._parent_docs(doc):
+                p = parent["slug"]
+                if p in self.results:
+                    lineage = self.results[p][0]
+                elif p in self.targets:
+                    lineage = []  # Cycle: stop here
+                else:
+                    lineage = parent.get(LINEAGE_FIELD)
+                parent_lineages.append((p, [e for e in (lineage or []) if e["slug"] != current]))
+            self.results[current] = _merge_lineage(parent_lineages)
+            self._visiting.discard(current)
+        return self.results[slug]
+
+
+def _write_lineage(collection, docs, results):
+    """
+    Writes only documents whose lineage actually changed, stamped for delta sync.
+    Returns how many. Callers run it before bump_members_version().
+    """
+    now = utc_now()
+    operations = []
+    for slug, (lineage, generation) in results.items():
+        doc = docs.get(slug, {})
+        if doc.get(LINEAGE_FIELD) == lineage and doc.get(GENERATION_FIELD) == generation:
+            continue
+        operations.append(UpdateOne({"slug": slug}, {"$set": {LINEAGE_FIELD: lineage, GENERATION_FIELD: generation,
+                                                              "updated_at": now}}))
+
+    for start in range(0, len(operations), LINEAGE_WRITE_CHUNK):
+        collection.bulk_write(operations[start:start + LINEAGE_WRITE_CHUNK], ordered=False)
+    return len(operations)
+
+
+def _first_by_name(docs):
+    first = {}
+    for doc in docs:
+        if doc.get("name"):
+            first.setdefault(doc["name"], doc)
+    return first
+
+
+def rebuild_all_lineage(collection=FAMILY_COLLECTION):
+    """Recomputes every member's lineage from one scan. Returns how many documents changed."""
+    docs = [d for d in collection.find({}, _LINK_PROJECTION) if d.get("slug")]
+    by_slug = {d["slug"]: d for d in docs}
+    solver = _LineageSolver(by_slug, _first_by_name(docs), by_slug)
+    for slug in by_slug:
+        solver.solve(slug)
+    return _write_lineage(collection, by_slug, solver.results)
+
+
+def refresh_lineage(collection=FAMILY_COLLECTION, changed_slugs=(), touched_names=(), removed_slugs=()):
+    """
+    Incremental update after a write that can move members in the tree.
+
+    Args:
+        changed_slugs: Members inserted/updated (their own parents may have changed).
+        touched_names: Names that appeared or disappeared (new member, rename, delete):
+            anyone listing one of them as a parent is re-linked.
+        removed_slugs: Deleted or renamed-away slugs, their old descendants are recomputed.
+
+    Costs a fixed handful of queries however big the affected subtree is.
+    Returns how many documents changed.
+    """
+    changed_slugs = [s for s in changed_slugs if s]
+    touched_names = [n for n in touched_names if n]
+
+    # 1. Seeds: the changed members and whoever names a touched name as a parent
+    seeds = set(changed_slugs)
+    if touched_names:
+        seeds.update(d["slug"] for d in collection.find({"parents": {"$in": touched_names}}, {"_id": 0, "slug": 1})
+                     if d.get("slug"))
+
+    # 2. Everything below a seed (or below a removed slug), one indexed query
+    anchors = list(seeds | set(removed_slugs))
+    if not anchors:
+        return 0
+    targets = {}
+    for doc in collection.find({"$or": [{"slug": {"$in": list(seeds)}}, {f"{LINEAGE_FIELD}.slug": {"$in": anchors}}]},
+                               _LINK_PROJECTION):
+        if doc.get("slug"):
+            targets[doc["slug"]] = doc
+    if not targets:
+        return 0
+
+    # 3. Resolve every parent they use: by slug link, else by name (first member, like find_one)
+    links = [link for d in targets.values() for link in parent_links(d)]
+    parent_slugs = list({slug for _, slug in links if slug})
+    parent_names = {name for name, slug in links if not slug and name}
+    clauses = ([{"slug": {"$in": parent_slugs}}] if parent_slugs else []) + \
+              ([{"name": {"$in": list(parent_names)}}] if parent_names else [])
+    parents = list(collection.find({"$or": clauses}, _LINK_PROJECTION)) if clauses else []
+    first_by_name = _first_by_name(d for d in parents if d.get("name") in parent_names)
+    parents_by_slug = {d["slug"]: d for d in parents if d.get("slug")}
+    # Prefer the in-flight copy for members being recomputed
+    for name, doc in list(first_by_name.items()):
+        if doc.get("slug") in targets:
+            first_by_name[name] = targets[doc["slug"]]
+    parents_by_slug.update((slug, doc) for slug, doc in targets.items() if slug in parents_by_slug)
+
+    # 4. Recompute in memory, write the differences
+    solver = _LineageSolver(targets, first_by_name, parents_by_slug)
+    for slug in targets:
+        solver.solve(slug)
+    return _write_lineage(collection, targets, solver.results)
+
+
+# --- Read paths ---
+def get_descendants(collection, slug, max_depth=None, projection=None):
+    """Everyone below 'slug' (optionally within max_depth generations) in one indexed query."""
+    match = {"slug": slug}
+    if max_depth is not None:
+        match["depth"] = {"$lte": max_depth}
+    return list(collection.find({LINEAGE_FIELD: {"$elemMatch": match}}, projection))
+
+
+def get_ancestors(collection, slug, max_depth=None, projection=None):
+    """
+    Recorded ancestors of 'slug', nearest first, each tagged with 'depth'.
+    One read for the path, one $in for the documents.
+    """
+    doc = collection.find_one({"slug": slug}, {"_id": 0, LINEAGE_FIELD: 1})
+    lineage = [e for e in (doc or {}).get(LINEAGE_FIELD, [])
+               if max_depth is None or e["depth"] <= max_depth]
+    if not lineage:
+        return []
+    depth_of = {e["slug"]: e["depth"] for e in lineage}
+    found = list(collection.find({"slug": {"$in": list(depth_of)}}, projection))
+    for d in found:
+        d["depth"] = depth_of.get(d.get("slug"))
+    return sorted(found, key=lambda d: d["depth"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the materialized 'lineage' field on members.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every member from scratch.")
+    args = parser.parse_args(argv)
+    if args.rebuild:
+        changed = rebuild_all_lineage()
+        if changed:
+            # Trees rendered from the old lineage are cached per data version
+            bump_members_version()
+        print(f"Updated lineage on {changed} member(s).")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
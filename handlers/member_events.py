@@ -0,0 +1,132 @@
+"""
+Change events from the member write paths.
+
+Every write (add, edit, delete, bulk update) ends with one emit_member_change()
+describing what it changed, and the shared in-memory structures apply it to a copy
+of themselves that replaces the live one (readers never see a half-applied write):
+
+    graph index      (handlers/graph_index.py)     profile page, relatives
+    family graph     (handlers/graph_handlers.py)  focused trees
+    label index      (handlers/label_index.py)     member pickers
+    typeahead index  (handlers/typeahead.py)       search
+
+A structure that wasn't built for the version right before the write (never built,
+or another process wrote in between) is left alone and caught up on its next read,
+from the updated_at cursor (data/member_sync.py) or else by a rebuild from a scan.
+
+Patches are only as good as the events, so a full rebuild still runs now and then
+as a consistency check: at most every CONSISTENCY_CHECK_SECONDS, started by a write
+on a background thread, each structure is rebuilt and compared with the patched one,
+and replaced if they differ.
+
+    CONSISTENCY_CHECK_SECONDS=3600   # 0 switches the periodic check off
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from handlers.graph_handlers import patch_family_graph, verify_family_graph
+from handlers.graph_index import patch_graph_index, verify_graph_index
+from handlers.label_index import patch_label_index, verify_label_index
+from handlers.typeahead import patch_typeahead_index, verify_typeahead_index
+
+CONSISTENCY_CHECK_SECONDS = int(os.getenv("CONSISTENCY_CHECK_SECONDS", "3600"))
+
+# One write:
+#   change:        VersionChange returned by bump_members_version()
+#   upserted:      member docs added/edited, may be partial, '_old_slug' marks a slug rename
+#   removed_slugs: members deleted
+#   links:         {slug, <link fields>} of members whose slug links the write re-resolved
+MemberChange = namedtuple("MemberChange", ["change", "upserted", "removed_slugs", "links"])
+
+# (name, apply(event) -> True if patched), in order: typeahead reads the label index
+_SUBSCRIBERS = [
+    ("graph_index", lambda e: patch_graph_index(e.change, e.upserted, e.removed_slugs, e.links)),
+    ("family_graph", lambda e: patch_family_graph(e.change, e.upserted, e.removed_slugs)),
+    ("label_index", lambda e: patch_label_index(e.change, e.upserted, e.removed_slugs)),
+    ("typeahead_index", lambda e: patch_typeahead_index(e.change, e.upserted, e.removed_slugs)),
+]
+
+_CHECKS = [
+    ("graph_index", verify_graph_index),
+    ("family_graph", verify_family_graph),
+    ("label_index", verify_label_index),
+    ("typeahead_index", verify_typeahead_index),
+]
+
+_stats = {name: {"patched": 0, "skipped": 0, "failed": 0} for name, _ in _SUBSCRIBERS}
+_stats_lock = threading.Lock()
+_last_check = {"at": None, "results": {}}
+_next_check_at = time.monotonic() + CONSISTENCY_CHECK_SECONDS
+_check_lock = threading.Lock()
+
+
+def emit_member_change(change, upserted=(), removed_slugs=(), links=()):
+    """
+    Applies one write to every shared structure. Never raises: a structure whose
+    patch fails is dropped and rebuilt from a scan on its next read.
+
+    Returns:
+        MemberChange: the event, for callers that want to pass it on.
+    """
+    event = MemberChange(change, list(upserted), list(removed_slugs), list(links))
+    for name, apply in _SUBSCRIBERS:
+        try:
+            outcome = "patched" if apply(event) else "skipped"
+        except Exception:
+            outcome = "failed"
+        with _stats_lock:
+            _stats[name][outcome] += 1
+
+    if CONSISTENCY_CHECK_SECONDS > 0 and time.monotonic() >= _next_check_at:
+        start_consistency_check()
+    return event
+
+
+def check_consistency():
+    """
+    Rebuilds every built structure from a scan and compares it with the patched one.
+
+    Returns:
+        dict: name -> "ok", "repaired" (differed, fresh build swapped in),
+            "skipped" (not built, or a write landed meanwhile) or "failed".
+    """
+    global _next_check_at
+    results = {}
+    for name, verify in _CHECKS:
+        try:
+            outcome = verify()
+            results[name] = {True: "ok", False: "repaired", None: "skipped"}[outcome]
+        except Exception as e:
+            results[name] = f"failed: {e}"
+    with _stats_lock:
+        _last_check["at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        _last_check["results"] = results
+    _next_check_at = time.monotonic() + CONSISTENCY_CHECK_SECONDS
+    return results
+
+
+def _run_check():
+    try:
+        check_consistency()
+    finally:
+        _check_lock.release()
+
+
+def start_consistency_check():
+    """Runs check_consistency() on a background thread (no-op if one is already running)."""
+    if not _check_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=_run_check, name="member-consistency-check", daemon=True).start()
+    return True
+
+
+def get_sync_stats():
+    """Patch outcomes per structure since the process started, plus the last consistency check."""
+    with _stats_lock:
+        return {
+            "structures": {name: dict(counts) for name, counts in _stats.items()},
+            "last_check": dict(_last_check),
+        }
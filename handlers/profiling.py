@@ -0,0 +1,281 @@
+"""
+Per-rerun profiling: Mongo round trips (via a pymongo.monitoring command listener)
+and render time per page.
+
+app.py wraps each rerun in profile_rerun(page). Every command the rerun's thread
+sends is counted against it: number of commands, bytes returned (estimated, see
+reply_size) and driver-side duration (server time plus network). Finished reruns go
+to an in-memory ring for the admin debug panel and, if PROFILE_LOG_PATH is set, one
+JSON line each to that file.
+
+Off by default: the listener runs on every command of every user.
+
+    PROFILE_RERUNS=1                      # switch the layer on
+    PROFILE_LOG_PATH=logs/reruns.jsonl    # JSON-lines sink
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import bson
+from pymongo import monitoring
+
+from data.database import register_event_listener
+
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "0") == "1"
+PROFILE_LOG_PATH = os.getenv("PROFILE_LOG_PATH")
+# Finished reruns kept in memory for the debug panel
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "200"))
+# The same query shape this often in one rerun is flagged as a likely N+1
+PROFILE_REPEAT_WARN = int(os.getenv("PROFILE_REPEAT_WARN", "5"))
+
+# Commands that only exist to run other commands (not the app's queries)
+_IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue",
+                     "endSessions", "buildInfo", "getLastError"}
+
+_current = contextvars.ContextVar("rerun_profile", default=None)
+
+
+def reply_size(reply):
+    """
+    Approximate BSON size of a server reply without re-encoding all of it: a cursor
+    batch counts as its first document times the batch length, anything else is
+    encoded as is (acks and counts are small).
+    """
+    if not isinstance(reply, dict):
+        return 0
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch")) or []
+        return len(bson.encode(batch[0])) * len(batch) if batch else 0
+    return len(bson.encode(reply))
+
+
+def query_shape(command_name, command):
+    """
+    'find members {name, parents}': command, collection and filter keys, values dropped,
+    so the same query with different arguments counts as one shape.
+    """
+    collection = command.get(command_name)
+    if command_name == "getMore":
+        collection = command.get("collection")
+    if not isinstance(collection, str):
+        collection = ""
+
+    keys = []
+    if command_name == "aggregate":
+        keys = [next(iter(stage), "") for stage in command.get("pipeline", []) if isinstance(stage, dict)]
+    elif isinstance(command.get("filter"), dict):
+        keys = sorted(command["filter"])
+    elif isinstance(command.get("query"), dict):
+        keys = sorted(command["query"])
+    elif command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        if statements and isinstance(statements[0].get("q"), dict):
+            keys = sorted(statements[0]["q"])
+    shape = f"{command_name} {collection}".strip()
+    return f"{shape} {{{', '.join(keys)}}}" if keys else shape
+
+
+class RerunProfile:
+    """Everything one rerun cost. Commands may be recorded from the listener while it runs."""
+
+    def __init__(self, page, session_id=None):
+        self.page = page
+        self.session_id = session_id
+        self.started_at = datetime.now(timezone.utc)
+        self.queries = 0
+        self.failed = 0
+        self.bytes_returned = 0
+        self.server_ms = 0.0
+        self.shapes = {}
+        self.spans = []
+        self.render_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record_command(self, shape, duration_ms, reply_bytes, failed=False):
+        with self._lock:
+            self.queries += 1
+            self.failed += 1 if failed else 0
+            self.bytes_returned += reply_bytes
+            self.server_ms += duration_ms
+            count, total_ms = self.shapes.get(shape, (0, 0.0))
+            self.shapes[shape] = (count + 1, total_ms + duration_ms)
+
+    def repeated_shapes(self, threshold=PROFILE_REPEAT_WARN):
+        """[(shape, count)] seen at least 'threshold' times, most repeated first."""
+        return sorted(((s, c) for s, (c, _) in self.shapes.items() if c >= threshold), key=lambda x: -x[1])
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "at": self.started_at.isoformat(timespec="milliseconds"),
+                "session": self.session_id,
+                "page": self.page,
+                "render_ms": round(self.render_ms, 2),
+                "queries": self.queries,
+                "failed": self.failed,
+                "bytes": self.bytes_returned,
+                "server_ms": round(self.server_ms, 2),
+                "spans": [{"name": n, "ms": round(ms, 2)} for n, ms in self.spans],
+                "shapes": {s: {"count": c, "ms": round(ms, 2)} for s, (c, ms) in self.shapes.items()},
+                "repeated": [s for s, _ in self.repeated_shapes()],
+            }
+
+
+class MongoCommandProfiler(monitoring.CommandListener):
+    """
+    Attributes each command to the RerunProfile active on the thread that sent it.
+    Commands from background threads (index warm-ups, startup) are counted as
+    'unattributed' so they still show up in the totals.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.unattributed = {"queries": 0, "bytes": 0, "server_ms": 0.0}
+
+    def started(self, event):
+        if event.command_name in _IGNORED_COMMANDS:
+            return
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                _current.get(), query_shape(event.command_name, event.command))
+
+    def _finish(self, event, reply, failed):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        profile, shape = pending
+        duration_ms = event.duration_micros / 1000
+        reply_bytes = reply_size(reply)
+        if profile is not None:
+            profile.record_command(shape, duration_ms, reply_bytes, failed)
+        else:
+            with self._lock:
+                self.unattributed["queries"] += 1
+                self.unattributed["bytes"] += reply_bytes
+                self.unattributed["server_ms"] += duration_ms
+
+    def succeeded(self, event):
+        self._finish(event, event.reply, False)
+
+    def failed(self, event):
+        self._finish(event, None, True)
+
+
+# --- Process-wide state ---
+_PROFILER = MongoCommandProfiler()
+_registered = False
+_register_lock = threading.Lock()
+_HISTORY = deque(maxlen=PROFILE_HISTORY)
+_HISTORY_LOCK = threading.Lock()
+_SINK_LOCK = threading.Lock()
+
+
+def install_mongo_profiler():
+    """Registers the command listener once per process. Must run before the first query."""
+    global _registered
+    if not PROFILE_RERUNS or _registered:
+        return
+    with _register_lock:
+        if not _registered:
+            register_event_listener(_PROFILER)
+            _registered = True
+
+
+def new_session_id():
+    return uuid.uuid4().hex[:8]
+
+
+def _write_sink(record):
+    try:
+        directory = os.path.dirname(PROFILE_LOG_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _SINK_LOCK, open(PROFILE_LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError:
+        # Profiling must never break a page
+        pass
+
+
+@contextmanager
+def profile_rerun(page, session_id=None):
+    """
+    Profiles everything inside the block as one rerun of 'page'. The record is kept
+    even if the page ends early (st.rerun()/st.stop() raise through here).
+    """
+    if not PROFILE_RERUNS:
+        yield None
+        return
+
+    profile = RerunProfile(page, session_id)
+    token = _current.set(profile)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.render_ms = (time.perf_counter() - start) * 1000
+        _current.reset(token)
+        record = profile.to_dict()
+        with _HISTORY_LOCK:
+            _HISTORY.append(record)
+        if PROFILE_LOG_PATH:
+            _write_sink(record)
+
+
+@contextmanager
+def span(name):
+    """Times a block inside the current rerun (no-op outside one)."""
+    profile = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.spans.append((name, (time.perf_counter() - start) * 1000))
+
+
+def recent_reruns(session_id=None, limit=50):
+    """Newest first, optionally only one session's reruns."""
+    with _HISTORY_LOCK:
+        records = list(_HISTORY)
+    if session_id:
+        records = [r for r in records if r["session"] == session_id]
+    return records[::-1][:limit]
+
+
+def page_summary():
+    """Per page over the in-memory history: reruns, mean queries, mean bytes, mean/max render ms."""
+    with _HISTORY_LOCK:
+        records = list(_HISTORY)
+    pages = {}
+    for r in records:
+        pages.setdefault(r["page"], []).append(r)
+
+    summary = []
+    for page, rows in pages.items():
+        n = len(rows)
+        summary.append({
+            "page": page,
+            "reruns": n,
+            "mean_queries": round(sum(r["queries"] for r in rows) / n, 1),
+            "mean_bytes": int(sum(r["bytes"] for r in rows) / n),
+            "mean_server_ms": round(sum(r["server_ms"] for r in rows) / n, 2),
+            "mean_render_ms": round(sum(r["render_ms"] for r in rows) / n, 2),
+            "max_render_ms": round(max(r["render_ms"] for r in rows), 2),
+        })
+    return sorted(summary, key=lambda s: -s["mean_render_ms"])
+
+
+def unattributed_totals():
+    with _PROFILER._lock:
+        return dict(_PROFILER.unattributed, server_ms=round(_PROFILER.unattributed["server_ms"], 2))
@@ -1,146 +1,303 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from data.database import FAMILY_COLLECTION
+from data.snapshot import snapshot_active
+from handlers.graph_index import (INDEX_PROJECTION, as_name_list,
+                                  get_graph_index, links_to_parent,
+                                  name_slug_links, parent_links,
+                                  peek_graph_index, spouse_link,
+                                  warm_graph_index)
+
+# How get_relatives resolves relatives:
+#   "index"   - always answer from the shared in-memory FamilyGraphIndex
+#   "batched" - one $in query per generation straight against Mongo
+#   "concurrent" - batched, with a generation's independent queries sent at the same time
+#   "auto"    - index when it is already built, concurrent (while the index warms up) otherwise
+RELATIVES_MODE = os.getenv("RELATIVES_MODE", "auto").lower()
+# Fan-out pool size (shared by all sessions) and how long one generation may take
+RELATIVES_FANOUT_WORKERS = int(os.getenv("RELATIVES_FANOUT_WORKERS", "8"))
+RELATIVES_LOOKUP_TIMEOUT_MS = int(os.getenv("RELATIVES_LOOKUP_TIMEOUT_MS", "5000"))
 
-def get_relatives(slug):
+
+def get_relatives(slug, mode=None):
     """
     Fetches relatives for a person based on their unique SLUG.
-    
+
+    In "index" mode a profile view costs no Mongo round trips once the index is warm.
+    In "batched" mode it costs at most 5 round trips, however big the family is.
+    In "concurrent" mode the same queries take 3 round trips of wall time
+    (the member, then one per generation).
+
     Args:
         slug (str): The unique identifier (e.g., 'amit-kumar-1') of the person.
-    
+        mode (str): Overrides RELATIVES_MODE for this call.
+
     Returns:
         dict: A dictionary containing the target person and all found relatives.
     """
-    
-    # 1. Fetch the TARGET PERSON by SLUG (Precision Lookup)
-    person = FAMILY_COLLECTION.find_one({"slug": slug})
-    
+    source = _get_relatives_source(mode or RELATIVES_MODE)
+
+    # 1. Fetch the TARGET PERSON by SLUG (falls back to name for old callers)
+    person = source.find_member(slug)
     if not person:
-        # Fallback: If slug logic fails or old code calls with name, try name lookup
-        # This prevents the app from crashing during transition
-        person = FAMILY_COLLECTION.find_one({"name": slug})
+        return None
+
+    return _assemble_relatives(person, source)
+
+
+def _get_relatives_source(mode):
+    if mode == "index" or snapshot_active():
+        return get_graph_index()
+    if mode == "batched":
+        return BatchedMongoSource(FAMILY_COLLECTION)
+    if mode == "concurrent":
+        return ConcurrentMongoSource(FAMILY_COLLECTION)
+
+    # "auto": never make a visitor wait for the full scan
+    index = peek_graph_index()
+    if index is not None:
+        return index
+    warm_graph_index()
+    return ConcurrentMongoSource(FAMILY_COLLECTION)
+
+
+class BatchedMongoSource:
+    """
+    Resolves a generation with one {"$in": [...]} query per relation type,
+    instead of one find_one per person.
+    """
+
+    # Server-side limit per query (None = no limit), set by ConcurrentMongoSource
+    max_time_ms = None
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def _find(self, query):
+        # A copy per query: the projection dict is shared by every fan-out thread
+        cursor = self.collection.find(query, dict(INDEX_PROJECTION))
+        return cursor.max_time_ms(self.max_time_ms) if self.max_time_ms else cursor
+
+    def find_member(self, slug):
+        person = self.collection.find_one({"slug": slug}, INDEX_PROJECTION)
         if not person:
-            return None
+            # Fallback: If slug logic fails or old code calls with name, try name lookup
+            person = self.collection.find_one({"name": slug}, INDEX_PROJECTION)
+        return person
+
+    def _find_docs(self, names, slugs):
+        """Names and slug links in one round trip."""
+        docs_by_name, docs_by_slug = {}, {}
+        query = {"$or": [{"name": {"$in": names}}, {"slug": {"$in": slugs}}]}
+        for doc in self._find(query):
+            if doc.get('name') in names:
+                # First one wins, same as find_one
+                docs_by_name.setdefault(doc['name'], doc)
+            if doc.get('slug') in slugs:
+                docs_by_slug[doc['slug']] = doc
+        return docs_by_name, docs_by_slug
+
+    def _find_children(self, parents):
+        parent_names = list(dict.fromkeys(n for n, _ in parents if n))
+        parent_slugs = list(dict.fromkeys(s for _, s in parents if s))
+        query = {"$or": [{"parents": {"$in": parent_names}}, {"parent_slugs": {"$in": parent_slugs}}]}
+        return [
+            child for child in self._find(query)
+            if any(links_to_parent(child, n, s) for n, s in parents)
+        ]
+
+    @staticmethod
+    def _clean(names, parents, slugs):
+        return (list(dict.fromkeys(n for n in names if n)),
+                [(n, s) for n, s in parents if n or s],
+                list(dict.fromkeys(s for s in slugs if s)))
+
+    def fetch(self, names, parents=(), slugs=()):
+        names, parents, slugs = self._clean(names, parents, slugs)
+        docs_by_name, docs_by_slug = self._find_docs(names, slugs) if names or slugs else ({}, {})
+        children = self._find_children(parents) if parents else []
+        return docs_by_name, children, docs_by_slug
+
+
+class ConcurrentMongoSource(BatchedMongoSource):
+    """
+    BatchedMongoSource with the independent lookups of a generation (the
+    parents/spouse/in-laws $in and the children $in) sent at the same time on a
+    shared, bounded thread pool. A generation then costs one round trip of wall
+    time instead of two.
+
+    Each query carries maxTimeMS, and the whole generation gives up after
+    timeout_ms with a TimeoutError instead of hanging the page.
+    """
+
+    def __init__(self, collection, pool=None, timeout_ms=None):
+        super().__init__(collection)
+        self.pool = pool or _fanout_pool()
+        self.timeout_ms = timeout_ms or RELATIVES_LOOKUP_TIMEOUT_MS
+        self.max_time_ms = self.timeout_ms
+
+    def _submit(self, fn, *args):
+        # Copy the caller's context so per-rerun profiling still sees these queries
+        return self.pool.submit(contextvars.copy_context().run, fn, *args)
+
+    def _wait(self, futures):
+        done, pending = wait(futures, timeout=self.timeout_ms / 1000)
+        if pending:
+            for future in pending:
+                future.cancel()
+            raise TimeoutError(f"Relative lookups took longer than {self.timeout_ms} ms")
+        return [future.result() for future in futures]
 
+    def find_member(self, slug):
+        # Slug and the old name fallback in one round trip, the slug match wins
+        by_slug, by_name = None, None
+        for doc in self._find({"$or": [{"slug": slug}, {"name": slug}]}):
+            if doc.get('slug') == slug:
+                by_slug = doc
+                break
+            by_name = by_name or doc
+        return by_slug or by_name
+
+    def fetch(self, names, parents=(), slugs=()):
+        names, parents, slugs = self._clean(names, parents, slugs)
+        futures = []
+        if names or slugs:
+            futures.append(self._submit(self._find_docs, names, slugs))
+        if parents:
+            futures.append(self._submit(self._find_children, parents))
+        results = self._wait(futures)
+
+        docs_by_name, docs_by_slug = results.pop(0) if names or slugs else ({}, {})
+        children = results.pop(0) if parents else []
+        return docs_by_name, children, docs_by_slug
+
+
+_FANOUT_POOL = None
+_FANOUT_POOL_LOCK = threading.Lock()
+
+
+def _fanout_pool():
+    """Process-wide pool, so concurrent sessions together never exceed RELATIVES_FANOUT_WORKERS lookups."""
+    global _FANOUT_POOL
+    if _FANOUT_POOL is None:
+        with _FANOUT_POOL_LOCK:
+            if _FANOUT_POOL is None:
+                _FANOUT_POOL = ThreadPoolExecutor(max_workers=RELATIVES_FANOUT_WORKERS,
+                                                  thread_name_prefix="relatives-fanout")
+    return _FANOUT_POOL
+
+
+def _assemble_relatives(person, source):
+    """
+    Builds the relatives dict for 'person', one generation at a time.
+
+    'source' must provide fetch(names, parents, slugs) -> (docs_by_name, children, docs_by_slug):
+    the first member doc for each name, every doc listing one of the (name, slug)
+    parents as a parent, and the doc for each slug. Each generation is exactly one fetch() call.
+
+    Links are (name, slug) pairs: the slug (written by data/slug_links.py) is an exact
+    join and wins when present, the name is the fallback for unmigrated links.
+    """
     # We need the Name String to find relationships because your DB currently
     # links people via strings (e.g., "parents": ["Suresh"])
     target_name_string = person['name']
+    target_slug = person.get('slug')
+    spouse_name_string, spouse_slug = spouse_link(person)
 
-    # --- Helper: Name-based Lookup ---
-    # Used for looking up parents/spouses referenced by name string
-    def get_by_name(name_str):
-        if not name_str: return None
-        # Note: If multiple people have the same name, this picks the first one.
-        # This is a limitation of name-based linking.
-        return FAMILY_COLLECTION.find_one({"name": name_str})
+    raw_parents = parent_links(person)
+    stored_in_laws = name_slug_links(person, "parents_in_law", "parents_in_law_slugs")
+
+    # Note: For an unresolved name shared by several people, fetch() picks the first one.
+    # This is a limitation of name-based linking, slug links don't have it.
+    def get_link(found, link):
+        name_str, slug = link
+        doc = found[1].get(slug) if slug else None
+        if doc is None and name_str:
+            doc = found[0].get(name_str)
+        return dict(doc) if doc else None
+
+    def fetch(links, parents):
+        return source.fetch(
+            [n for n, s in links if n and not s],
+            parents,
+            [s for _, s in links if s]
+        )
+
+    # --- Generation 1: Parents, Spouse, stored Parents-in-Law, Children ---
+    by_name, raw_children, by_slug = fetch(
+        raw_parents + [(spouse_name_string, spouse_slug)] + stored_in_laws,
+        [(target_name_string, target_slug)]
+    )
+    found = (by_name, by_slug)
 
     # 2. Parents
-    parents = []
-    raw_parents = person.get("parents", [])
-    for p_name in raw_parents:
-        p_doc = get_by_name(p_name)
-        if p_doc:
-            parents.append(p_doc)
-
-    # 3. Grandparents
-    grandparents = []
-    for parent in parents:
-        gp_names = parent.get("parents", [])
-        for gp_name in gp_names:
-            gp_doc = get_by_name(gp_name)
-            if gp_doc:
-                grandparents.append(gp_doc)
+    parents = [doc for doc in (get_link(found, p) for p in raw_parents) if doc]
+
+    # 3. Spouse
+    spouse = get_link(found, (spouse_name_string, spouse_slug))
 
     # 4. Children
-    # Find all docs where 'parents' array contains the target's NAME
-    target_name_string = person['name']
-    spouse_name_string = person.get('spouse')
-    raw_children = list(FAMILY_COLLECTION.find({"parents": target_name_string}))
-    
-    children = []
-    
-    for child in raw_children:
-        child_parents = child.get('parents', [])
-        
-        # LOGIC: If I have a spouse, and this child has 2 parents, 
-        # check if the OTHER parent matches MY spouse.
-        
-        if spouse_name_string and len(child_parents) > 1:
-            # Find the parent that is NOT me
-            # (Handle case where both parents might be named Renu, rare but possible)
-            other_parents = [p for p in child_parents if p != target_name_string]
-            
-            if other_parents:
-                other_parent = other_parents[0] # Take the first co-parent
-                
-                # STRING COMPARISON: Loosely check if spouses match
-                # e.g. "Mukesh Kumar" vs "Mukesh Kumar Sharma"
-                # If they are completely different, it's likely the WRONG Renu's child.
-                
-                # Check 1: Exact Match
-                if other_parent == spouse_name_string:
-                    children.append(child)
-                    
-                # Check 2: Partial Match (e.g. Mukesh vs Mukesh Kumar)
-                elif other_parent in spouse_name_string or spouse_name_string in other_parent:
-                     children.append(child)
-                     
-                else:
-                    # Debug: "Skipping child {child['name']} because co-parent {other_parent} != {spouse_name_string}"
-                    continue 
-            else:
-                # No co-parent found (or I am listed twice?), safe to include or investigate
-                children.append(child)
-        else:
-            # If I have no spouse listed, or child only has 1 parent listed, 
-            # we can't filter safely, so we include them.
-            children.append(child)
+    children = _filter_children_by_spouse(raw_children, target_name_string, spouse_name_string, target_slug)
+
+    # --- Generation 2: Grandparents, derived Parents-in-Law, Children's spouses, Grandchildren ---
+    gp_links = [gp for parent in parents for gp in parent_links(parent)]
+
+    # Logic: If not explicitly stored, try to get Spouse's parents
+    raw_in_laws = stored_in_laws
+    if not raw_in_laws and spouse:
+        raw_in_laws = parent_links(spouse)
 
-    # 5. Grandchildren
+    child_spouse_links = [spouse_link(c) for c in children if spouse_link(c)[0]]
+    child_links = [(c['name'], c.get('slug')) for c in children]
+
+    next_links = [
+        (n, s) for n, s in gp_links + raw_in_laws + child_spouse_links
+        if (s and s not in by_slug) or (not s and n not in by_name)
+    ]
+    next_by_name, raw_grandchildren, next_by_slug = fetch(next_links, child_links)
+    by_name.update(next_by_name)
+    by_slug.update(next_by_slug)
+
+    # 5. Grandparents
+    grandparents = [doc for doc in (get_link(found, gp) for gp in gp_links) if doc]
+
+    # 6. Grandchildren
     grandchildren = []
     for child in children:
         child_name = child['name']
-        # Find anyone who lists THIS child as a parent
-        gc_cursor = FAMILY_COLLECTION.find({"parents": child_name})
-        gcs = list(gc_cursor)
-        
-        # Tag them for context
-        for gc in gcs:
-            gc['child_of'] = child_name
-            grandchildren.append(gc)
-
-    # 6. Spouse
-    spouse_name = person.get("spouse", "")
-    spouse = get_by_name(spouse_name) if spouse_name else None
+        # Anyone who lists THIS child as a parent, tagged for context
+        for gc in raw_grandchildren:
+            if links_to_parent(gc, child_name, child.get('slug')):
+                gc = dict(gc)
+                gc['child_of'] = child_name
+                grandchildren.append(gc)
 
     # 7. Parents-in-Law
     parents_in_law = []
-    raw_in_laws = person.get("parents_in_law", [])
-    
-    # Logic: If not explicitly stored, try to get Spouse's parents
-    if not raw_in_laws and spouse:
-        raw_in_laws = spouse.get("parents", [])
-
-    for pl_name in raw_in_laws:
-        pl_doc = get_by_name(pl_name)
+    for pl_link in raw_in_laws:
+        pl_doc = get_link(found, pl_link)
         if pl_doc:
             parents_in_law.append(pl_doc)
         else:
             # Create dummy object if DB record missing but name is known
-            parents_in_law.append({'name': pl_name, 'gender': 'Unknown'})
+            parents_in_law.append({'name': pl_link[0], 'gender': 'Unknown'})
 
     # 8. Children-in-Law
     children_in_law = []
     for child in children:
-        c_spouse_name = child.get("spouse")
-        if c_spouse_name:
-            c_spouse = get_by_name(c_spouse_name)
+        c_spouse_link = spouse_link(child)
+        if c_spouse_link[0]:
+            c_spouse = get_link(found, c_spouse_link)
             if c_spouse:
                 c_spouse['spouse_of'] = child['name']
                 children_in_law.append(c_spouse)
             else:
                 children_in_law.append({
-                    'name': c_spouse_name, 
-                    'gender': 'Unknown', 
+                    'name': c_spouse_link[0],
+                    'gender': 'Unknown',
                     'spouse_of': child['name']
                 })
 
@@ -154,3 +311,52 @@ def get_relatives(slug):
         "parents_in_law": parents_in_law,
         "children_in_law": children_in_law
     }
+
+
+def _filter_children_by_spouse(raw_children, target_name_string, spouse_name_string, target_slug=None):
+    """Drops children whose co-parent clearly isn't the target's spouse (same-name parents)."""
+    children = []
+
+    for child in raw_children:
+        # A slug link to the target is exact, no guessing needed
+        if target_slug and any(s == target_slug for _, s in parent_links(child)):
+            children.append(child)
+            continue
+
+        child_parents = as_name_list(child.get('parents'))
+
+        # LOGIC: If I have a spouse, and this child has 2 parents,
+        # check if the OTHER parent matches MY spouse.
+
+        if spouse_name_string and len(child_parents) > 1:
+            # Find the parent that is NOT me
+            # (Handle case where both parents might be named Renu, rare but possible)
+            other_parents = [p for p in child_parents if p != target_name_string]
+
+            if other_parents:
+                other_parent = other_parents[0] # Take the first co-parent
+
+                # STRING COMPARISON: Loosely check if spouses match
+                # e.g. "Mukesh Kumar" vs "Mukesh Kumar Sharma"
+                # If they are completely different, it's likely the WRONG Renu's child.
+
+                # Check 1: Exact Match
+                if other_parent == spouse_name_string:
+                    children.append(child)
+
+                # Check 2: Partial Match (e.g. Mukesh vs Mukesh Kumar)
+                elif other_parent in spouse_name_string or spouse_name_string in other_parent:
+                     children.append(child)
+
+                else:
+                    # Debug: "Skipping child {child['name']} because co-parent {other_parent} != {spouse_name_string}"
+                    continue
+            else:
+                # No co-parent found (or I am listed twice?), safe to include or investigate
+                children.append(child)
+        else:
+            # If I have no spouse listed, or child only has 1 parent listed,
+            # we can't filter safely, so we include them.
+            children.append(child)
+
+    return children
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import graphviz
+
+# In-memory entries kept per process, and the on-disk budget shared by all processes
+TREE_CACHE_DIR = os.getenv("TREE_CACHE_DIR", os.path.join(".cache", "trees"))
+TREE_CACHE_MEMORY_ITEMS = int(os.getenv("TREE_CACHE_MEMORY_ITEMS", "64"))
+TREE_CACHE_DISK_MB = int(os.getenv("TREE_CACHE_DISK_MB", "200"))
+
+
+def layout_svg(dot_source):
+    """
+    Lays the DOT source out server-side with the graphviz 'dot' binary.
+    Returns None if graphviz isn't installed, the caller then falls back to browser layout.
+    """
+    try:
+        svg = graphviz.Source(dot_source).pipe(format="svg").decode("utf-8")
+    except Exception:
+        return None
+    # Drop the XML prolog/doctype so the SVG can be embedded in HTML
+    start = svg.find("<svg")
+    return svg[start:] if start >= 0 else svg
+
+
+class TreeRenderCache:
+    """
+    Two-level cache of rendered trees:
+    {"dot": <DOT source>, "svg": <laid-out SVG or None>, "stubs": <truncated branches>}.
+
+    Level 1 is a per-process LRU (OrderedDict), level 2 is a directory of JSON files
+    evicted oldest-first once it grows past max_disk_bytes.
+    Keys are built from (center slug, data version, style options), so a data change
+    simply stops hitting old entries and they age out.
+    """
+
+    def __init__(self, directory=TREE_CACHE_DIR, max_items=TREE_CACHE_MEMORY_ITEMS,
+                 max_disk_bytes=TREE_CACHE_DISK_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(center_slug, version, style=None):
+        raw = json.dumps([center_slug, version, style or {}], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, dot_source, svg=None, stubs=None):
+        entry = {"dot": dot_source, "svg": svg, "stubs": stubs or []}
+        with self._lock:
+            self._remember(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    # --- Disk level ---
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # Keeps popular trees at the young end for eviction
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key, entry):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except OSError:
+            # Disk cache is best effort, memory level still works
+            pass
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+
+
+TREE_RENDER_CACHE = TreeRenderCache()
+
+
+def get_or_render_tree(center_slug, version, style, build_dot):
+    """
+    Returns the cached {"dot", "svg", "stubs"} for this focus person/version/style,
+    or builds it with build_dot() -> (graphviz.Digraph or None, stubs) and stores it.
+    A repeat view skips both the graph traversal and the layout.
+    """
+    key = TREE_RENDER_CACHE.make_key(center_slug, version, style)
+    entry = TREE_RENDER_CACHE.get(key)
+    if entry is not None:
+        return entry
+
+    dot, stubs = build_dot()
+    if dot is None:
+        return None
+    return TREE_RENDER_CACHE.put(key, dot.source, layout_svg(dot.source), stubs)
@@ -0,0 +1,230 @@
+import heapq
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+
+from data.data_version import VersionedResource
+from handlers.label_index import _SHARED_LABELS, get_label_index
+
+# How many matches reach the client, and how long a prefix key the index stores
+TYPEAHEAD_TOP_K = int(os.getenv("TYPEAHEAD_TOP_K", "25"))
+PREFIX_KEY_LEN = 6
+NGRAM = 3
+
+# Field weights: a hit on the person's own name beats a hit on the father's name
+FIELD_WEIGHTS = {"name": 3, "father": 2, "slug": 1}
+
+
+def normalize(text):
+    """Lowercase, strip accents, and turn every non letter/digit run into one space."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def _ngrams(token):
+    padded = f" {token} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+class TypeaheadIndex:
+    """
+    Prefix + trigram index over normalized names, father names and slugs.
+
+    - prefixes: first 1..PREFIX_KEY_LEN chars of every token -> {slug: best field weight}
+    - ngrams:   trigrams of every token -> {slugs}, used when nothing matches by prefix (typos)
+
+    Writes patch a copy() that shares the buckets with this index and copies a
+    bucket the first time it changes it, so readers never see a bucket move.
+    """
+
+    def __init__(self, label_index):
+        self.labels = label_index.slug_to_label
+        self.prefixes = {}
+        self.ngrams = {}
+        self.tokens = {}
+        # (map, key) of the buckets this index owns; None: all of them (a fresh build)
+        self._owned = None
+
+        for slug, doc in list(label_index.docs.items()):
+            self.add(slug, doc)
+
+    def copy(self):
+        new = object.__new__(TypeaheadIndex)
+        new.labels = self.labels
+        new.prefixes = dict(self.prefixes)
+        new.ngrams = dict(self.ngrams)
+        new.tokens = dict(self.tokens)
+        new._owned = set()
+        return new
+
+    def _bucket(self, mapping, kind, key, empty):
+        """mapping[key], safe to change: a bucket still shared with the live index is copied first."""
+        bucket = mapping.get(key)
+        if bucket is None:
+            bucket = mapping[key] = empty()
+        elif self._owned is not None and (kind, key) not in self._owned:
+            bucket = mapping[key] = bucket.copy()
+        if self._owned is not None:
+            self._owned.add((kind, key))
+        return bucket
+
+    @staticmethod
+    def _fields(slug, doc):
+        parents = doc.get('parents')
+        father = parents[0] if isinstance(parents, list) and parents else parents
+        return {"name": doc.get('name'), "father": father if isinstance(father, str) else "", "slug": slug}
+
+    def add(self, slug, doc):
+        tokens = {}
+        for field, value in self._fields(slug, doc).items():
+            for token in normalize(value).split():
+                tokens[token] = max(tokens.get(token, 0), FIELD_WEIGHTS[field])
+        self.tokens[slug] = tokens
+
+        for token, weight in tokens.items():
+            for i in range(1, min(len(token), PREFIX_KEY_LEN) + 1):
+                bucket = self._bucket(self.prefixes, "prefix", token[:i], dict)
+                bucket[slug] = max(bucket.get(slug, 0), weight)
+            for gram in _ngrams(token):
+                self._bucket(self.ngrams, "ngram", gram, set).add(slug)
+
+    def remove(self, slug):
+        for token in self.tokens.pop(slug, {}):
+            for i in range(1, min(len(token), PREFIX_KEY_LEN) + 1):
+                if token[:i] in self.prefixes:
+                    self._bucket(self.prefixes, "prefix", token[:i], dict).pop(slug, None)
+            for gram in _ngrams(token):
+                if gram in self.ngrams:
+                    self._bucket(self.ngrams, "ngram", gram, set).discard(slug)
+
+    def signature(self):
+        return self.tokens
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _prefix_hits(self, query_token):
+        """slug -> weight for members that have a token starting with query_token."""
+        bucket = self.prefixes.get(query_token[:PREFIX_KEY_LEN], {})
+        if len(query_token) <= PREFIX_KEY_LEN:
+            return bucket
+        hits = {}
+        for slug in bucket:
+            weights = [w for t, w in self.tokens[slug].items() if t.startswith(query_token)]
+            if weights:
+                hits[slug] = max(weights)
+        return hits
+
+    def _fuzzy_hits(self, query_token):
+        """slug -> similarity (0..1) for members sharing at least half of the token's trigrams."""
+        grams = _ngrams(query_token)
+        counts = {}
+        for gram in grams:
+            for slug in self.ngrams.get(gram, ()):
+                counts[slug] = counts.get(slug, 0) + 1
+        needed = max(1, len(grams) // 2)
+        return {slug: count / len(grams) for slug, count in counts.items() if count >= needed}
+
+    def search(self, query, k=TYPEAHEAD_TOP_K, labels=None):
+        """
+        Returns up to k (slug, label) pairs. Every query word must match some word of
+        the member: by prefix if possible, else by trigram similarity (typos).
+        """
+        query_tokens = normalize(query).split()
+        if not query_tokens:
+            return []
+
+        scores = None
+        for token in query_tokens:
+            hits = self._prefix_hits(token) or self._fuzzy_hits(token)
+            if scores is None:
+                scores = dict(hits)
+            else:
+                scores = {slug: score + hits[slug] for slug, score in scores.items() if slug in hits}
+            if not scores:
+                return []
+
+        labels = self.labels if labels is None else labels
+        # nsmallest keeps this O(n log k) even for a one-letter query
+        ranked = heapq.nsmallest(k, scores.items(), key=lambda item: (-item[1], labels.get(item[0], "")))
+        return [(slug, labels.get(slug, slug)) for slug, _ in ranked]
+
+
+def _apply_delta(index, delta):
+    """Catch-up from data/member_sync.py. Reads the label index, which catches up first."""
+    label_index = get_label_index()
+    for slug in delta.removed_slugs:
+        index.remove(slug)
+    for m in delta.upserted:
+        slug = m.get('slug') or m.get('name')
+        index.remove(slug)
+        if slug in label_index.docs:
+            index.add(slug, label_index.docs[slug])
+
+
+# --- Shared instance (rebuilt from the label index, no DB work) ---
+_SHARED_TYPEAHEAD = VersionedResource(lambda: TypeaheadIndex(get_label_index()), name="typeahead_index",
+                                      delta=_apply_delta)
+
+
+def patch_typeahead_index(change, upserted=(), removed_slugs=()):
+    """Applies one write (to a copy that is swapped in). Call after patch_label_index (labels are read from it)."""
+    # Never build the label index on the write path: without it, skip and catch up on next get()
+    label_index = _SHARED_LABELS.peek()
+    if label_index is None:
+        return False
+
+    def apply(index):
+        for slug in removed_slugs:
+            index.remove(slug)
+        for m in upserted:
+            old_slug = m.get('_old_slug')
+            slug = m.get('slug') or m.get('name')
+            if old_slug:
+                index.remove(old_slug)
+            index.remove(slug)
+            if slug in label_index.docs:
+                index.add(slug, label_index.docs[slug])
+
+    return _SHARED_TYPEAHEAD.patch(change, apply)
+
+
+def verify_typeahead_index():
+    """Run after verify_label_index: the fresh index is built from the label index."""
+    return _SHARED_TYPEAHEAD.verify(TypeaheadIndex.signature)
+
+
+# --- Latency metrics ---
+_LATENCIES_MS = deque(maxlen=2000)
+_LATENCY_LOCK = threading.Lock()
+
+
+def search_members(query, k=TYPEAHEAD_TOP_K):
+    """Typeahead API: top-k (slug, label) matches for a partial query."""
+    index = _SHARED_TYPEAHEAD.get()
+    # Labels come from the live label index in case it was rebuilt after this index
+    labels = get_label_index().slug_to_label
+
+    start = time.perf_counter()
+    results = index.search(query, k, labels=labels)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    with _LATENCY_LOCK:
+        _LATENCIES_MS.append(elapsed_ms)
+    return results
+
+
+def get_typeahead_stats():
+    """p50/p95/max latency (ms) over the last searches served by this process."""
+    with _LATENCY_LOCK:
+        samples = sorted(_LATENCIES_MS)
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+    def pct(p):
+        return round(samples[min(len(samples) - 1, int(p * len(samples)))], 3)
+
+    return {"count": len(samples), "p50_ms": pct(0.50), "p95_ms": pct(0.95), "max_ms": round(samples[-1], 3)}
@@ -0,0 +1,74 @@
+"""
+Tests run against an in-memory mongomock database, never the MONGO_URI of .env.
+
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+
+Tests of bulk_write paths are marked @bulk_write_works and skipped with a newer
+pymongo than requirements-dev.txt pins (mongomock 4.3 can't run its bulk_write).
+"""
+import inspect
+import os
+
+# Before data.database reads them: no real server, no background consistency check
+os.environ["MONGO_URI"] = "mongodb://localhost:1"
+os.environ["CONSISTENCY_CHECK_SECONDS"] = "0"
+os.environ.pop("READ_ONLY_SNAPSHOT", None)
+
+import pymongo
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from benchmarks.village import load_village, synthetic_village
+from data import data_version, database, member_sync
+from handlers.graph_handlers import _SHARED_FAMILY_GRAPH, get_family_graph
+from handlers.graph_index import _SHARED_INDEX, get_graph_index
+from handlers.label_index import _SHARED_LABELS, get_label_index
+from handlers.typeahead import _SHARED_TYPEAHEAD, search_members
+
+# mongomock 4.3 runs pymongo's bulk_write only below pymongo 4.11 (requirements-dev.txt)
+bulk_write_works = pytest.mark.skipif(
+    "sort" in inspect.signature(pymongo.UpdateOne.__init__).parameters
+    and "sort" not in inspect.signature(mongomock.collection.BulkOperationBuilder.add_update).parameters,
+    reason="mongomock can't run this pymongo's bulk_write (pip install -r requirements-dev.txt)")
+
+SHARED_RESOURCES = [_SHARED_INDEX, _SHARED_FAMILY_GRAPH, _SHARED_LABELS, _SHARED_TYPEAHEAD]
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database; shared structures and version caches start empty."""
+    database.db_name = "ancestory_test"
+    database.set_client(mongomock.MongoClient())
+    data_version._cached_version = None
+    member_sync._last_fetch.update(version=None, start=None, delta=None)
+    for resource in SHARED_RESOURCES:
+        resource.invalidate()
+    yield database.get_db()
+    for resource in SHARED_RESOURCES:
+        resource.invalidate()
+    database.set_client(None)
+
+
+@pytest.fixture
+def village(db):
+    """600 synthetic members loaded, every shared structure built for them."""
+    docs = synthetic_village(600, seed=5)
+    load_village(docs)
+    warm_shared()
+    return docs
+
+
+def warm_shared():
+    get_graph_index()
+    get_family_graph()
+    get_label_index()
+    search_members("a")
+
+
+def assert_matches_rebuild():
+    """Every shared structure holds what a fresh build from the collection would."""
+    for resource in SHARED_RESOURCES:
+        assert resource.value is not None, resource.name
+        assert resource.value.signature() == resource._builder().signature(), resource.name
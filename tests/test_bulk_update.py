@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from data.bulk_update import PROTECTED_FIELDS, _process_update_logic
+from data.database import FAMILY_COLLECTION
+from handlers.label_index import get_label_index
+
+from conftest import assert_matches_rebuild, bulk_write_works
+
+
+@pytest.mark.parametrize("field", sorted(PROTECTED_FIELDS))
+def test_protected_fields_are_rejected(village, field):
+    before = list(FAMILY_COLLECTION.find({}, {"_id": 0}))
+    _process_update_logic(pd.DataFrame({"slug": [village[0]["slug"]], "new": ["x"]}), "slug", "new", field)
+    assert list(FAMILY_COLLECTION.find({}, {"_id": 0})) == before
+
+
+@bulk_write_works
+def test_updates_changed_rows_and_patches_the_indexes(village):
+    rows = village[:6]
+    df = pd.DataFrame({
+        "slug": [d["slug"] for d in rows] + ["no-such-slug", None],
+        "work": ["Potter", rows[1]["work"], "Potter", None, "Potter", "Potter", "Potter", "Potter"],
+    })
+    _process_update_logic(df, "slug", "work", "work")
+    assert [FAMILY_COLLECTION.find_one({"slug": d["slug"]})["work"] for d in rows] == \
+        ["Potter", rows[1]["work"], "Potter", rows[3]["work"], "Potter", "Potter"]
+    assert_matches_rebuild()
+
+
+@bulk_write_works
+def test_renames_reach_the_label_index(village):
+    person = village[10]
+    _process_update_logic(pd.DataFrame({"slug": [person["slug"]], "name": ["Renamed Person"]}), "slug", "name", "name")
+    assert get_label_index().get_name(person["slug"]) == "Renamed Person"
+    assert_matches_rebuild()
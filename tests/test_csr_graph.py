@@ -0,0 +1,76 @@
+import random
+
+import networkx as nx
+import pytest
+
+from benchmarks.village import synthetic_village
+from handlers.csr_graph import CSRGraph
+
+
+def _nx_graph(members):
+    """The DiGraph FamilyGraph builds with the networkx backend."""
+    graph = nx.DiGraph()
+    for person in members:
+        graph.add_node(person["name"])
+        for parent in person.get("parents") or []:
+            if parent:
+                graph.add_edge(parent, person["name"])
+    return graph
+
+
+def _assert_same_reach(csr, graph):
+    assert set(csr.nodes) == set(graph.nodes)
+    assert set(csr.edges) == set(graph.edges)
+    for name in graph.nodes:
+        assert csr.ancestors(name) == nx.ancestors(graph, name), name
+        assert csr.descendants(name) == nx.descendants(graph, name), name
+
+
+@pytest.fixture(scope="module")
+def village():
+    return synthetic_village(1500, seed=3)
+
+
+def test_reach_matches_networkx(village):
+    _assert_same_reach(CSRGraph.from_members(village), _nx_graph(village))
+
+
+def test_reach_matches_networkx_after_edits(village):
+    csr, graph = CSRGraph.from_members(village), _nx_graph(village)
+    rnd = random.Random(11)
+    names = list(graph.nodes)
+    for _ in range(3):
+        for parent, child in rnd.sample(list(graph.edges), 40):
+            csr.remove_edge(parent, child)
+            graph.remove_edge(parent, child)
+        for _ in range(40):
+            parent, child = rnd.sample(names, 2)
+            # Keep it a forest of families: no cycles
+            if parent not in nx.descendants(graph, child):
+                csr.add_edge(parent, child)
+                graph.add_edge(parent, child)
+        csr.add_edge("Newcomer Parent", names[0])
+        graph.add_edge("Newcomer Parent", names[0])
+        names.append("Newcomer Parent")
+        csr.refresh()
+        _assert_same_reach(csr, graph)
+
+
+def test_copy_leaves_the_original_alone(village):
+    csr = CSRGraph.from_members(village)
+    child = next(p for p in village if p.get("parents"))
+    before = csr.ancestors(child["name"])
+
+    edited = csr.copy()
+    for parent in child["parents"]:
+        edited.remove_edge(parent, child["name"])
+    edited.refresh()
+
+    assert csr.ancestors(child["name"]) == before
+    assert edited.ancestors(child["name"]) == set()
+
+
+def test_unknown_name_raises_like_networkx():
+    csr = CSRGraph.from_members([{"name": "A", "parents": ["B"]}])
+    with pytest.raises(KeyError):
+        csr.ancestors("Nobody")
@@ -0,0 +1,55 @@
+import threading
+
+import mongomock
+
+from data import database
+from data.database import FAMILY_COLLECTION, client_options, get_client, set_client, warm_up
+
+
+def test_client_options_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "20")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zstd,zlib")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "")
+    assert client_options() == {"appname": "ancestory_search", "maxPoolSize": 20, "compressors": "zstd,zlib"}
+
+
+def test_one_lazy_client_for_every_thread(monkeypatch):
+    created = []
+
+    def fake_client(uri, **kwargs):
+        created.append(kwargs)
+        return mongomock.MongoClient()
+    monkeypatch.setattr(database, "MongoClient", fake_client)
+    monkeypatch.setattr(database, "_event_listeners", ["listener"])
+    set_client(None)
+    try:
+        assert not created
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(get_client())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(created) == 1 and all(c is clients[0] for c in clients)
+        assert created[0]["event_listeners"] == ["listener"]
+        assert database.client is clients[0]
+    finally:
+        set_client(None)
+
+
+def test_collections_follow_set_client(db):
+    FAMILY_COLLECTION.insert_one({"slug": "ram"})
+    assert FAMILY_COLLECTION.count_documents({}) == 1
+    set_client(mongomock.MongoClient())
+    assert FAMILY_COLLECTION.count_documents({}) == 0
+
+
+def test_warm_up_reports_errors(monkeypatch):
+    class Down:
+        class admin:
+            @staticmethod
+            def command(name):
+                raise ConnectionError("no server")
+    monkeypatch.setattr(database, "get_client", lambda: Down)
+    result = warm_up()
+    assert result["ok"] is False and result["error"] == "no server"
@@ -0,0 +1,55 @@
+import csv
+
+import pytest
+
+from data.database import FAMILY_COLLECTION
+from data.db_insert import run_streaming_update
+
+from conftest import bulk_write_works
+
+
+@pytest.fixture
+def members(db):
+    FAMILY_COLLECTION.insert_many([
+        {"slug": "ram-1", "name": "Ram Kumar", "association": "son"},
+        {"slug": "ram-2", "name": "Ram Kumar", "association": "son"},
+        {"slug": "sita", "name": "Sita Devi", "association": "daughter-in-law"},
+        {"slug": "amit", "name": "Amit Kumar", "association": "son"},
+    ])
+
+
+def _run(tmp_path, rows, chunk_size=2):
+    path = tmp_path / "update.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "association"])
+        writer.writerows(rows)
+    counts = run_streaming_update(str(path), chunk_size=chunk_size)
+    with open(f"{path}.rejects.csv", newline="") as f:
+        rejects = {row["name"]: row["reason"] for row in csv.DictReader(f)}
+    return counts, rejects
+
+
+def test_rejects_without_writing(members, tmp_path):
+    counts, rejects = _run(tmp_path, [
+        ["Ram Kumar", "grandson"],          # two members have this name
+        ["Sita Devi", "daughter-in-law"],   # already holds it
+        ["Nobody Here", "son"],
+        ["", "son"],
+    ])
+    assert counts == {"read": 4, "updated": 0, "unchanged": 1, "not_found": 1, "ambiguous": 1, "missing": 1}
+    assert rejects == {"Ram Kumar": "ambiguous", "Nobody Here": "not found", "": "missing data"}
+    assert {d["association"] for d in FAMILY_COLLECTION.find({"name": "Ram Kumar"})} == {"son"}
+
+
+@bulk_write_works
+def test_updates_only_changed_rows(members, tmp_path):
+    counts, rejects = _run(tmp_path, [
+        ["Amit Kumar", "grandson"],
+        ["Sita Devi", "daughter-in-law"],
+        ["Ram Kumar", "grandson"],
+    ])
+    assert (counts["updated"], counts["unchanged"], counts["ambiguous"]) == (1, 1, 1)
+    amit = FAMILY_COLLECTION.find_one({"slug": "amit"})
+    assert amit["association"] == "grandson" and "updated_at" in amit
+    assert "updated_at" not in FAMILY_COLLECTION.find_one({"slug": "sita"})
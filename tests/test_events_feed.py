@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from data.database import EVENTS_COLLECTION
+from handlers.events_feed import EventsFeed
+
+TODAY = datetime(2026, 3, 10)
+
+
+class CountingCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = 0
+
+    def find(self, *args, **kwargs):
+        self.finds += 1
+        return self.collection.find(*args, **kwargs)
+
+
+@pytest.fixture
+def events(db):
+    # Three events a day, so archive pages break inside a date
+    EVENTS_COLLECTION.insert_many([
+        {"title": f"Event {day} {i}", "date": TODAY + timedelta(days=day)}
+        for day in range(-5, 4) for i in range(3)
+    ])
+    return CountingCollection(EVENTS_COLLECTION)
+
+
+def test_upcoming_is_loaded_once_per_day(events):
+    feed = EventsFeed(events)
+    page, total = feed.upcoming_page(0, page_size=5, today=TODAY)
+    feed.upcoming_page(1, page_size=5, today=TODAY)
+    assert total == 12 and len(page) == 5 and events.finds == 1
+    assert [e["date"] for e in feed.upcoming(TODAY)] == sorted(e["date"] for e in feed.upcoming(TODAY))
+
+    # Midnight: yesterday's events drop out
+    assert len(feed.upcoming(TODAY + timedelta(days=1))) == 9 and events.finds == 2
+
+
+def test_invalidate_and_ttl_reload(events):
+    feed = EventsFeed(events)
+    feed.upcoming(TODAY)
+    EVENTS_COLLECTION.insert_one({"title": "New", "date": TODAY})
+    assert len(feed.upcoming(TODAY)) == 12
+
+    feed.invalidate()
+    assert len(feed.upcoming(TODAY)) == 13 and events.finds == 2
+
+    expiring = EventsFeed(events, ttl_seconds=-1)
+    expiring.upcoming(TODAY)
+    expiring.upcoming(TODAY)
+    assert events.finds == 4
+
+
+def test_archive_pages_cover_the_past_once(events):
+    feed = EventsFeed(events)
+    seen, after = [], None
+    while True:
+        page, after = feed.archive_page(after, page_size=4, today=TODAY)
+        seen += page
+        if after is None:
+            break
+
+    assert len(seen) == 15 and len({e["_id"] for e in seen}) == 15
+    keys = [(e["date"], e["_id"]) for e in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    finds = events.finds
+    assert feed.archive_page(None, page_size=4, today=TODAY)[0] == seen[:4]
+    assert events.finds == finds
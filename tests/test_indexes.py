@@ -0,0 +1,60 @@
+from pymongo import ASCENDING
+
+from data import indexes
+from data.database import EVENTS_COLLECTION, FAMILY_COLLECTION
+from data.indexes import REQUIRED_INDEXES, _plan_stages, ensure_indexes, index_problems
+
+
+def statuses(report):
+    return {(row["collection"], row["index"]): row["status"] for row in report}
+
+
+def test_idempotent(db):
+    assert set(statuses(ensure_indexes(check_only=True)).values()) == {"missing"}
+    assert set(statuses(ensure_indexes()).values()) == {"created"}
+    assert set(statuses(ensure_indexes()).values()) == {"exists"}
+    assert set(statuses(ensure_indexes(check_only=True)).values()) == {"exists"}
+    assert len(ensure_indexes()) == len(REQUIRED_INDEXES)
+
+
+def test_hand_made_indexes(db):
+    EVENTS_COLLECTION.create_index([("date", ASCENDING)], name="by_date")
+    FAMILY_COLLECTION.create_index([("slug", ASCENDING)], name="slug_plain")
+    report = {row["index"]: row for row in ensure_indexes()}
+
+    assert (report["date"]["status"], report["date"]["detail"]) == ("exists", "as 'by_date'")
+    # Not unique where it must be: reported, never dropped
+    assert report["slug_unique"]["status"] == "conflict"
+    assert "slug_plain" in FAMILY_COLLECTION.index_information()
+
+
+def test_plan_stages():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "OR", "inputStages": [
+        {"stage": "IXSCAN"}, {"stage": "COLLSCAN"}]}}
+    assert _plan_stages(plan) == ["FETCH", "OR", "IXSCAN", "COLLSCAN"]
+
+
+def test_index_problems():
+    result = {
+        "indexes": [{"collection": "members", "index": "name", "status": "exists", "detail": ""},
+                    {"collection": "members", "index": "slug_unique", "status": "conflict",
+                     "detail": "'slug_1' has unique=False"}],
+        "queries": [{"query": "members by name", "stages": ["FETCH", "IXSCAN"], "collscan": False},
+                    {"query": "members by slug", "stages": ["COLLSCAN"], "collscan": True},
+                    {"query": "login by email", "error": "no explain"}],
+    }
+    assert index_problems(result) == [
+        "index members.slug_unique: conflict ('slug_1' has unique=False)",
+        "query 'members by slug': COLLSCAN [COLLSCAN]",
+        "query 'login by email': explain failed (no explain)",
+    ]
+
+
+def test_startup_never_raises(db, monkeypatch):
+    def broken(check_only=False):
+        raise RuntimeError("server down")
+    monkeypatch.setattr(indexes, "bootstrap_indexes", broken)
+
+    assert indexes.bootstrap_on_startup() is None
+    last = indexes.get_last_bootstrap()
+    assert last["error"] == "server down" and last["at"]
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from handlers.kinship import KinshipIndex, describe_blood, get_relation
+
+FAMILY = [
+    {"slug": "dinesh", "name": "Dinesh Kumar", "gender": "M", "parents": [], "spouse": "Kamla Devi"},
+    {"slug": "kamla", "name": "Kamla Devi", "gender": "F", "parents": []},
+    {"slug": "ram", "name": "Ram Kumar", "gender": "M", "parents": ["Dinesh Kumar"], "spouse": "Sita Devi"},
+    {"slug": "sita", "name": "Sita Devi", "gender": "F", "parents": ["Hari Pandey"]},
+    {"slug": "hari", "name": "Hari Pandey", "gender": "M", "parents": []},
+    {"slug": "gita", "name": "Gita Kumari", "gender": "F", "parents": ["Dinesh Kumar"]},
+    {"slug": "lav", "name": "Lav Kumar", "gender": "M", "parents": ["Ram Kumar"]},
+    {"slug": "pooja", "name": "Pooja Kumari", "gender": "F", "parents": ["Ram Kumar"]},
+    {"slug": "anu", "name": "Anu Kumari", "gender": "F", "parents": ["Lav Kumar"]},
+    {"slug": "gita-son", "name": "Mohan Verma", "gender": "M", "parents": ["Gita Kumari"]},
+    {"slug": "mohan-son", "name": "Sonu Verma", "gender": "M", "parents": ["Mohan Verma"]},
+]
+
+
+@pytest.fixture(scope="module")
+def kin():
+    return KinshipIndex(FAMILY)
+
+
+@pytest.mark.parametrize("a, b, relation, hindi", [
+    ("lav", "ram", "son", "beta"),
+    ("dinesh", "anu", "great-grandfather", "pardada"),
+    ("pooja", "lav", "sister", "behen"),
+    ("gita", "lav", "aunt", "bua"),
+    ("lav", "gita-son", "first cousin", "chachera bhai"),
+    ("anu", "gita-son", "first cousin once removed", None),
+    ("anu", "mohan-son", "second cousin", None),
+    ("kamla", "ram", "mother", "mata"),
+    ("sita", "ram", "wife", "patni"),
+    ("sita", "dinesh", "daughter-in-law", "bahu"),
+    ("hari", "ram", "father-in-law", "sasur"),
+    ("ram", "ram", "self", None),
+])
+def test_relations(kin, a, b, relation, hindi):
+    result = kin.relation(a, b)
+    assert (result["relation"], result["hindi"]) == (relation, hindi)
+
+
+def test_path_and_unknown(kin):
+    result = kin.relation("anu", "gita-son")
+    assert result["common_ancestor"] == "dinesh" and result["generations"] == (3, 2)
+    assert result["path"] == ["anu", "lav", "ram", "dinesh", "gita", "gita-son"]
+    assert kin.relation("anu", "nobody") is None
+    assert kin.relation("hari", "lav")["kind"] == "none"
+
+
+def test_cycles_are_cut():
+    kin = KinshipIndex([{"slug": "a", "name": "A", "parents": ["B"]},
+                        {"slug": "b", "name": "B", "parents": ["A"]}])
+    assert sorted(kin.depth) == [0, 1]
+    assert kin.relation("a", "b")["kind"] == "blood"
+
+
+def test_describe_blood_far_removed():
+    assert describe_blood(6, 0, False) == ("great-great-great-great-grandson", None)
+    assert describe_blood(1, 5, True) == ("great-great-grand-aunt", None)
+    assert describe_blood(7, 4, False) == ("third cousin 3 times removed", None)
+
+
+def test_lca_matches_a_walk_up(village):
+    kin = KinshipIndex(village)
+    rnd = random.Random(4)
+
+    def chain(i):
+        line = [i]
+        while kin.parent[line[-1]] >= 0:
+            line.append(kin.parent[line[-1]])
+        return line
+
+    for _ in range(300):
+        a, b = rnd.randrange(len(kin)), rnd.randrange(len(kin))
+        above_b = set(chain(b))
+        expected = next((i for i in chain(a) if i in above_b), -1)
+        assert kin.lca(a, b) == expected
+
+
+def test_shared_relation(village):
+    child = next(d for d in village if d["parents"])
+    father = next(d for d in village if d["name"] == child["parents"][0])
+    assert get_relation(child["slug"], father["slug"])["kind"] == "blood"
@@ -0,0 +1,51 @@
+import random
+
+from handlers.label_index import MemberLabelIndex, build_member_label
+
+
+def test_labels():
+    assert build_member_label({"name": "Ram", "parents": ["Dinesh"], "association": "son"}) == "Ram (s/o Dinesh)"
+    assert build_member_label({"name": "Gita", "parents": ["Dinesh"], "gender": "Female"}) == "Gita (d/o Dinesh)"
+    assert build_member_label({"name": "Sita", "association": "Daughter-in-law", "spouse": "Ram"}) == "Sita (w/o Ram)"
+    assert build_member_label({"name": "Sita", "association": "bahu", "spouse": "Ram",
+                               "parents_in_law": ["Dinesh"]}) == "Sita (d/o-in-law of Dinesh)"
+    assert build_member_label({"name": "Mohan", "association": "son-in-law", "spouse": "Gita"}) == "Mohan (h/o Gita)"
+    assert build_member_label({"name": "Loner"}) == "Loner"
+
+
+def test_same_label_gets_the_slug():
+    index = MemberLabelIndex([
+        {"slug": "ram-kumar", "name": "Ram Kumar", "parents": ["Dinesh"]},
+        {"slug": "ram-kumar-1", "name": "Ram Kumar", "parents": ["Dinesh"]},
+        {"name": "No Slug"},
+        {"slug": "nameless"},
+    ])
+    assert index.label_to_slug == {"Ram Kumar (s/o Dinesh)": "ram-kumar",
+                                   "Ram Kumar (s/o Dinesh) [ram-kumar-1]": "ram-kumar-1",
+                                   "No Slug": "No Slug"}
+    assert index.sorted_labels == sorted(index.label_to_slug)
+    assert index.get_name("ram-kumar-1") == "Ram Kumar" and index.get_name("nameless") is None
+
+
+def test_patched_copy_matches_a_rebuild(village):
+    rnd = random.Random(3)
+    docs = {d["slug"]: dict(d) for d in village}
+    live = MemberLabelIndex(list(docs.values()))
+    index = live.copy()
+
+    for slug in rnd.sample(sorted(docs), 20):
+        docs.pop(slug)
+        index.remove(slug)
+    for slug in rnd.sample(sorted(docs), 20):
+        docs[slug]["parents"] = [rnd.choice(village)["name"]]
+        index.upsert({"slug": slug, "parents": docs[slug]["parents"]})
+    renamed = rnd.choice(sorted(docs))
+    docs[renamed + "-x"] = {**docs.pop(renamed), "slug": renamed + "-x"}
+    index.upsert({"slug": renamed + "-x"}, old_slug=renamed)
+
+    fresh = MemberLabelIndex(list(docs.values()))
+    assert index.signature() == fresh.signature()
+    assert index.sorted_labels == sorted(index.label_to_slug)
+    assert len(index) == len(fresh)
+    # The live index readers hold is untouched
+    assert len(live) == len(village) and renamed in live.docs
@@ -0,0 +1,75 @@
+import random
+
+import pandas as pd
+import pytest
+
+from data.bulk_update import _process_update_logic
+from data.database import FAMILY_COLLECTION
+from handlers.graph_index import as_name_list
+from handlers.lineage import get_ancestors, get_descendants, rebuild_all_lineage
+
+from conftest import bulk_write_works
+
+pytestmark = bulk_write_works
+
+
+def _expected_lineage(docs):
+    """slug -> {ancestor slug: smallest depth}, parents resolved by name (first member wins)."""
+    first = {}
+    for doc in docs:
+        first.setdefault(doc["name"], doc)
+    expected = {}
+    for doc in docs:
+        depths, frontier, depth = {}, [doc], 0
+        while frontier:
+            depth += 1
+            parents = [first[p] for d in frontier for p in as_name_list(d.get("parents")) if p in first]
+            frontier = [p for p in parents if p["slug"] not in depths and p["slug"] != doc["slug"]]
+            for p in frontier:
+                depths[p["slug"]] = depth
+        expected[doc["slug"]] = depths
+    return expected
+
+
+def _stored_lineage():
+    return {d["slug"]: {e["slug"]: e["depth"] for e in d.get("lineage", [])}
+            for d in FAMILY_COLLECTION.find({}, {"_id": 0, "slug": 1, "lineage": 1})}
+
+
+@pytest.fixture
+def village_with_lineage(village):
+    rebuild_all_lineage()
+    return village
+
+
+def test_rebuild_matches_a_walk_up_the_names(village_with_lineage):
+    docs = list(FAMILY_COLLECTION.find({}, {"_id": 0}))
+    assert _stored_lineage() == _expected_lineage(docs)
+
+
+def test_ancestors_and_descendants_read_the_path(village_with_lineage):
+    expected = _expected_lineage(list(FAMILY_COLLECTION.find({}, {"_id": 0})))
+    person = max(village_with_lineage, key=lambda d: len(expected[d["slug"]]))
+    ancestors = get_ancestors(FAMILY_COLLECTION, person["slug"])
+    assert {a["slug"]: a["depth"] for a in ancestors} == expected[person["slug"]]
+    root = next(slug for slug, depth in expected[person["slug"]].items() if depth == max(expected[person["slug"]].values()))
+    below = {d["slug"] for d in get_descendants(FAMILY_COLLECTION, root)}
+    assert below == {slug for slug, up in expected.items() if root in up}
+
+
+def test_bulk_parent_edit_refreshes_lineage_with_stamps(village_with_lineage):
+    rnd = random.Random(6)
+    picked = rnd.sample(village_with_lineage, 25)
+    names = [d["name"] for d in village_with_lineage]
+    before = _stored_lineage()
+    df = pd.DataFrame({"slug": [d["slug"] for d in picked], "parents": [rnd.choice(names) for _ in picked]})
+    _process_update_logic(df, "slug", "parents", "parents")
+
+    after = _stored_lineage()
+    # The incremental refresh left nothing for a full rebuild to fix
+    assert rebuild_all_lineage() == 0
+    # Members below the edited ones moved too, and were stamped for delta sync
+    moved = {slug for slug in after if after[slug] != before[slug]} - set(df["slug"])
+    assert moved
+    stamped = {d["slug"] for d in FAMILY_COLLECTION.find({"slug": {"$in": list(moved)}, "updated_at": {"$exists": True}})}
+    assert stamped == moved
@@ -0,0 +1,61 @@
+import random
+
+from data.data_version import bump_members_version
+from data.database import FAMILY_COLLECTION
+from data.member_sync import utc_now
+from handlers.label_index import _SHARED_LABELS
+from handlers.member_events import emit_member_change, get_sync_stats
+from handlers.typeahead import _SHARED_TYPEAHEAD, search_members
+
+from conftest import assert_matches_rebuild
+
+
+def test_patches_match_a_full_rebuild(village):
+    before = get_sync_stats()["structures"]
+    rnd = random.Random(2)
+    names = [d["name"] for d in village]
+
+    # Add: a namesake and a brand new name, each a child of someone on record
+    for i, name in enumerate([rnd.choice(names), "Brand New Person"]):
+        new = {"slug": f"new-{i}", "name": name, "gender": "M", "association": "son",
+               "parents": [rnd.choice(names)], "spouse": "", "parents_in_law": [], "updated_at": utc_now()}
+        FAMILY_COLLECTION.insert_one(new)  # stamps _id, like add_member
+        emit_member_change(bump_members_version(count_delta=1), upserted=[new])
+
+    # Edit: rename, new parents, one slug change
+    for i, person in enumerate(rnd.sample(village, 4)):
+        payload = {"slug": person["slug"] + "-x" if i == 0 else person["slug"], "name": person["name"] + " Jr",
+                   "parents": [rnd.choice(names)], "spouse": rnd.choice(names), "updated_at": utc_now()}
+        FAMILY_COLLECTION.update_one({"slug": person["slug"]}, {"$set": payload})
+        emit_member_change(bump_members_version(), upserted=[{**payload, "_old_slug": person["slug"]}])
+
+    # Delete
+    for person in rnd.sample(village, 3):
+        FAMILY_COLLECTION.delete_one({"slug": person["slug"]})
+        emit_member_change(bump_members_version(count_delta=-1), removed_slugs=[person["slug"]])
+
+    after = get_sync_stats()["structures"]
+    for name, counts in after.items():
+        assert counts["patched"] - before[name]["patched"] == 9, name
+        assert counts["failed"] == before[name]["failed"], name
+    assert_matches_rebuild()
+
+
+def test_typeahead_patch_never_builds_the_label_index(village, monkeypatch):
+    _SHARED_LABELS.invalidate()
+    before = get_sync_stats()["structures"]["typeahead_index"]
+
+    new = {"slug": "zyx-new", "name": "Zyxwell Newcomer", "gender": "M", "parents": [], "updated_at": utc_now()}
+    FAMILY_COLLECTION.insert_one(new)
+    scans = []
+    monkeypatch.setattr("handlers.label_index.scan_members", lambda *a, **k: scans.append(a) or [])
+    emit_member_change(bump_members_version(count_delta=1), upserted=[new])
+    monkeypatch.undo()
+
+    assert not scans
+    assert _SHARED_LABELS.value is None
+    after = get_sync_stats()["structures"]["typeahead_index"]
+    assert after["skipped"] == before["skipped"] + 1
+    # The next read catches up instead
+    assert [slug for slug, _ in search_members("zyxwell")] == ["zyx-new"]
+    assert _SHARED_TYPEAHEAD.version == _SHARED_LABELS.version
@@ -0,0 +1,136 @@
+import random
+from datetime import timedelta
+
+import pytest
+
+from data import data_version, member_sync
+from data.data_version import bump_members_version
+from data.database import FAMILY_COLLECTION
+from data.member_sync import fetch_member_changes, record_tombstones, utc_now
+from handlers.graph_handlers import get_family_graph
+from handlers.graph_index import get_graph_index
+from handlers.label_index import get_label_index
+from handlers.typeahead import search_members
+
+from conftest import SHARED_RESOURCES, assert_matches_rebuild, warm_shared
+
+
+@pytest.fixture
+def members(db):
+    """Ten members last written a day ago, well outside any overlap."""
+    old = utc_now() - timedelta(days=1)
+    FAMILY_COLLECTION.insert_many(
+        [{"slug": f"m{i}", "name": f"Member {i}", "parents": [], "updated_at": old} for i in range(10)])
+    return utc_now()
+
+
+def _slugs(delta):
+    return [doc["slug"] for doc in delta.upserted]
+
+
+def test_nothing_changed(members):
+    delta = fetch_member_changes(members)
+    assert delta.upserted == [] and delta.removed_slugs == []
+    assert delta.high_water >= members
+
+
+def test_edits_and_deletes(members):
+    FAMILY_COLLECTION.update_one({"slug": "m3"}, {"$set": {"name": "Renamed", "updated_at": utc_now()}})
+    FAMILY_COLLECTION.delete_one({"slug": "m5"})
+    record_tombstones([("m5", "Member 5")])
+
+    delta = fetch_member_changes(members)
+    assert _slugs(delta) == ["m3"]
+    assert delta.upserted[0]["name"] == "Renamed"
+    assert delta.removed_slugs == ["m5"]
+
+
+def test_slug_rename_removes_the_old_slug(members):
+    FAMILY_COLLECTION.update_one({"slug": "m2"}, {"$set": {"slug": "m2-new", "updated_at": utc_now()}})
+    record_tombstones([("m2", "Member 2")])
+
+    delta = fetch_member_changes(members)
+    assert _slugs(delta) == ["m2-new"]
+    assert delta.removed_slugs == ["m2"]
+
+
+def test_tombstone_of_a_live_slug_is_not_a_removal(members):
+    # Deleted, then added again under the same slug
+    FAMILY_COLLECTION.delete_one({"slug": "m7"})
+    record_tombstones([("m7", "Member 7"), ("m7", "Member 7")])
+    FAMILY_COLLECTION.insert_one({"slug": "m7", "name": "Member 7", "parents": [], "updated_at": utc_now()})
+    record_tombstones([("m8", "Member 8"), ("m8", "Member 8"), ("", "No Slug")])
+
+    delta = fetch_member_changes(members)
+    assert _slugs(delta) == ["m7"]
+    assert delta.removed_slugs == ["m8"]
+
+
+def test_overlap_reaches_back_before_the_mark(members):
+    stamped = members - timedelta(seconds=member_sync.DELTA_SYNC_OVERLAP_SECONDS // 2)
+    FAMILY_COLLECTION.update_one({"slug": "m1"}, {"$set": {"updated_at": stamped}})
+    assert _slugs(fetch_member_changes(members)) == ["m1"]
+
+
+def test_new_members_come_last(members):
+    FAMILY_COLLECTION.insert_one({"slug": "m10", "name": "Member 10", "parents": [], "updated_at": utc_now()})
+    FAMILY_COLLECTION.update_one({"slug": "m9"}, {"$set": {"updated_at": utc_now()}})
+    FAMILY_COLLECTION.update_one({"slug": "m0"}, {"$set": {"updated_at": utc_now()}})
+    assert _slugs(fetch_member_changes(members)) == ["m0", "m9", "m10"]
+
+
+def test_full_rebuild_when_too_many_or_too_old(members):
+    for i in range(3):
+        FAMILY_COLLECTION.update_one({"slug": f"m{i}"}, {"$set": {"updated_at": utc_now()}})
+    assert fetch_member_changes(members, max_changes=2) is None
+    assert fetch_member_changes(members, max_changes=3) is not None
+    too_old = utc_now() - timedelta(days=member_sync.TOMBSTONE_TTL_DAYS)
+    assert fetch_member_changes(too_old) is None
+    assert fetch_member_changes(None) is None
+
+
+def test_same_version_shares_one_fetch(members):
+    first = fetch_member_changes(members, version="7-10")
+    FAMILY_COLLECTION.update_one({"slug": "m4"}, {"$set": {"updated_at": utc_now()}})
+    assert fetch_member_changes(members, version="7-10") is first
+    # An older mark needs more than the shared fetch reached back for
+    assert fetch_member_changes(members - timedelta(hours=1), version="7-10") is not first
+
+
+def test_catch_up_after_another_process_wrote(village):
+    rnd = random.Random(4)
+    # Another process: edits and a delete, no events here, only stamps and tombstones
+    for person in rnd.sample(village, 10):
+        FAMILY_COLLECTION.update_one({"slug": person["slug"]},
+                                     {"$set": {"name": person["name"] + " Sr", "updated_at": utc_now()}})
+    gone = rnd.choice(village)
+    FAMILY_COLLECTION.delete_one({"slug": gone["slug"]})
+    record_tombstones([(gone["slug"], gone["name"])])
+    bump_members_version(count_delta=-1)
+
+    deltas = [resource.stats["deltas"] for resource in SHARED_RESOURCES]
+    warm_shared()
+    assert [resource.stats["deltas"] for resource in SHARED_RESOURCES] == [n + 1 for n in deltas]
+    assert_matches_rebuild()
+
+
+@pytest.mark.parametrize("write", ["insert", "delete"])
+def test_untracked_insert_or_delete_rebuilds(village, write):
+    # Written outside the app: no updated_at, no tombstone, no version bump
+    if write == "insert":
+        FAMILY_COLLECTION.insert_one({"slug": "stray", "name": "Stray Walker", "parents": [village[0]["name"]]})
+    else:
+        FAMILY_COLLECTION.delete_one({"slug": village[1]["slug"]})
+    data_version.get_members_version(force=True)
+
+    builds = [resource.stats["builds"] for resource in SHARED_RESOURCES]
+    warm_shared()
+    assert [resource.stats["builds"] for resource in SHARED_RESOURCES] == [n + 1 for n in builds]
+    assert_matches_rebuild()
+
+    present = get_graph_index().find_member("stray" if write == "insert" else village[1]["slug"]) is not None
+    assert present == (write == "insert")
+    if write == "insert":
+        assert "stray" in get_label_index().docs
+        assert search_members("stray walker")[0][0] == "stray"
+        assert "stray walker" in get_family_graph().person_map
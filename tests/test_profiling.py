@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import bson
+import pytest
+
+from handlers import profiling
+from handlers.profiling import MongoCommandProfiler, profile_rerun, query_shape, reply_size
+
+
+def test_query_shape_drops_values():
+    assert query_shape("find", {"find": "members", "filter": {"slug": "ram", "name": "Ram"}}) == \
+        "find members {name, slug}"
+    assert query_shape("aggregate", {"aggregate": "members", "pipeline": [{"$match": {}}, {"$graphLookup": {}}]}) == \
+        "aggregate members {$match, $graphLookup}"
+    assert query_shape("update", {"update": "members", "updates": [{"q": {"_id": 1}, "u": {}}]}) == \
+        "update members {_id}"
+    assert query_shape("getMore", {"getMore": 123, "collection": "members"}) == "getMore members"
+
+
+def test_reply_size():
+    doc = {"name": "Ram Kumar", "parents": ["Dinesh Kumar"]}
+    assert reply_size({"cursor": {"firstBatch": [doc] * 10}}) == len(bson.encode(doc)) * 10
+    assert reply_size({"cursor": {"nextBatch": []}}) == 0
+    assert reply_size({"ok": 1, "n": 3}) == len(bson.encode({"ok": 1, "n": 3}))
+    assert reply_size(None) == 0
+
+
+def event(request_id, command_name="find", command=None, reply=None):
+    return SimpleNamespace(connection_id=("localhost", 27017), request_id=request_id,
+                           command_name=command_name, command=command or {"find": "members", "filter": {"slug": 1}},
+                           duration_micros=2000, reply=reply or {"ok": 1})
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_RERUNS", True)
+    monkeypatch.setattr(profiling, "PROFILE_LOG_PATH", str(tmp_path / "logs" / "reruns.jsonl"))
+    monkeypatch.setattr(profiling, "_HISTORY", profiling.deque(maxlen=10))
+    return MongoCommandProfiler()
+
+
+def test_commands_count_against_the_rerun(profiler, tmp_path):
+    with profile_rerun("Search", session_id="s1") as profile:
+        for i in range(6):
+            profiler.started(event(i))
+            profiler.succeeded(event(i))
+        profiler.started(event(99, "ping", {"ping": 1}))
+        profiler.succeeded(event(99, "ping", {"ping": 1}))
+        profiler.started(event(7))
+        profiler.failed(event(7))
+    # Outside a rerun (startup, background threads)
+    profiler.started(event(8))
+    profiler.succeeded(event(8))
+
+    assert (profile.queries, profile.failed) == (7, 1)
+    assert profile.server_ms == pytest.approx(14.0)
+    assert profile.repeated_shapes() == [("find members {slug}", 7)]
+    assert profiler.unattributed["queries"] == 1
+
+    record = profiling.recent_reruns("s1")[0]
+    assert record["page"] == "Search" and record["repeated"] == ["find members {slug}"]
+    with open(tmp_path / "logs" / "reruns.jsonl", encoding="utf-8") as f:
+        assert json.loads(f.readline())["queries"] == 7
+
+
+def test_record_kept_when_the_page_stops_early(profiler):
+    with pytest.raises(RuntimeError):
+        with profile_rerun("Tree"):
+            raise RuntimeError("st.rerun")
+    assert profiling.recent_reruns()[0]["page"] == "Tree"
+    assert profiling.page_summary()[0]["reruns"] == 1
+
+
+def test_off_by_default(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_RERUNS", False)
+    with profile_rerun("Search") as profile:
+        assert profile is None
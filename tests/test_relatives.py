@@ -0,0 +1,141 @@
+import random
+import time
+
+import pytest
+
+from data.database import FAMILY_COLLECTION
+from handlers.graph_index import INDEX_PROJECTION
+from handlers.request_handlers import (BatchedMongoSource, ConcurrentMongoSource,
+                                       _assemble_relatives, get_relatives)
+
+
+def _per_query_relatives(slug):
+    """The original get_relatives: one find_one/find per relative, links by name only."""
+    def find_one(query):
+        return FAMILY_COLLECTION.find_one(query, INDEX_PROJECTION)
+
+    def find(query):
+        return list(FAMILY_COLLECTION.find(query, INDEX_PROJECTION))
+
+    person = find_one({"slug": slug}) or find_one({"name": slug})
+    if not person:
+        return None
+
+    def get_by_name(name_str):
+        return find_one({"name": name_str}) if name_str else None
+
+    parents = [doc for doc in map(get_by_name, person.get("parents", [])) if doc]
+    grandparents = [doc for p in parents for doc in map(get_by_name, p.get("parents", [])) if doc]
+
+    target, spouse_name = person["name"], person.get("spouse")
+    children = []
+    for child in find({"parents": target}):
+        child_parents = child.get("parents", [])
+        others = [p for p in child_parents if p != target]
+        if spouse_name and len(child_parents) > 1 and others:
+            if others[0] == spouse_name or others[0] in spouse_name or spouse_name in others[0]:
+                children.append(child)
+        else:
+            children.append(child)
+
+    grandchildren = []
+    for child in children:
+        for gc in find({"parents": child["name"]}):
+            gc["child_of"] = child["name"]
+            grandchildren.append(gc)
+
+    spouse = get_by_name(spouse_name) if spouse_name else None
+
+    raw_in_laws = person.get("parents_in_law", [])
+    if not raw_in_laws and spouse:
+        raw_in_laws = spouse.get("parents", [])
+    parents_in_law = [get_by_name(n) or {"name": n, "gender": "Unknown"} for n in raw_in_laws]
+
+    children_in_law = []
+    for child in children:
+        if child.get("spouse"):
+            c_spouse = get_by_name(child["spouse"]) or {"name": child["spouse"], "gender": "Unknown"}
+            c_spouse["spouse_of"] = child["name"]
+            children_in_law.append(c_spouse)
+
+    return {"target": person, "spouse": spouse, "parents": parents, "grandparents": grandparents,
+            "children": children, "grandchildren": grandchildren,
+            "parents_in_law": parents_in_law, "children_in_law": children_in_law}
+
+
+@pytest.fixture
+def family(db):
+    """Two 'Ram Kumar's with different wives, a stored and a derived set of in-laws, missing docs."""
+    FAMILY_COLLECTION.insert_many([
+        {"slug": "dinesh", "name": "Dinesh Kumar", "gender": "M", "parents": [], "spouse": "Kamla Devi"},
+        {"slug": "kamla", "name": "Kamla Devi", "gender": "F", "parents": ["Old Pandey"], "spouse": "Dinesh Kumar"},
+        {"slug": "ram-1", "name": "Ram Kumar", "gender": "M", "parents": ["Dinesh Kumar", "Kamla Devi"],
+         "spouse": "Sita Devi", "association": "son"},
+        {"slug": "sita", "name": "Sita Devi", "gender": "F", "parents": ["Hari Pandey", "Lalita Pandey"],
+         "spouse": "Ram Kumar", "association": "daughter-in-law"},
+        {"slug": "ram-2", "name": "Ram Kumar", "gender": "M", "parents": [], "spouse": "Gita Devi",
+         "parents_in_law": ["Mohan Verma", "Nobody On Record"]},
+        {"slug": "gita", "name": "Gita Devi", "gender": "F", "parents": ["Mohan Verma"], "spouse": "Ram Kumar"},
+        {"slug": "mohan", "name": "Mohan Verma", "gender": "M", "parents": []},
+        {"slug": "hari", "name": "Hari Pandey", "gender": "M", "parents": []},
+        {"slug": "amit", "name": "Amit Kumar", "gender": "M", "parents": ["Ram Kumar", "Sita Devi"],
+         "spouse": "Priya Devi"},
+        {"slug": "ajay", "name": "Ajay Kumar", "gender": "M", "parents": ["Ram Kumar", "Gita Devi"],
+         "spouse": "Outside Wife"},
+        {"slug": "solo", "name": "Solo Kumar", "gender": "M", "parents": ["Ram Kumar"]},
+        {"slug": "priya", "name": "Priya Devi", "gender": "F", "parents": [], "spouse": "Amit Kumar"},
+        {"slug": "rohan", "name": "Rohan Kumar", "gender": "M", "parents": ["Amit Kumar", "Priya Devi"]},
+        {"slug": "vikas", "name": "Vikas Kumar", "gender": "M", "parents": ["Ajay Kumar"]},
+    ])
+
+
+@pytest.mark.parametrize("mode", ["index", "batched", "concurrent"])
+@pytest.mark.parametrize("slug", ["ram-1", "ram-2", "sita", "gita", "amit", "dinesh", "Ram Kumar"])
+def test_same_answer_as_the_per_query_path(family, mode, slug):
+    assert get_relatives(slug, mode=mode) == _per_query_relatives(slug)
+
+
+def test_unknown_member(family):
+    assert get_relatives("nobody", mode="index") is None
+
+
+@pytest.mark.parametrize("mode", ["index", "batched"])
+def test_same_answer_on_a_village(village, mode):
+    for person in random.Random(8).sample(village, 60):
+        assert get_relatives(person["slug"], mode=mode) == _per_query_relatives(person["slug"]), person["slug"]
+
+
+class _CountingCollection:
+    """Counts find/find_one calls on the way to the real collection."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = 0
+
+    def find(self, *args, **kwargs):
+        self.calls += 1
+        return self.collection.find(*args, **kwargs)
+
+    def find_one(self, *args, **kwargs):
+        self.calls += 1
+        return self.collection.find_one(*args, **kwargs)
+
+
+def test_batched_costs_a_fixed_number_of_queries(family):
+    collection = _CountingCollection(FAMILY_COLLECTION)
+    source = BatchedMongoSource(collection)
+    _assemble_relatives(source.find_member("ram-1"), source)
+    # The member, then names + children per generation
+    assert collection.calls <= 5
+
+
+def test_concurrent_gives_up_after_the_timeout(family):
+    class SlowCollection(_CountingCollection):
+        def find(self, *args, **kwargs):
+            time.sleep(0.5)
+            return super().find(*args, **kwargs)
+
+    source = ConcurrentMongoSource(SlowCollection(FAMILY_COLLECTION), timeout_ms=50)
+    person = FAMILY_COLLECTION.find_one({"slug": "ram-1"}, INDEX_PROJECTION)
+    with pytest.raises(TimeoutError):
+        _assemble_relatives(person, source)
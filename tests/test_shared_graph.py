@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from data.data_version import VersionChange, VersionedResource, bump_members_version, get_members_version
+from data.database import FAMILY_COLLECTION
+from handlers.graph_handlers import _SHARED_FAMILY_GRAPH, get_family_graph
+
+
+class Counted(list):
+    def copy(self):
+        return Counted(self)
+
+
+def counting_resource(delay=0.0):
+    builds = []
+
+    def build():
+        time.sleep(delay)
+        builds.append(1)
+        return Counted(["built"])
+    return VersionedResource(build, name="counted"), builds
+
+
+def test_one_build_per_version(db):
+    resource, builds = counting_resource()
+    first = resource.get("1-1")
+    assert resource.get("1-1") is first and len(builds) == 1
+    assert resource.get("2-1") is not first and len(builds) == 2
+
+
+def test_concurrent_readers_share_one_build(db):
+    resource, builds = counting_resource(delay=0.05)
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(resource.get("1-1"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_peek_never_builds(db):
+    resource, builds = counting_resource()
+    assert resource.peek() is None and not builds
+    resource.get()
+    assert resource.peek() is resource.value
+    bump_members_version()
+    assert resource.peek() is None and len(builds) == 1
+
+
+def test_patch_only_from_the_version_it_was_built_for(db):
+    resource, builds = counting_resource()
+    built = resource.get("1-1")
+
+    assert not resource.patch(VersionChange("0-1", "2-1"), lambda value: value.append("x"))
+    assert resource.patch(VersionChange("1-1", "2-1"), lambda value: value.append("x"))
+    # Copy and swap: a reader holding the old value never sees the write
+    assert built == ["built"] and resource.value == ["built", "x"]
+    assert resource.get("2-1") == ["built", "x"] and len(builds) == 1
+
+    def fail(value):
+        raise ValueError("bad write")
+    with pytest.raises(ValueError):
+        resource.patch(VersionChange("2-1", "3-1"), fail)
+    assert resource.value is None
+
+
+def test_family_graph_is_shared_until_the_data_changes(village):
+    graph = get_family_graph()
+    assert get_family_graph() is graph
+
+    # A write the app didn't report: only the version tells, and the graph follows it
+    FAMILY_COLLECTION.insert_one({"slug": "outsider", "name": "Outsider Person", "parents": []})
+    bump_members_version(count_delta=1)
+    assert get_family_graph() is not graph
+    assert "Outsider Person" in get_family_graph().name_map.values()
+    assert _SHARED_FAMILY_GRAPH.version == get_members_version()
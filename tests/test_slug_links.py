@@ -0,0 +1,79 @@
+from data.database import FAMILY_COLLECTION
+from data.slug_links import migrate_links, replace_slug_links, resolve_links
+
+from conftest import bulk_write_works
+
+MEMBERS = [
+    {"slug": "dinesh", "name": "Dinesh Kumar", "spouse": "Kamla Devi"},
+    {"slug": "kamla", "name": "Kamla Devi", "spouse": "Dinesh Kumar"},
+    # Two Ram Kumars: told apart by who they are married to
+    {"slug": "ram", "name": "Ram Kumar", "spouse": "Sita Devi", "parents": ["Dinesh Kumar", "Kamla Devi"]},
+    {"slug": "ram-1", "name": "Ram Kumar", "spouse": "Gita Devi"},
+    {"slug": "sita", "name": "Sita Devi", "spouse": "Ram Kumar"},
+    {"slug": "gita", "name": "Gita Devi", "spouse": "Ram Kumar"},
+    {"slug": "lav", "name": "Lav Kumar", "parents": ["Ram Kumar", "Sita Devi"], "parents_in_law": ["Nobody"]},
+    {"slug": "kush", "name": "Kush Kumar", "parents": ["Ram Kumar"]},
+]
+
+
+def candidates():
+    by_name = {}
+    for m in MEMBERS:
+        by_name.setdefault(m["name"], []).append(m)
+    return by_name
+
+
+def member(slug):
+    return dict(next(m for m in MEMBERS if m["slug"] == slug))
+
+
+def test_namesakes_told_apart_by_spouse():
+    fields, problems = resolve_links(member("lav"), candidates())
+    assert fields == {"parent_slugs": ["ram", "sita"], "parents_in_law_slugs": [None], "spouse_slug": None}
+    assert problems == [("parents_in_law", 0, "Nobody", "not found")]
+
+    # A wife names her husband: the Ram Kumar married to her
+    assert resolve_links(member("gita"), candidates())[0]["spouse_slug"] == "ram-1"
+
+
+def test_ambiguous_names_stay_unresolved():
+    fields, problems = resolve_links(member("kush"), candidates())
+    assert fields["parent_slugs"] == [None]
+    assert problems == [("parents", 0, "Ram Kumar", "ambiguous (2 members)")]
+
+
+def test_resolved_links_are_kept_unless_fresh():
+    doc = {**member("kush"), "parent_slugs": ["ram-1"]}
+    assert resolve_links(doc, candidates())[0]["parent_slugs"] == ["ram-1"]
+    assert resolve_links(doc, candidates(), fresh=True)[0]["parent_slugs"] == [None]
+
+
+@bulk_write_works
+def test_migrate_is_idempotent(db):
+    FAMILY_COLLECTION.insert_many([dict(m) for m in MEMBERS])
+    problems = []
+
+    dry = migrate_links(batch_size=3, dry_run=True, on_problem=lambda *p: problems.append(p))
+    assert FAMILY_COLLECTION.count_documents({"parent_slugs": {"$exists": True}}) == 0
+    assert dry["ambiguous"] == 1 and dry["not_found"] == 1 and len(problems) == 2
+
+    stats = migrate_links(batch_size=3)
+    assert stats["updated"] == len(MEMBERS)
+    assert FAMILY_COLLECTION.find_one({"slug": "lav"})["parent_slugs"] == ["ram", "sita"]
+    assert FAMILY_COLLECTION.find_one({"slug": "lav"})["updated_at"]
+    assert migrate_links(batch_size=3)["updated"] == 0
+
+
+@bulk_write_works
+def test_replace_slug_links(db):
+    FAMILY_COLLECTION.insert_many([dict(m) for m in MEMBERS])
+    migrate_links()
+
+    changes = replace_slug_links(FAMILY_COLLECTION, "ram", "ram-kumar")
+    assert sorted(c["slug"] for c in changes) == ["lav", "sita"]
+    assert FAMILY_COLLECTION.find_one({"slug": "lav"})["parent_slugs"] == ["ram-kumar", "sita"]
+
+    # Deleted: links fall back to the name
+    replace_slug_links(FAMILY_COLLECTION, "sita")
+    assert FAMILY_COLLECTION.find_one({"slug": "lav"})["parent_slugs"] == ["ram-kumar", None]
+    assert FAMILY_COLLECTION.find_one({"slug": "ram"})["spouse_slug"] is None
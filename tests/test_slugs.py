@@ -0,0 +1,25 @@
+from data.database import FAMILY_COLLECTION, SLUG_COUNTERS_COLLECTION
+from data.slugs import allocate_slug, slug_fits_base
+
+
+def test_fresh_name(db):
+    assert [allocate_slug("Ram Kumar ") for _ in range(3)] == ["ram-kumar", "ram-kumar-1", "ram-kumar-2"]
+
+
+def test_seeded_from_existing_slugs(db):
+    FAMILY_COLLECTION.insert_many([{"slug": s, "name": "Ram Kumar"} for s in ("ram-kumar", "ram-kumar-3")]
+                                  + [{"slug": "ram-kumar-senior", "name": "Ram Kumar Senior"}])
+    assert allocate_slug("Ram Kumar") == "ram-kumar-4"
+    assert SLUG_COUNTERS_COLLECTION.find_one({"_id": "ram-kumar"})["seeded"]
+
+    # Seeded once: later slugs come from the counter alone, even if members change
+    FAMILY_COLLECTION.insert_one({"slug": "ram-kumar-9", "name": "Ram Kumar"})
+    assert allocate_slug("Ram Kumar") == "ram-kumar-5"
+
+
+def test_slug_fits_base():
+    assert slug_fits_base("ram-kumar", "ram-kumar")
+    assert slug_fits_base("ram-kumar-12", "ram-kumar")
+    assert not slug_fits_base("ram-kumar-senior", "ram-kumar")
+    assert not slug_fits_base("ram", "ram-kumar")
+    assert not slug_fits_base(None, "ram-kumar")
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data.database import EVENTS_COLLECTION, FAMILY_COLLECTION
+from data.snapshot import Snapshot, export_snapshot
+from handlers.events_feed import EventsFeed, SnapshotEventsFeed
+from handlers.graph_index import INDEX_PROJECTION
+
+TODAY = datetime(2026, 6, 15)
+
+
+@pytest.fixture
+def snapshot(db, tmp_path):
+    FAMILY_COLLECTION.insert_many([
+        {"slug": "ram", "name": "Ram Kumar", "gender": "M", "parents": ["Dinesh Kumar"], "spouse": "Sita Devi",
+         "parent_slugs": [None], "lineage": [{"slug": "dinesh", "depth": 1}], "generation": 2},
+        {"slug": "sita", "name": "Sita Devi", "gender": "F", "parents": [], "phone": 98765},
+        {"slug": "dinesh", "name": "Dinesh Kumar", "work": "Farmer"},
+    ])
+    # Two events on some days, so the archive keyset needs the _id tie-break
+    EVENTS_COLLECTION.insert_many(
+        [{"title": f"Event {i}", "date": TODAY + timedelta(days=(i // 2) - 6), "location": "Village"}
+         for i in range(20)] + [{"title": "Undated"}])
+    export_snapshot(str(tmp_path))
+    return Snapshot(str(tmp_path))
+
+
+def test_header_and_version(snapshot):
+    assert snapshot.header["format"] == "1"
+    assert snapshot.version.startswith("snapshot:")
+    assert snapshot.members.num_rows == 3 and snapshot.events.num_rows == 21
+
+
+def test_member_docs_look_like_mongo_docs(snapshot):
+    docs = {d["slug"]: d for d in snapshot.member_docs(INDEX_PROJECTION)}
+    assert docs["ram"]["parents"] == ["Dinesh Kumar"]
+    assert docs["ram"]["parent_slugs"] == [None]
+    assert docs["sita"]["phone"] == "98765"
+    # Missing fields stay missing, only projected ones come back
+    assert docs["dinesh"] == {"slug": "dinesh", "name": "Dinesh Kumar", "work": "Farmer"}
+    assert "lineage" not in docs["ram"]
+    full = {d["slug"]: d for d in snapshot.member_docs()}
+    assert full["ram"]["lineage"] == [{"slug": "dinesh", "depth": 1}] and full["ram"]["generation"] == 2
+
+
+def _titles(events):
+    return [e["title"] for e in events]
+
+
+def test_upcoming_matches_the_live_feed(snapshot):
+    live = EventsFeed(EVENTS_COLLECTION).upcoming(TODAY)
+    assert _titles(SnapshotEventsFeed(snapshot).upcoming(TODAY)) == _titles(live)
+
+
+@pytest.mark.parametrize("page_size", [1, 3, 4, 50])
+def test_archive_pages_match_the_live_feed(snapshot, page_size):
+    def pages(feed):
+        titles, after = [], None
+        while True:
+            events, after = feed.archive_page(after, page_size=page_size, today=TODAY)
+            titles.append(_titles(events))
+            if after is None:
+                return titles
+
+    live = pages(EventsFeed(EVENTS_COLLECTION))
+    assert pages(SnapshotEventsFeed(snapshot)) == live
+    assert sum(map(len, live)) == 12
@@ -0,0 +1,39 @@
+import os
+
+from handlers.tree_cache import TreeRenderCache
+
+
+def test_key_follows_person_version_and_style():
+    key = TreeRenderCache.make_key("ram", "3-10", {"rankdir": "TB"})
+    assert key == TreeRenderCache.make_key("ram", "3-10", {"rankdir": "TB"})
+    assert key != TreeRenderCache.make_key("sita", "3-10", {"rankdir": "TB"})
+    assert key != TreeRenderCache.make_key("ram", "4-10", {"rankdir": "TB"})
+    assert key != TreeRenderCache.make_key("ram", "3-10", {"rankdir": "LR"})
+
+
+def test_memory_level_is_an_lru(tmp_path):
+    cache = TreeRenderCache(directory=str(tmp_path), max_items=2)
+    cache.put("a", "digraph a {}")
+    cache.put("b", "digraph b {}")
+    cache.get("a")
+    cache.put("c", "digraph c {}")
+    assert list(cache._memory) == ["a", "c"]
+
+
+def test_disk_level_is_shared_between_processes(tmp_path):
+    TreeRenderCache(directory=str(tmp_path)).put("k", "digraph {}", "<svg/>", [{"anchor": "Ram"}])
+
+    other = TreeRenderCache(directory=str(tmp_path))
+    assert other.get("k") == {"dot": "digraph {}", "svg": "<svg/>", "stubs": [{"anchor": "Ram"}]}
+    assert (other.hits, other.misses) == (1, 0)
+    assert other.get("missing") is None and other.misses == 1
+
+
+def test_disk_level_evicts_oldest_first(tmp_path):
+    cache = TreeRenderCache(directory=str(tmp_path), max_disk_bytes=2500)
+    for i in range(5):
+        cache.put(f"k{i}", "x" * 1000)
+        os.utime(cache._path(f"k{i}"), (i, i))
+    cache._evict_disk()
+
+    assert sorted(os.listdir(tmp_path)) == ["k3.json", "k4.json"]
@@ -0,0 +1,58 @@
+import pytest
+
+from data.database import FAMILY_COLLECTION
+from handlers.graph_handlers import get_focused_subgraph, get_focused_subgraph_from_db
+
+FAMILY = [
+    {"slug": "dinesh", "name": "Dinesh Kumar", "gender": "M", "parents": [], "spouse": "Kamla Devi"},
+    {"slug": "kamla", "name": "Kamla Devi", "gender": "F", "parents": ["Old Pandey"], "spouse": "Dinesh Kumar"},
+    {"slug": "ram", "name": "Ram Kumar", "gender": "M", "parents": ["Dinesh Kumar", "Kamla Devi"],
+     "spouse": "Sita Devi"},
+    {"slug": "shyam", "name": "Shyam Kumar", "gender": "M", "parents": ["Dinesh Kumar", "Kamla Devi"]},
+    {"slug": "sita", "name": "Sita Devi", "gender": "F", "parents": ["Hari Pandey"], "spouse": "Ram Kumar"},
+    {"slug": "hari", "name": "Hari Pandey", "gender": "M", "parents": []},
+    {"slug": "lav", "name": "Lav Kumar", "gender": "M", "parents": ["Ram Kumar", "Sita Devi"]},
+    {"slug": "kush", "name": "Kush Kumar", "gender": "M", "parents": ["Ram Kumar", "Sita Devi"]},
+    {"slug": "baby", "name": "Baby Kumar", "gender": "F", "parents": ["Kush Kumar"]},
+]
+
+
+@pytest.fixture
+def family(db):
+    FAMILY_COLLECTION.insert_many([dict(doc) for doc in FAMILY])
+
+
+def couples(spouses_map):
+    return {frozenset(pair) for pair in spouses_map.items()}
+
+
+@pytest.mark.parametrize("center", ["Ram Kumar", "Kamla Devi", "Baby Kumar", "Sita Devi"])
+def test_same_tree_as_the_in_memory_graph(family, center):
+    slug = next(doc["slug"] for doc in FAMILY if doc["name"] == center)
+    nodes, center_node, G, spouses_map, person_map = get_focused_subgraph_from_db(
+        FAMILY_COLLECTION, center, center_slug=slug)
+    expected = get_focused_subgraph(FAMILY, center)
+
+    assert nodes == expected[0]
+    assert center_node == expected[1]
+    assert couples(spouses_map) == couples(expected[3])
+    assert {(u, v) for u, v in G.edges if v in nodes} <= set(expected[2].edges)
+
+
+def test_max_depth_stops_both_ways(family):
+    nodes = get_focused_subgraph_from_db(FAMILY_COLLECTION, "Ram Kumar", max_depth=1)[0]
+    # Parents, children and spouses; not the grandparent or the grandchild
+    assert nodes == {"Ram Kumar", "Sita Devi", "Dinesh Kumar", "Kamla Devi", "Lav Kumar", "Kush Kumar"}
+
+
+def test_name_only_parents_and_outside_genders(family):
+    nodes, _, _, _, person_map = get_focused_subgraph_from_db(FAMILY_COLLECTION, "Ram Kumar")
+    assert "Old Pandey" in nodes
+    assert "Shyam Kumar" not in nodes and "Hari Pandey" not in nodes
+    # The spouse's parent is looked up for the father-first edge
+    assert person_map["hari pandey"]["gender"] == "M"
+
+
+def test_unknown_center(family):
+    assert get_focused_subgraph_from_db(FAMILY_COLLECTION, "ram kumar")[0] is None
+    assert get_focused_subgraph_from_db(FAMILY_COLLECTION, "Ram Kumar", center_slug="nobody")[0] is None
@@ -0,0 +1,65 @@
+import pytest
+
+from handlers.graph_handlers import (get_focused_subgraph, limit_focused_subgraph,
+                                     render_focused_tree)
+from handlers.tree_cache import TreeRenderCache, get_or_render_tree
+
+
+@pytest.fixture
+def family():
+    """Dinesh and Kamla, four married sons, two grandchildren under each son."""
+    docs = [
+        {"name": "Dinesh Kumar", "gender": "M", "parents": [], "spouse": "Kamla Devi"},
+        {"name": "Kamla Devi", "gender": "F", "parents": [], "spouse": "Dinesh Kumar"},
+    ]
+    for i in range(4):
+        son, wife = f"Son {i}", f"Wife {i}"
+        docs.append({"name": son, "gender": "M", "parents": ["Dinesh Kumar", "Kamla Devi"], "spouse": wife})
+        docs.append({"name": wife, "gender": "F", "parents": [], "spouse": son})
+        docs.extend({"name": f"Grandchild {i}{j}", "gender": "F", "parents": [son, wife]} for j in range(2))
+    return docs
+
+
+@pytest.mark.parametrize("max_nodes", [2, 5, 6, 9, 12])
+def test_spouses_count_toward_max_nodes(family, max_nodes):
+    limited, stubs = limit_focused_subgraph(get_focused_subgraph(family, "Dinesh Kumar"), max_nodes=max_nodes)
+    drawn = limited[0]
+
+    assert len(drawn) <= max_nodes
+    # Nobody is drawn without their spouse
+    for name in drawn:
+        spouse = limited[3].get(name)
+        assert spouse is None or spouse in drawn
+    # Everyone cut off is reported as a stub
+    hidden = {name for stub in stubs for name in stub["hidden"]}
+    assert hidden and not hidden & drawn
+
+
+def test_expanded_stub_goes_past_the_budget(family):
+    result = get_focused_subgraph(family, "Dinesh Kumar")
+    _, stubs = limit_focused_subgraph(result, max_nodes=4)
+    stub = stubs[0]
+
+    limited, _ = limit_focused_subgraph(result, max_nodes=4, expanded=[(stub["anchor"], stub["direction"])])
+    assert set(stub["hidden"]) <= limited[0]
+
+
+def test_render_returns_dot_and_stubs(family):
+    dot, stubs = render_focused_tree(family, "Dinesh Kumar", limits={"max_nodes": 6})
+    assert stubs
+    for stub in stubs:
+        assert f"+{len(stub['hidden'])} more" in dot.source
+
+    assert render_focused_tree(family, "Nobody On Record") == (None, [])
+
+
+def test_tree_cache_keeps_the_stubs(family, monkeypatch, tmp_path):
+    monkeypatch.setattr("handlers.tree_cache.TREE_RENDER_CACHE", TreeRenderCache(directory=str(tmp_path)))
+    monkeypatch.setattr("handlers.tree_cache.layout_svg", lambda source: None)
+    build = lambda: render_focused_tree(family, "Dinesh Kumar", limits={"max_nodes": 6})
+    _, stubs = build()
+
+    rendered = get_or_render_tree("dinesh", "1-18", {"max_nodes": 6}, build)
+    assert rendered["stubs"] == stubs
+    assert get_or_render_tree("dinesh", "1-18", {"max_nodes": 6}, lambda: (None, [])) == rendered
+    assert get_or_render_tree("nobody", "1-18", {}, lambda: (None, [])) is None
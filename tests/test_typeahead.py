@@ -0,0 +1,59 @@
+from handlers.label_index import MemberLabelIndex
+from handlers.typeahead import TypeaheadIndex, normalize, search_members
+
+DOCS = [
+    {"slug": "ram-kumar", "name": "Ram Kumar", "parents": ["Dinesh Kumar"]},
+    {"slug": "ramesh-verma", "name": "Ramesh Verma", "parents": ["Mohan Verma"]},
+    {"slug": "shyam", "name": "Shyam Sharma", "parents": ["Ram Kumar"]},
+    {"slug": "jose", "name": "José Pillai", "parents": []},
+    {"slug": "ramakrishna", "name": "Ramakrishna Rao", "parents": []},
+]
+
+
+def search(query, k=25):
+    labels = MemberLabelIndex(DOCS)
+    return [slug for slug, _ in TypeaheadIndex(labels).search(query, k)]
+
+
+def test_normalize():
+    assert normalize("  José-Pillai_Jr. ") == "jose pillai jr"
+
+
+def test_prefix_match_ranks_own_name_above_father():
+    assert search("ram") == ["ram-kumar", "ramakrishna", "ramesh-verma", "shyam"]
+    assert search("ram", k=1) == ["ram-kumar"]
+
+
+def test_every_word_must_match():
+    assert search("ram ver") == ["ramesh-verma"]
+    assert search("ram pillai") == []
+    assert search("") == []
+
+
+def test_longer_than_the_prefix_key_and_accents():
+    assert search("ramakri") == ["ramakrishna"]
+    assert search("ramesh") == ["ramesh-verma"]
+    assert search("jose") == ["jose"]
+
+
+def test_typos_fall_back_to_trigrams():
+    assert search("ramehs")[0] == "ramesh-verma"
+    assert search("ram kumra") == ["ram-kumar", "shyam"]
+
+
+def test_patched_copy_leaves_the_live_index_alone():
+    labels = MemberLabelIndex(DOCS)
+    live = TypeaheadIndex(labels)
+    index = live.copy()
+    index.remove("ram-kumar")
+    index.add("ravi", {"name": "Ravi Kumar"})
+
+    assert [slug for slug, _ in live.search("ra")] == ["ram-kumar", "ramakrishna", "ramesh-verma", "shyam"]
+    assert {slug for slug, _ in index.search("ra")} == {"ramakrishna", "ramesh-verma", "ravi", "shyam"}
+
+
+def test_shared_search_returns_labels(village):
+    person = village[0]
+    results = search_members(f"{person['name']} {person['slug']}")
+    assert person["slug"] in dict(results)
+    assert dict(results)[person["slug"]].startswith(person["name"])
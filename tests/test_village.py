@@ -0,0 +1,25 @@
+from benchmarks.village import synthetic_village
+
+
+def test_same_seed_same_village():
+    assert synthetic_village(500, seed=3) == synthetic_village(500, seed=3)
+    assert synthetic_village(500, seed=3) != synthetic_village(500, seed=4)
+
+
+def test_village_has_the_registry_messiness():
+    docs = synthetic_village(3000, seed=7)
+    names = [d["name"] for d in docs]
+    by_name = set(names)
+    assert len(docs) == 3000
+    assert len({d["slug"] for d in docs}) == len(docs)
+    # Namesakes, recorded daughters-in-law with their in-laws, parents never entered,
+    # parents from outside the village (not on record)
+    assert len(by_name) < len(names)
+    assert any(d["association"] == "daughter-in-law" and d["parents_in_law"] for d in docs)
+    assert any(d["association"] in ("son", "daughter") and not d["parents"] for d in docs)
+    assert any(p not in by_name for d in docs for p in d["parents"])
+
+
+def test_distinct_names():
+    docs = synthetic_village(2000, seed=7, distinct_names=True)
+    assert len({d["name"] for d in docs}) == len(docs)